@@ -0,0 +1,83 @@
+"""Throughput benchmark for the local text analyzer.
+
+    python -m benchmarks.bench_text_analysis --pages 2000 --words 500
+
+Generates deterministic synthetic patient-facing pages (plain words mixed
+with jargon, next-step and trust phrases), then reports single-core
+pages/sec and words/sec for ``analyze_text``. ``--min-rate`` turns it into a
+pass/fail check.
+"""
+import argparse
+import random
+import sys
+import time
+
+from pentrust.jargon import HEALTHCARE_JARGON, NEXT_STEP_CUES, TRUST_CUES
+from pentrust.text_analysis import PhraseMatcher, analyze_text, default_matcher, tokenize
+
+PLAIN_WORDS = (
+    "you", "your", "we", "our", "the", "a", "to", "and", "of", "for", "with", "on", "in", "at",
+    "visit", "doctor", "nurse", "clinic", "appointment", "care", "team", "health", "plan",
+    "insurance", "card", "form", "question", "help", "day", "time", "week", "phone", "online",
+    "portal", "message", "result", "test", "medicine", "pharmacy", "bill", "payment", "cost",
+    "please", "before", "after", "during", "when", "if", "can", "will", "may", "need", "should",
+    "information", "records", "request", "review", "approval", "family", "support", "safety",
+)
+
+
+def synthetic_page(rnd, words):
+    sentences = []
+    count = 0
+    while count < words:
+        length = rnd.randint(6, 32)
+        sentence = [rnd.choice(PLAIN_WORDS) for _ in range(length)]
+        for pool, chance in ((HEALTHCARE_JARGON, 0.6), (NEXT_STEP_CUES, 0.3), (TRUST_CUES, 0.2)):
+            if rnd.random() < chance:
+                sentence.insert(rnd.randrange(len(sentence)), rnd.choice(pool))
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        count += length
+    # Break into paragraphs, with the odd bullet list
+    lines = []
+    for i in range(0, len(sentences), 4):
+        prefix = "- " if rnd.random() < 0.2 else ""
+        lines.append(prefix + " ".join(sentences[i:i + 4]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=500, help="approximate words per page")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-rate", type=float, default=0.0,
+                        help="exit non-zero if pages/sec falls below this")
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    pages = [synthetic_page(rnd, args.words) for _ in range(args.pages)]
+    total_words = sum(len(tokenize(p)) for p in pages)
+
+    started = time.perf_counter()
+    PhraseMatcher({"jargon": HEALTHCARE_JARGON, "next_step": NEXT_STEP_CUES, "trust": TRUST_CUES})
+    compile_ms = (time.perf_counter() - started) * 1000
+    default_matcher()
+    analyze_text(pages[0])  # warm regex and syllable caches
+
+    started = time.perf_counter()
+    for page in pages:
+        analyze_text(page)
+    elapsed = time.perf_counter() - started
+
+    rate = len(pages) / elapsed
+    print(f"phrases compiled:  {len(default_matcher().phrases):,} in {compile_ms:.1f} ms")
+    print(f"pages analyzed:    {len(pages):,} (~{total_words / len(pages):,.0f} words each)")
+    print(f"elapsed:           {elapsed:.3f} s")
+    print(f"throughput:        {rate:,.0f} pages/s · {total_words / elapsed:,.0f} words/s (1 core)")
+    if rate < args.min_rate:
+        print(f"FAIL: {rate:,.0f} pages/s is below --min-rate {args.min_rate:,.0f}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
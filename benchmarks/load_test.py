@@ -0,0 +1,322 @@
+"""Multi-session load test for app reruns.
+
+    python -m benchmarks.load_test --sessions 8 --pages 1000
+    python -m benchmarks.load_test --sessions 32 --pages 10000 --actions 30 --think 0.5 --save load.json
+
+Starts ``streamlit run streamlit_app.py`` headless on a free port and
+connects one WebSocket client per simulated user, speaking the browser's
+protocol (``BackMsg`` rerun requests with widget states, ``ForwardMsg``
+deltas back). The sessions run at the same time against the one server,
+so they share its cached resources (analysis cache, job workers) and
+compete for its CPU and GIL, as real users do. Each session pastes its
+own page list, clicks Run analysis, sends the progress fragment's
+automatic reruns until its background job has finished (as the browser
+does), then switches between Dashboard, Deep Analysis and Portfolio and
+picks pages at random. Picking a page reruns only the page panel
+fragment, like in the browser.
+
+Every rerun is timed from the request to the server's "script finished"
+message, so the times include queueing behind other sessions' reruns:
+that is the lag users see once the server is overloaded. The report
+gives p50/p95/p99 per action, reruns per second across all sessions and
+the server's resident memory per session (its growth divided by the
+session count, so the shared cache's share is included; Linux only).
+The server gets the usual ``PENTRUST_*`` variables, e.g.
+``PENTRUST_CACHE_PATH=`` for a cold, memory-only cache.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from benchmarks.run import environment, synthetic_urls
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+VIEWS = ("Dashboard", "Deep Analysis", "Portfolio")
+PERCENTILES = (50, 95, 99)
+STARTUP_TIMEOUT = 60.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid):
+    """Resident set size of process ``pid``, or None where /proc is missing."""
+    try:
+        with open(f"/proc/{pid}/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def start_server(port):
+    """``streamlit run`` the app headless on ``port``; returns the process
+    once the health check answers."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.address", "127.0.0.1", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"streamlit did not answer on port {port} within {STARTUP_TIMEOUT:.0f}s")
+
+
+def session_pages(session, pages, shared):
+    urls = synthetic_urls(pages)
+    if shared:
+        return urls
+    return [u.replace("/page-", f"/s{session}-page-") for u in urls]
+
+
+class Session:
+    """One simulated user: a WebSocket client plus the timings of its reruns."""
+
+    def __init__(self, number, args, url):
+        self.number = number
+        self.args = args
+        self.url = url
+        self.rng = random.Random(args.seed * 1_000_003 + number)
+        self.timings = []  # (action, seconds)
+        self.error = None
+        self.ws = None
+        self.page_script_hash = ""
+        # Widgets by label: (id, options, fragment id), as last drawn.
+        self.widgets = {}
+        # Labels drawn by the last full script run.
+        self.labels = set()
+        # Values the user has set, sent with every rerun like the browser does.
+        self.states = {}
+        self.poll_fragment = None
+
+    def _receive(self, data):
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.page_script_hash = msg.new_session.page_script_hash
+            if not msg.new_session.fragment_ids_this_run:
+                self.labels = set()
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            proto = getattr(element, element.WhichOneof("type"))
+            if element.WhichOneof("type") == "exception":
+                raise RuntimeError(f"{proto.type}: {proto.message}")
+            label = getattr(proto, "label", "")
+            if label and getattr(proto, "id", ""):
+                options = list(getattr(proto, "options", ()))
+                self.widgets[label] = (proto.id, options, msg.delta.fragment_id)
+                self.labels.add(label)
+        elif kind == "auto_rerun":
+            self.poll_fragment = (msg.auto_rerun.fragment_id, msg.auto_rerun.interval)
+        elif kind == "script_finished":
+            return msg.script_finished
+        return None
+
+    async def rerun(self, action, trigger=None, fragment_id="", auto=False):
+        """Send one rerun request and wait until the script has finished
+        (through any ``st.rerun`` it starts)."""
+        request = BackMsg()
+        rerun = request.rerun_script
+        rerun.page_script_hash = self.page_script_hash
+        rerun.fragment_id = fragment_id
+        rerun.is_auto_rerun = auto
+        rerun.widget_states.widgets.extend(self.states.values())
+        if trigger is not None:
+            rerun.widget_states.widgets.append(trigger)
+        started = time.perf_counter()
+        await self.ws.send(request.SerializeToString())
+        deadline = started + self.args.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f"{action}: no result within {self.args.timeout:.0f}s")
+            status = self._receive(await asyncio.wait_for(self.ws.recv(), remaining))
+            if status is not None and status != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.timings.append((action, time.perf_counter() - started))
+        if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+            raise RuntimeError(f"{action}: script failed to compile")
+
+    def _value(self, label, **value):
+        widget_id, _, fragment_id = self.widgets[label]
+        state = WidgetState(id=widget_id, **value)
+        return state, fragment_id
+
+    def set_value(self, label, **value):
+        state, fragment_id = self._value(label, **value)
+        self.states[state.id] = state
+        return fragment_id
+
+    async def think(self):
+        if self.args.think:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.args.think)
+
+    async def start(self):
+        await self.rerun("open")
+        pages = session_pages(self.number, self.args.pages, self.args.shared_pages)
+        self.set_value("Pages to review", string_value="\n".join(pages))
+        await self.think()
+        click, _ = self._value("Run analysis", trigger_value=True)
+        self.poll_fragment = None
+        await self.rerun("run", click)
+        # The job's progress fragment reruns itself until the job is done,
+        # then reruns the whole page, which drops the Cancel button.
+        while "Cancel run" in self.labels and self.poll_fragment is not None:
+            fragment_id, interval = self.poll_fragment
+            await asyncio.sleep(interval)
+            await self.rerun("poll", fragment_id=fragment_id, auto=True)
+
+    async def browse(self):
+        view = "Dashboard"
+        for _ in range(self.args.actions):
+            await self.think()
+            if view != "Portfolio" and self.rng.random() < 0.5:
+                _, options, _ = self.widgets["Select a page"]
+                fragment_id = self.set_value("Select a page", string_value=self.rng.choice(options))
+                await self.rerun("select page", fragment_id=fragment_id)
+            else:
+                view = self.rng.choice([v for v in VIEWS if v != view])
+                self.set_value("Navigation", string_value=view)
+                await self.rerun("switch view")
+
+    async def main(self, start):
+        try:
+            async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as self.ws:
+                await start.wait()
+                await self.start()
+                await self.browse()
+        except Exception as exc:  # reported with the results
+            self.error = f"session {self.number}: {type(exc).__name__}: {exc}"
+
+
+def run_stats(timings):
+    """Rerun time percentiles."""
+    seconds = np.asarray([t[1] for t in timings])
+    stats = {f"p{p}": float(np.percentile(seconds, p)) for p in PERCENTILES}
+    stats.update(count=len(seconds), mean=float(seconds.mean()), max=float(seconds.max()))
+    return stats
+
+
+async def drive(sessions):
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(s.main(start)) for s in sessions]
+    # Let every client connect before any of them starts.
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def run_load(args, log=print):
+    port = free_port()
+    server = start_server(port)
+    try:
+        before = rss_bytes(server.pid)
+        sessions = [Session(i, args, f"ws://127.0.0.1:{port}/_stcore/stream") for i in range(args.sessions)]
+        elapsed = asyncio.run(drive(sessions))
+        after = rss_bytes(server.pid)
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    timings = [t for s in sessions for t in s.timings]
+    by_action = {}
+    for timing in timings:
+        by_action.setdefault(timing[0], []).append(timing)
+    measured = before is not None and after is not None
+    results = {
+        "sessions": args.sessions,
+        "pages": args.pages,
+        "seconds": elapsed,
+        "reruns": len(timings),
+        "reruns_per_second": len(timings) / elapsed if elapsed else 0.0,
+        "rss_per_session_bytes": max(0, after - before) / len(sessions) if measured else None,
+        "rss_bytes": after,
+        "overall": run_stats(timings) if timings else None,
+        "actions": {action: run_stats(values) for action, values in by_action.items()},
+        "errors": [s.error for s in sessions if s.error],
+    }
+
+    log(f"{args.sessions} sessions × {args.pages:,} pages: {len(timings):,} reruns in {elapsed:.1f}s "
+        f"({results['reruns_per_second']:.1f} reruns/s)")
+    header = "".join(f"{f'p{p}':>10}" for p in PERCENTILES)
+    log(f"{'action':14} {'reruns':>7}{header}{'max':>10}   (ms)")
+    rows = [*results["actions"].items(), ("all", results["overall"])] if timings else []
+    for action, stats in rows:
+        cells = "".join(f"{stats[f'p{p}'] * 1000:10.1f}" for p in PERCENTILES)
+        log(f"{action:14} {stats['count']:>7,}{cells}{stats['max'] * 1000:10.1f}")
+    if measured:
+        log(f"server memory: {results['rss_per_session_bytes'] / 2**20:.1f} MiB per session, "
+            f"{after / 2**20:.0f} MiB resident")
+    for error in results["errors"]:
+        log(f"ERROR {error}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions (default: %(default)s)")
+    parser.add_argument("--pages", type=int, default=1000, help="pages pasted per session (default: %(default)s)")
+    parser.add_argument("--actions", type=int, default=20,
+                        help="view switches and page picks per session after the run (default: %(default)s)")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="average pause between a user's actions, in seconds (default: none)")
+    parser.add_argument("--shared-pages", action="store_true",
+                        help="every session pastes the same list (mostly cache hits) instead of its own")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per rerun")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--max-p95", type=float, default=0.0,
+                        help="exit non-zero if overall p95 rerun time exceeds this many seconds")
+    args = parser.parse_args(argv)
+    if args.sessions < 1 or args.pages < 1:
+        parser.error("--sessions and --pages must be at least 1")
+
+    results = run_load(args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"environment": environment(), "args": vars(args), "results": results}, fh,
+                      indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"saved results to {args.save}")
+    if results["errors"]:
+        return 1
+    p95 = results["overall"]["p95"]
+    if args.max_p95 and p95 > args.max_p95:
+        print(f"p95 rerun time {p95:.3f}s is over --max-p95 {args.max_p95}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Benchmark suite for the analysis and audit-table hot paths.
+
+    python -m benchmarks.run                          # 10, 1k, 100k pages
+    python -m benchmarks.run --sizes 10 1000 100000 1000000
+    python -m benchmarks.run --compare benchmarks/baseline.json
+    python -m benchmarks.run --save benchmarks/baseline.json
+
+Every case is timed without tracing (best of several repeats, at least
+``--min-time`` seconds of runs) and then run once more under
+``tracemalloc`` for its peak allocation (NumPy buffers included). Inputs
+are deterministic synthetic page lists, so runs are comparable.
+
+``--compare`` flags a case as a regression when it is more than
+``--threshold`` slower (or uses that much more peak memory) than the
+baseline, ignoring differences below ``--min-delta`` seconds so
+microsecond-scale cases don't flap. Wall times depend on the machine:
+refresh the baseline with ``--save`` when moving to new hardware.
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from pentrust.analysis import analyze_pages, normalize_urls, stable_seed
+from pentrust.batch import analyze_batch, analyze_many
+from pentrust.cache import AnalysisCache
+from pentrust.config import RUN_CHUNK_SIZE
+from pentrust.export import store_frames, write_export
+from pentrust.pipeline import RunProgress
+from pentrust.rewrite import rewrite_copy, rewrite_sentence
+from pentrust.rollup import PortfolioRollup
+from pentrust.store import AnalysisStore
+from pentrust.table import AuditTable, build_detailed_table
+from pentrust.urls import PageIndex
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+ALL_SIZES = (10, 1_000, 100_000, 1_000_000)
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+def synthetic_urls(n):
+    """Realistic-looking page list: a few hosts, nested paths, some tracking
+    parameters and trailing slashes; about 2% are repeats."""
+    hosts = ("https://www.example-health.org", "https://care.example.com", "HTTPS://Portal.Example.net")
+    sections = ("appointments", "billing", "insurance", "patients", "records", "pharmacy", "visits")
+    urls = []
+    for i in range(n):
+        j = i - 7 if i % 50 == 49 else i
+        url = f"{hosts[j % 3]}/{sections[j % 7]}/page-{j}"
+        if i % 11 == 0:
+            url += "/"
+        if i % 13 == 0:
+            url += "?utm_source=newsletter&utm_medium=email"
+        urls.append(url)
+    return urls
+
+
+BOILERPLATE = (
+    "Please remit your copay prior to your outpatient visit.",
+    "Prior authorization may be required for durable medical equipment.",
+    "To request records, complete the release of information form, attach supporting documentation, "
+    "sign the attestation, and return it to the front desk prior to your appointment.",
+    "Questions about your explanation of benefits? Contact billing.",
+    "This information will be used in accordance with our notice of privacy practices.",
+)
+
+
+def synthetic_copy(n):
+    """Page copy for the rewrite engine: a unique sentence per page plus
+    boilerplate shared across pages, as on a real site."""
+    return [
+        f"Page {i} explains how to manage hypertension and hyperlipidemia. "
+        f"{BOILERPLATE[i % len(BOILERPLATE)]} {BOILERPLATE[(i + 2) % len(BOILERPLATE)]}"
+        for i in range(n)
+    ]
+
+
+def cold_copy(n):
+    rewrite_sentence.cache_clear()
+    return synthetic_copy(n)
+
+
+def rewrite_all(texts):
+    # Suggestions are written out page by page (as the CLI does), not kept.
+    for text in texts:
+        rewrite_copy(text, ("Dense instructions", "Readability mismatch"))
+
+
+def synthetic_raw(n):
+    # As pasted: surrounding whitespace and a blank line every so often.
+    lines = synthetic_urls(n)
+    return "\n".join(f"  {u} \n" if i % 25 == 0 else u for i, u in enumerate(lines))
+
+
+# -----------------------------
+# Cases: setup(n) -> state, run(state); only run is measured
+# -----------------------------
+def _analyses(n):
+    urls = synthetic_urls(n)
+    return dict(zip(urls, analyze_many(urls)))
+
+
+def simulated_run(raw):
+    """A Run click followed by a rerun, without the Streamlit front end.
+
+    Mirrors the app: normalize and dedupe the paste, analyze in
+    RUN_CHUNK_SIZE chunks through the cache into an AnalysisStore,
+    refreshing the audit table index at doubling intervals; then rerun
+    (new store, every page a cache hit) and answer one table query.
+    """
+    cache = AnalysisCache(None, max_entries=10_000_000, analyze_many=analyze_many)
+    table = AuditTable()
+    for _ in range(2):
+        index = PageIndex(normalize_urls(raw))
+        urls = index.pages
+        store = AnalysisStore(aliases=index.aliases)
+        progress = RunProgress(len(urls))
+        while not progress.finished:
+            chunk = urls[progress.done:progress.done + RUN_CHUNK_SIZE]
+            store.update(zip(chunk, cache.get_or_compute_many(chunk)))
+            progress.advance(RUN_CHUNK_SIZE)
+            if progress.table_due():
+                table.index(store).query(page=1, page_size=50)
+        table.index(store).query(sort_by="Clarity score", risk_levels=["High"], search="billing", page=2)
+    return store
+
+
+class NullSink(io.RawIOBase):
+    """Binary file that drops what is written, so an export's peak memory
+    is the exporter's own, not the output's."""
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return len(data)
+
+
+CASES = {
+    "normalize_urls": (synthetic_raw, normalize_urls),
+    "dedupe_urls": (lambda n: normalize_urls(synthetic_raw(n)), PageIndex),
+    "stable_seed": (synthetic_urls, lambda urls: [stable_seed(u) for u in urls]),
+    "mock_analysis_for_url": (synthetic_urls, analyze_pages),
+    "analyze_batch": (synthetic_urls, analyze_batch),
+    "analyze_many": (synthetic_urls, analyze_many),
+    "build_detailed_table": (_analyses, build_detailed_table),
+    "audit_table_index": (
+        lambda n: AnalysisStore(_analyses(n)),
+        lambda store: AuditTable().index(store).query(sort_by="Trust score", page=1),
+    ),
+    "run_and_rerun": (synthetic_raw, simulated_run),
+    "export_csv": (
+        lambda n: AnalysisStore(_analyses(n)),
+        lambda store: write_export(store_frames(store), "csv", NullSink()),
+    ),
+    "rewrite_copy": (cold_copy, rewrite_all),
+    "portfolio_rollup": (
+        lambda n: AnalysisStore(_analyses(n)),
+        lambda store: PortfolioRollup().summary(store),
+    ),
+}
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def time_case(setup, run, n, min_time, max_repeats):
+    best = float("inf")
+    spent = 0.0
+    repeats = 0
+    while repeats < max_repeats and (repeats < 3 or spent < min_time):
+        state = setup(n)
+        gc.collect()
+        started = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        repeats += 1
+        if elapsed > 5 * min_time:
+            break  # big sizes: one run is plenty
+    return best, repeats
+
+
+def peak_memory(setup, run, n):
+    state = setup(n)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_suite(cases, sizes, min_time=0.2, max_repeats=50, memory=True, log=print):
+    results = {}
+    for name in cases:
+        setup, run = CASES[name]
+        for n in sizes:
+            seconds, repeats = time_case(setup, run, n, min_time, max_repeats)
+            peak = peak_memory(setup, run, n) if memory else None
+            results[f"{name}@{n}"] = {"seconds": seconds, "peak_bytes": peak, "repeats": repeats}
+            mem = f"{peak / 2**20:10.1f} MiB" if peak is not None else ""
+            log(f"{name:24} {n:>10,} pages {seconds * 1000:12.3f} ms {mem}")
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    """(key, metric, baseline value, new value) for every regression."""
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if new["seconds"] > old["seconds"] * (1 + threshold) and new["seconds"] - old["seconds"] > min_delta:
+            regressions.append((key, "seconds", old["seconds"], new["seconds"]))
+        old_peak, new_peak = old.get("peak_bytes"), new.get("peak_bytes")
+        if old_peak and new_peak and new_peak > old_peak * (1 + threshold) and new_peak - old_peak > 2**20:
+            regressions.append((key, "peak_bytes", old_peak, new_peak))
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="page counts (default: %(default)s; the full suite adds 1000000)")
+    parser.add_argument("--full", action="store_true", help=f"run every size: {ALL_SIZES}")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="keep repeating a case until this many seconds were measured")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown / memory growth counted as a regression (default: 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    sizes = ALL_SIZES if args.full else args.sizes
+    results = run_suite(args.cases, sizes, args.min_time, memory=not args.no_memory)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"environment": environment(), "results": results}, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key} {metric}: {old:,.4g} -> {new:,.4g} ({new / old - 1:+.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
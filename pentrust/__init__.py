@@ -0,0 +1,24 @@
+"""PenTrust analysis core, importable without starting the Streamlit app."""
+from pentrust.analysis import (
+    ANALYZER_VERSION,
+    ISSUE_POOL,
+    SCORE_NAMES,
+    analyze_pages,
+    iter_normalized,
+    mock_analysis_for_url,
+    normalize_urls,
+    page_digest,
+    stable_seed,
+)
+
+__all__ = [
+    "ANALYZER_VERSION",
+    "ISSUE_POOL",
+    "SCORE_NAMES",
+    "analyze_pages",
+    "iter_normalized",
+    "mock_analysis_for_url",
+    "normalize_urls",
+    "page_digest",
+    "stable_seed",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from pentrust.cli import main
+
+sys.exit(main())
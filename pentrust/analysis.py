@@ -0,0 +1,116 @@
+"""Page parsing and (demo) scoring logic."""
+import hashlib
+
+# Bump whenever the scoring logic changes so cached results are not reused.
+ANALYZER_VERSION = "mock-2"
+
+SCORE_NAMES = (
+    "Clarity",
+    "Next-step guidance",
+    "Trust signals",
+    "Accessibility-aware writing",
+)
+# Inclusive (low, high) demo range per score, in SCORE_NAMES order.
+# Scores intentionally not all perfect (so you can demo problems)
+SCORE_RANGES = ((58, 82), (52, 80), (55, 85), (48, 78))
+TREND_POINTS = 8
+TREND_JITTER = 8
+TREND_BOUNDS = (40, 90)
+
+ISSUE_POOL = (
+    ("Dense instructions", "Long paragraphs reduce scanability in critical flows."),
+    ("Unclear next steps", "Confirmation copy doesn’t specify the user's next action."),
+    ("Weak micro trust", "Lack of brief reassurance near sensitive content."),
+    ("Readability mismatch", "Reading level may be high for broad patient audiences."),
+    ("Accessibility gaps", "Content structure may not support assistive scanning."),
+)
+
+
+def iter_normalized(lines):
+    """Lazily strip lines and drop blanks, for inputs too big to hold at once."""
+    for line in lines:
+        line = line.strip()
+        # Allow simple labels too, but treat as "pages"
+        if line:
+            yield line
+
+
+def normalize_urls(raw: str):
+    if not raw:
+        return []
+    return list(iter_normalized(raw.splitlines()))
+
+
+def page_digest(text: str) -> str:
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def stable_seed(text: str) -> int:
+    return int(page_digest(text)[:8], 16)
+
+
+# Draws are counter-based (SplitMix64 of seed + k * golden ratio) rather than
+# a stateful generator, so pentrust.batch can compute the same stream for
+# many pages at once with NumPy.
+MASK64 = (1 << 64) - 1
+GOLDEN64 = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+
+DRAW_SCORES = 0       # 4 draws, one per score
+DRAW_ISSUES = 4       # 2 draws: first issue, then second of the remaining 4
+DRAW_TREND = 6        # TREND_POINTS draws
+DRAW_COUNT = DRAW_TREND + TREND_POINTS
+
+
+def page_seed64(text: str) -> int:
+    return int(page_digest(text)[:16], 16)
+
+
+def mix64(z: int) -> int:
+    """SplitMix64 finalizer: scrambles a 64-bit integer."""
+    z = ((z ^ (z >> 30)) * MIX1) & MASK64
+    z = ((z ^ (z >> 27)) * MIX2) & MASK64
+    return z ^ (z >> 31)
+
+
+def _draw(seed: int, k: int) -> int:
+    return mix64((seed + k * GOLDEN64) & MASK64)
+
+
+def mock_analysis_for_url(url: str):
+    seed = page_seed64(url)
+
+    clarity, next_steps, trust, accessibility = [
+        low + _draw(seed, DRAW_SCORES + i) % (high - low + 1)
+        for i, (low, high) in enumerate(SCORE_RANGES)
+    ]
+
+    # Pick 2 primary issues to show on dashboard
+    first = _draw(seed, DRAW_ISSUES) % len(ISSUE_POOL)
+    second = _draw(seed, DRAW_ISSUES + 1) % (len(ISSUE_POOL) - 1)
+    if second >= first:
+        second += 1
+    top_issues = [ISSUE_POOL[first], ISSUE_POOL[second]]
+
+    # Trend data for clarity chart
+    low, high = TREND_BOUNDS
+    trend = [
+        max(low, min(high, clarity + _draw(seed, DRAW_TREND + i) % (2 * TREND_JITTER + 1) - TREND_JITTER))
+        for i in range(TREND_POINTS)
+    ]
+
+    return {
+        "scores": {
+            "Clarity": clarity,
+            "Next-step guidance": next_steps,
+            "Trust signals": trust,
+            "Accessibility-aware writing": accessibility
+        },
+        "top_issues": top_issues,
+        "trend": trend
+    }
+
+
+def analyze_pages(pages):
+    return [mock_analysis_for_url(p) for p in pages]
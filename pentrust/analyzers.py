@@ -0,0 +1,33 @@
+"""Pluggable analyzer backends.
+
+Every backend maps a list of page contents to a list of analyses in the
+``mock_analysis_for_url`` shape, and carries a version that keys its cached
+results. For the mock backend the "content" is the URL or label itself.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from pentrust.analysis import ANALYZER_VERSION
+from pentrust.batch import analyze_many
+from pentrust.text_analysis import TEXT_ANALYZER_VERSION, analyze_texts
+
+
+@dataclass(frozen=True)
+class Analyzer:
+    name: str
+    version: str
+    analyze_many: Callable
+    description: str = ""
+
+
+ANALYZERS = {
+    "mock": Analyzer("mock", ANALYZER_VERSION, analyze_many, "Demo signals derived from the page name."),
+    "text": Analyzer("text", TEXT_ANALYZER_VERSION, analyze_texts, "Readability, jargon and cue analysis of page copy."),
+}
+
+
+def get_analyzer(name):
+    try:
+        return ANALYZERS[name]
+    except KeyError:
+        raise ValueError(f"unknown analyzer {name!r}; choose from {', '.join(ANALYZERS)}") from None
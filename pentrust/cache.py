@@ -0,0 +1,379 @@
+"""Two-tier cache in front of the page analyzer.
+
+Results are keyed by the page digest (the MD5 behind ``stable_seed``) plus the
+analyzer version, so a scoring change never serves stale results. The memory
+tier is a ``ResultStore`` shared by every session of the server process: a
+byte-budgeted LRU with a TTL holding packed, deduplicated results. The
+optional SQLite tier survives restarts; it has a row budget and a maximum
+age of its own.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from pentrust.analysis import ANALYZER_VERSION, SCORE_NAMES, analyze_pages, page_digest
+from pentrust.config import CACHE_DISK_MAX_AGE_DAYS, CACHE_DISK_MAX_ROWS
+
+# SQLite's default limit on bound parameters is 999 on older builds.
+_SQL_CHUNK = 500
+# Past its row budget the disk tier is pruned to this fraction of it, so
+# pruning (a COUNT and a DELETE) runs once per many writes.
+DISK_PRUNE_TO = 0.9
+# Seconds between sweeps of expired rows off the disk tier.
+DISK_SWEEP_SECONDS = 3600.0
+
+# Bytes an entry costs besides its payload: the (digest, version) key, the
+# OrderedDict slot and link, and the (expires_at, payload) pair. Measured
+# with tracemalloc on CPython 3.11.
+ENTRY_OVERHEAD = 320
+# Bytes an interned payload costs besides its own size (dedup table slot).
+PAYLOAD_OVERHEAD = 120
+# Packed payload: trend length, scores (SCORE_NAMES order), trend, then the
+# issue codes as native uint16.
+_TREND_START = 1 + len(SCORE_NAMES)
+
+
+class ResultStore:
+    """Thread-safe LRU of analyses with an entry limit, a byte budget and a TTL.
+
+    Keys are (digest, analyzer version). Values are stored packed: scores
+    and trend as bytes, issues as codes into one interned issue table, so
+    an entry is ~60 bytes of payload instead of a nested dict. Identical
+    payloads (the same result reached from several keys) are stored once
+    and counted once against the budget. ``get`` returns a fresh dict, so
+    callers can't alter what other sessions see.
+    """
+
+    def __init__(self, max_entries=50_000, ttl_seconds=3600.0, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, payload)
+        self._payloads = {}  # payload -> [the shared payload object, references]
+        self._issue_table = []
+        self._issue_codes = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """key -> analysis for the keys present; one lock round for the batch."""
+        found = {}
+        now = time.monotonic()
+        data = self._data
+        with self._lock:
+            for key in keys:
+                item = data.get(key)
+                if item is None:
+                    continue
+                expires_at, payload = item
+                if expires_at < now:
+                    self._drop(key)
+                    continue
+                data.move_to_end(key)
+                found[key] = payload
+        return {key: self._unpack(payload) for key, payload in found.items()}
+
+    def put(self, key, analysis):
+        self.put_many([(key, analysis)])
+
+    def put_many(self, items):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, analysis in items:
+                payload = self._pack(analysis)
+                if key in self._data:
+                    self._drop(key)
+                shared = self._payloads.get(payload)
+                if shared is None:
+                    shared = self._payloads[payload] = [payload, 0]
+                    self.nbytes += sys.getsizeof(payload) + PAYLOAD_OVERHEAD
+                shared[1] += 1
+                self._data[key] = (expires_at, shared[0])
+                self.nbytes += ENTRY_OVERHEAD
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+            ):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._payloads.clear()
+            self.nbytes = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "unique_results": len(self._payloads),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key):
+        _, payload = self._data.pop(key)
+        self.nbytes -= ENTRY_OVERHEAD
+        shared = self._payloads[payload]
+        shared[1] -= 1
+        if not shared[1]:
+            del self._payloads[payload]
+            self.nbytes -= sys.getsizeof(payload) + PAYLOAD_OVERHEAD
+
+    def _pack(self, analysis):
+        codes = array("H", (self._issue_code(issue) for issue in analysis["top_issues"]))
+        trend = analysis["trend"]
+        return (
+            bytes((len(trend),))
+            + bytes([analysis["scores"][name] for name in SCORE_NAMES])
+            + bytes(trend)
+            + codes.tobytes()
+        )
+
+    def _unpack(self, payload):
+        trend_end = _TREND_START + payload[0]
+        return {
+            "scores": dict(zip(SCORE_NAMES, payload[1:_TREND_START])),
+            "top_issues": [self._issue_table[code] for code in memoryview(payload[trend_end:]).cast("H")],
+            "trend": list(payload[_TREND_START:trend_end]),
+        }
+
+    def _issue_code(self, issue):
+        issue = tuple(issue)
+        code = self._issue_codes.get(issue)
+        if code is None:
+            code = self._issue_codes[issue] = len(self._issue_table)
+            self._issue_table.append(issue)
+        return code
+
+
+class SQLiteStore:
+    """On-disk tier: one row per (digest, analyzer version).
+
+    Rows older than ``max_age_seconds`` are no longer served and are swept
+    out; past ``max_rows`` the oldest written rows are deleted. ``None``
+    leaves either unbounded.
+    """
+
+    def __init__(self, path, max_rows=None, max_age_seconds=None):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.evictions = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analyses (
+                    digest TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (digest, version)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_created_at ON analyses (created_at)")
+            self._prune()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def get_many(self, digests, version):
+        found = {}
+        digests = list(digests)
+        cutoff = self._cutoff()
+        with self._lock:
+            for start in range(0, len(digests), _SQL_CHUNK):
+                chunk = digests[start:start + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT digest, payload FROM analyses"
+                    f" WHERE version = ? AND created_at >= ? AND digest IN ({marks})",
+                    [version, cutoff, *chunk],
+                )
+                for digest, payload in rows:
+                    found[digest] = _decode(payload)
+        return found
+
+    def put_many(self, items, version):
+        now = time.time()
+        rows = [(digest, version, _encode(analysis), now) for digest, analysis in items]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses (digest, version, payload, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            # Replaced rows are counted too; _prune recounts exactly.
+            self._rows += len(rows)
+            if (self.max_rows is not None and self._rows > self.max_rows) or now >= self._next_sweep:
+                self._prune()
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analyses")
+            self._rows = 0
+            self.evictions = 0
+
+    def _cutoff(self):
+        return time.time() - self.max_age_seconds if self.max_age_seconds is not None else 0.0
+
+    def _prune(self):
+        # Caller holds the lock inside a transaction.
+        deleted = 0
+        if self.max_age_seconds is not None:
+            deleted += self._conn.execute("DELETE FROM analyses WHERE created_at < ?", (self._cutoff(),)).rowcount
+        self._next_sweep = time.time() + DISK_SWEEP_SECONDS
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if self.max_rows is not None and self._rows > self.max_rows:
+            excess = self._rows - int(self.max_rows * DISK_PRUNE_TO)
+            deleted += self._conn.execute(
+                "DELETE FROM analyses WHERE (digest, version) IN"
+                " (SELECT digest, version FROM analyses ORDER BY created_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+            self._rows -= excess
+        self.evictions += deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AnalysisCache:
+    """Memory LRU in front of an optional SQLite store, with hit/miss counters.
+
+    ``analyze_many`` maps a list of pages to a list of analyses; pages that
+    miss both tiers are computed in one call, then written through to both.
+    Caches for different analyzers can share one ``memory`` store; entries
+    are keyed by version too.
+    """
+
+    def __init__(self, path=None, max_entries=50_000, ttl_seconds=3600.0,
+                 version=ANALYZER_VERSION, analyze_many=analyze_pages, max_bytes=None, memory=None,
+                 disk_max_rows=CACHE_DISK_MAX_ROWS, disk_max_age_days=CACHE_DISK_MAX_AGE_DAYS):
+        self.version = version
+        self.analyze_many = analyze_many
+        self.memory = memory if memory is not None else ResultStore(max_entries, ttl_seconds, max_bytes)
+        self.disk = None
+        if path:
+            max_age = disk_max_age_days * 86400 if disk_max_age_days is not None else None
+            self.disk = SQLiteStore(path, disk_max_rows, max_age)
+        self._stats_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, page):
+        return self.get_or_compute_many([page])[0]
+
+    def lookup(self, digests):
+        """Cached analyses for ``digests`` (no computing); absent ones are left out.
+
+        Used when the content itself is not at hand, e.g. a page that
+        answered 304 Not Modified.
+        """
+        found, memory_hits, disk_hits = self._lookup(digests)
+        with self._stats_lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+        return found
+
+    def _lookup(self, digests):
+        version = self.version
+        found = {
+            digest: analysis
+            for (digest, _), analysis in self.memory.get_many({(d, version): None for d in digests}).items()
+        }
+        memory_hits = len(found)
+
+        disk_hits = 0
+        pending = [digest for digest in dict.fromkeys(digests) if digest not in found]
+        if pending and self.disk is not None:
+            from_disk = self.disk.get_many(pending, version)
+            self.memory.put_many(((digest, version), analysis) for digest, analysis in from_disk.items())
+            found.update(from_disk)
+            disk_hits = len(from_disk)
+        return found, memory_hits, disk_hits
+
+    def get_or_compute_many(self, pages, analyze_many=None):
+        """Return one analysis per page, in input order.
+
+        ``analyze_many`` overrides the constructor's analyzer for this call
+        (e.g. to compute misses on a process pool).
+        """
+        analyze_many = analyze_many or self.analyze_many
+        digests = [page_digest(p) for p in pages]
+        found, memory_hits, disk_hits = self._lookup(digests)
+
+        missing = {}
+        for page, digest in zip(pages, digests):
+            if digest not in found:
+                missing.setdefault(digest, page)
+        computed = list(zip(missing, analyze_many(list(missing.values()))))
+        found.update(computed)
+        self.memory.put_many(((digest, self.version), analysis) for digest, analysis in computed)
+        if computed and self.disk is not None:
+            self.disk.put_many(computed, self.version)
+
+        with self._stats_lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += len(computed)
+        return [found[d] for d in digests]
+
+    def stats(self):
+        memory = self.memory.stats()
+        with self._stats_lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": memory["entries"],
+                "memory_unique_results": memory["unique_results"],
+                "memory_bytes": memory["bytes"],
+                "memory_max_bytes": memory["max_bytes"],
+                "memory_evictions": memory["evictions"],
+                "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            }
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        with self._stats_lock:
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+
+def _encode(analysis):
+    return json.dumps(analysis, separators=(",", ":"))
+
+
+def _decode(payload):
+    analysis = json.loads(payload)
+    # JSON has no tuples; restore the (title, description) pairs.
+    analysis["top_issues"] = [tuple(i) for i in analysis["top_issues"]]
+    return analysis
@@ -0,0 +1,358 @@
+"""Headless batch audits: ``python -m pentrust pages.txt > results.jsonl``.
+
+Pages are read lazily from files or stdin (plain lines or JSONL), analyzed
+in fixed-size batches and written as one JSON object per page, so memory use
+stays flat however long the input is. Sitemaps (and sitemap indexes) and
+CSV files are streamed through pentrust.ingest. ``--format
+csv|parquet|xlsx`` writes the same records as a table instead, batch by
+batch (see pentrust.export).
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from functools import partial
+from itertools import islice
+
+import pandas as pd
+
+from pentrust.analysis import iter_normalized, page_digest
+from pentrust.analyzers import ANALYZERS, get_analyzer
+from pentrust.cache import AnalysisCache
+from pentrust.config import (
+    ANALYZER_BACKEND,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+    HISTORY_PATH,
+    REAUDIT_MAX_AGE_DAYS,
+    SERVICE_URL,
+)
+from pentrust.export import EXPORT_COLUMNS, EXPORT_FORMATS, export_format, open_export
+from pentrust.fetch import Fetcher, ValidatorStore, fetch_and_analyze, fetch_digests, refetch_pages
+from pentrust.history import HistoryStore
+from pentrust.ingest import INGEST_FORMATS, PAGE_FIELDS, IngestError, iter_path, iter_source, source_format
+from pentrust.parallel import analyze_many_parallel
+from pentrust.reaudit import AuditManifest, format_counts, reaudit_batch
+from pentrust.rewrite import rewrite_copy
+from pentrust.service import ServiceClient, ServiceError, remote_analyzer
+from pentrust.table import build_table_row
+from pentrust.urls import SeenPages, canonical_url
+
+# Table columns for --format; fields a record lacks are left empty.
+RECORD_COLUMNS = EXPORT_COLUMNS + ["Analyzer version", "Change", "Fetch error", "Duplicate of", "Suggested rewrite"]
+OUTPUT_FORMATS = ("jsonl", *EXPORT_FORMATS)
+DEDUPE_BLOCK = 500  # pages canonicalized and looked up together
+
+
+def iter_input_lines(paths):
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+        else:
+            with open(path, encoding="utf-8") as fh:
+                yield from fh
+
+
+def iter_pages(lines, field=None, text_field=None):
+    """Yield (page, content) pairs; JSON object lines contribute their page
+    field, and ``text_field`` when given. Content defaults to the page itself."""
+    for line in iter_normalized(lines):
+        if not line.startswith("{"):
+            yield line, line
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"pentrust: skipping malformed JSON line: {line[:80]}", file=sys.stderr)
+            continue
+        names = (field,) if field else PAGE_FIELDS
+        page = next((record[n] for n in names if isinstance(record.get(n), str)), None)
+        if not page or not page.strip():
+            print(f"pentrust: no page field in record: {line[:80]}", file=sys.stderr)
+            continue
+        page = page.strip()
+        content = record.get(text_field) if text_field else page
+        if not isinstance(content, str):
+            print(f"pentrust: no {text_field!r} text in record: {line[:80]}", file=sys.stderr)
+            continue
+        yield page, content
+
+
+def iter_input_pages(paths, field=None, text_field=None, fmt=None, errors=None):
+    """(page, content) pairs from every input. Sitemaps, CSV and gzip files
+    go through pentrust.ingest; other files and stdin are read as lines."""
+    for path in paths or ["-"]:
+        if fmt in ("sitemap", "csv") or (
+            fmt is None and path != "-" and (path.endswith(".gz") or source_format(path) != "text")
+        ):
+            if path == "-":
+                source = iter_source(sys.stdin.buffer, fmt=fmt, column=field, errors=errors)
+            else:
+                source = iter_path(path, fmt, field, errors=errors)
+            yield from ((page, page) for page in source)
+        else:
+            yield from iter_pages(iter_input_lines([path]), field, text_field)
+
+
+def iter_unique(pages, seen, duplicates, block=DEDUPE_BLOCK):
+    """Drop pages already in ``seen`` (a ``SeenPages``) in canonical form;
+    each dropped one is appended to ``duplicates`` as (page, canonical
+    page). Pages are looked up ``block`` at a time."""
+    for chunk in iter_batches(pages, block):
+        canonical = [canonical_url(page) for page, _ in chunk]
+        for (page, content), page_url, new in zip(chunk, canonical, seen.add_many(canonical)):
+            if not new:
+                duplicates.append((page.strip(), page_url))
+            elif content == page:
+                yield page_url, page_url
+            else:
+                yield page_url, content
+
+
+def iter_batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def result_record(page, analysis, version):
+    record = build_table_row(page, analysis)
+    record["Issue descriptions"] = [desc for _, desc in analysis["top_issues"]]
+    record["Clarity trend"] = analysis["trend"]
+    record["Analyzer version"] = version
+    return record
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="pentrust",
+        description="Run a PenTrust content audit without Streamlit. "
+                    "Reads one page per line (plain text or JSONL) and writes one JSON result per line."
+    )
+    parser.add_argument("inputs", nargs="*", metavar="INPUT",
+                        help="page list files; '-' or nothing reads stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS,
+                        help="output format (default: from the --output extension, else jsonl)")
+    parser.add_argument("--input-format", choices=INGEST_FORMATS,
+                        help="how to read the inputs (default: by file extension; text lines may be JSONL)")
+    parser.add_argument("--field",
+                        help="JSONL field or CSV column holding the page "
+                             "(default: first of %s)" % ", ".join(PAGE_FIELDS))
+    parser.add_argument("--text-field",
+                        help="JSONL field holding the page copy to analyze (default: the page itself)")
+    parser.add_argument("--rewrites", action="store_true",
+                        help="add a plain-language 'Suggested rewrite' (Markdown) of each page's --text-field copy")
+    parser.add_argument("--fetch", action="store_true",
+                        help="download each page URL and analyze the page text; "
+                             "unchanged pages (HTTP 304) reuse their cached analysis")
+    parser.add_argument("--reaudit", metavar="PORTFOLIO",
+                        help="only analyze pages that are new, changed or stale since the last re-audit "
+                             "of PORTFOLIO; adds a Change field and lists removed pages")
+    parser.add_argument("--max-age-days", type=float, default=REAUDIT_MAX_AGE_DAYS,
+                        help="with --reaudit, re-analyze unchanged pages older than this (default: %(default)s)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="analyze every line as given instead of merging spellings of the same URL "
+                             "(case, tracking parameters, trailing slash, fragment). Merging remembers "
+                             "every page seen: up to PENTRUST_SEEN_MEMORY_PAGES in memory, the rest in "
+                             "a temporary file")
+    parser.add_argument("--analyzer", choices=sorted(ANALYZERS), default=ANALYZER_BACKEND,
+                        help="analyzer backend (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="pages analyzed and written per batch (default: 1000)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="analyze on a process pool with this many workers (default: serial)")
+    parser.add_argument("--service", metavar="URL", default=SERVICE_URL,
+                        help="analyze on a running pentrust.service (http://host:port or unix:/path; "
+                             "default: PENTRUST_SERVICE_URL)")
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="SQLite analysis cache path (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="analyze every page, bypassing the cache")
+    parser.add_argument("--history", default=HISTORY_PATH,
+                        help="append each page's scores to this score history directory "
+                             "(default: %(default)s; '' to skip)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.batch_size < 1:
+        raise SystemExit("pentrust: --batch-size must be at least 1")
+    if args.fetch and args.text_field:
+        raise SystemExit("pentrust: --fetch and --text-field are mutually exclusive")
+    if args.rewrites and not args.text_field:
+        raise SystemExit("pentrust: --rewrites needs the page copy; pass --text-field")
+    if args.service and args.workers:
+        raise SystemExit("pentrust: --service and --workers are mutually exclusive")
+    fmt = args.format or export_format(args.output) or "jsonl"
+
+    if args.service:
+        try:
+            analyzer = remote_analyzer(ServiceClient(args.service), args.analyzer)
+        except (ServiceError, ValueError) as exc:
+            raise SystemExit(f"pentrust: {exc}") from None
+    else:
+        analyzer = get_analyzer(args.analyzer)
+    if args.workers:
+        def analyze(contents):
+            return analyze_many_parallel(
+                contents, workers=args.workers, chunk_size=max(1, args.batch_size // args.workers),
+                analyze_many=analyzer.analyze_many
+            )
+    else:
+        analyze = analyzer.analyze_many
+    cache = None
+    if not args.no_cache:
+        # The service keeps its own disk cache; this run only needs memory.
+        cache = AnalysisCache(
+            None if args.service else args.cache or None, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS,
+            version=analyzer.version, analyze_many=analyze, max_bytes=CACHE_MAX_BYTES
+        )
+    analyze_cached = cache.get_or_compute_many if cache is not None else analyze
+    fetcher = None
+    if args.fetch:
+        validators = ValidatorStore(args.cache or None) if cache is not None or args.reaudit else None
+        fetcher = Fetcher(validators)
+    manifest = change_counts = None
+    if args.reaudit:
+        # The manifest is the audit record, not a cache: --no-cache keeps it.
+        manifest = AuditManifest(args.cache or None, args.reaudit)
+        # Only counts are kept across batches, not every page's change.
+        change_counts = Counter()
+        audited_pages = SeenPages()  # for pages dropped from the portfolio
+    history = HistoryStore(args.history) if args.history else None
+
+    def audit(batch):
+        """(page, analysis or None, fetch error, change kind) per page."""
+        contents = [content for _, content in batch]
+        if manifest is not None:
+            if fetcher is not None:
+                # With --fetch the content is the page URL itself.
+                items, errors = fetch_digests(fetcher, contents)
+                refetch = partial(refetch_pages, fetcher)
+            else:
+                items, errors = [(page, page_digest(c), c) for page, c in batch], {}
+                refetch = None
+            analyses, batch_diff = reaudit_batch(
+                manifest, items, analyze_cached, analyzer.version, args.max_age_days * 86400, refetch
+            )
+            change_counts.update(batch_diff.counts())
+            by_page = dict(zip((page for page, _, _ in items), analyses))
+            kinds = batch_diff.kind_of()
+            return [(page, by_page.get(page), errors.get(page), kinds.get(page)) for page, _ in batch]
+        if fetcher is not None:
+            outcomes = fetch_and_analyze(fetcher, contents, analyze, cache)
+            return [(page, a, r.error, None) for (page, _), (r, a) in zip(batch, outcomes)]
+        return [(page, a, None, None) for (page, _), a in zip(batch, analyze_cached(contents))]
+
+    if fmt == "jsonl":
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        table = None
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write("\n")
+    else:
+        # Records are collected per batch and written as one table chunk.
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        table = open_export(fmt, out, RECORD_COLUMNS)
+        pending = []
+        write = pending.append
+
+    def flush():
+        if table is not None and pending:
+            table.write(pd.DataFrame.from_records(pending, columns=RECORD_COLUMNS))
+            pending.clear()
+        out.flush()
+
+    started = time.perf_counter()
+    count = failed = merged = 0
+    unique = SeenPages()
+    duplicates = []
+    skipped = []  # (child sitemap, reason) for sitemap index entries not read
+
+    def flush_duplicates():
+        for page, canonical in duplicates:
+            write({"Page / label": page, "Duplicate of": canonical})
+        flushed = len(duplicates)
+        duplicates.clear()
+        return flushed
+
+    try:
+        pages = iter_input_pages(args.inputs, args.field, args.text_field, args.input_format, skipped)
+        if not args.keep_duplicates:
+            pages = iter_unique(pages, unique, duplicates)
+        for batch in iter_batches(pages, args.batch_size):
+            audited = []
+            for (_, content), (page, analysis, error, change) in zip(batch, audit(batch)):
+                if analysis is None:
+                    record = {"Page / label": page, "Fetch error": error or "not analyzed"}
+                    failed += 1
+                else:
+                    record = result_record(page, analysis, analyzer.version)
+                    audited.append((page, analysis))
+                    if args.rewrites:
+                        record["Suggested rewrite"] = rewrite_copy(content, [t for t, _ in analysis["top_issues"]])
+                if change:
+                    record["Change"] = change
+                write(record)
+            if history is not None:
+                history.append(audited)
+            merged += flush_duplicates()
+            if manifest is not None:
+                audited_pages.add_many(page for page, _ in batch)
+            flush()
+            count += len(batch)
+        merged += flush_duplicates()
+        if manifest is not None:
+            removed = manifest.removed(audited_pages)
+            change_counts["removed"] = len(removed)
+            for page in removed:
+                write({"Page / label": page, "Change": "removed"})
+            manifest.forget(removed)
+        flush()
+        if table is not None:
+            table.close()
+    except BrokenPipeError:
+        # e.g. piped into `head`; nothing left to write to
+        return 0
+    except (IngestError, ServiceError) as exc:
+        raise SystemExit(f"pentrust: {exc}") from None
+    finally:
+        if out not in (sys.stdout, sys.stdout.buffer):
+            out.close()
+        if fetcher is not None:
+            fetcher.close()
+        if history is not None:
+            history.close()
+        unique.close()
+        if manifest is not None:
+            audited_pages.close()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"pentrust: audited {count} pages in {elapsed:.2f}s ({rate:,.0f} pages/s)", file=sys.stderr)
+    if merged:
+        print(f"pentrust: merged {merged} duplicate lines into their canonical page", file=sys.stderr)
+    for location, reason in skipped:
+        print(f"pentrust: skipped sitemap {location}: {reason}", file=sys.stderr)
+    if fetcher is not None:
+        stats = fetcher.stats()
+        print(
+            f"pentrust: fetched {stats['downloaded']} · unchanged {stats['not_modified']} · "
+            f"failed {failed} · {stats['connections_reused']} connections reused",
+            file=sys.stderr,
+        )
+    if change_counts is not None:
+        print(f"pentrust: re-audit of {args.reaudit!r}: {format_counts(change_counts)}", file=sys.stderr)
+    return 0
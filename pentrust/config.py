@@ -0,0 +1,66 @@
+"""Runtime settings, read once from ``PENTRUST_*`` environment variables."""
+import os
+
+# Analysis cache. An empty CACHE_PATH keeps the cache in memory only.
+CACHE_PATH = os.environ.get("PENTRUST_CACHE_PATH", ".pentrust_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.environ.get("PENTRUST_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL_SECONDS = float(os.environ.get("PENTRUST_CACHE_TTL_SECONDS", "3600"))
+# Memory budget of the in-process result store shared by all sessions; the
+# least recently used results are evicted past it. 0 = entry limit only.
+CACHE_MAX_BYTES = int(float(os.environ.get("PENTRUST_CACHE_MAX_MB", "256")) * 2**20) or None
+# Limits of the on-disk tier: rows kept (the oldest written go first) and
+# days a stored result stays valid. 0 = unbounded.
+CACHE_DISK_MAX_ROWS = int(os.environ.get("PENTRUST_CACHE_DISK_MAX_ROWS", "2000000")) or None
+CACHE_DISK_MAX_AGE_DAYS = float(os.environ.get("PENTRUST_CACHE_DISK_MAX_AGE_DAYS", "30")) or None
+
+# Execution mode for Run analysis: "serial" or "parallel" (process pool).
+EXECUTION_MODE = os.environ.get("PENTRUST_EXECUTION", "serial")
+PARALLEL_WORKERS = int(os.environ.get("PENTRUST_WORKERS", "0")) or None  # None -> os.cpu_count()
+PARALLEL_CHUNK_SIZE = int(os.environ.get("PENTRUST_CHUNK_SIZE", "5000"))
+
+# Pages analyzed between progress/table updates during a run.
+RUN_CHUNK_SIZE = int(os.environ.get("PENTRUST_RUN_CHUNK_SIZE", "1000"))
+
+# Background analysis jobs: worker threads shared by all sessions, and how
+# often a session polls its running job for results.
+JOB_WORKERS = int(os.environ.get("PENTRUST_JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.environ.get("PENTRUST_JOB_POLL_SECONDS", "0.5"))
+
+# Analyzer backend: "mock" (demo signals) or "text" (local copy analysis).
+ANALYZER_BACKEND = os.environ.get("PENTRUST_ANALYZER", "mock")
+# Analysis service shared by app replicas (``python -m pentrust.service``):
+# http://127.0.0.1:8765 or unix:/path/to.sock. Empty: analyze in-process.
+SERVICE_URL = os.environ.get("PENTRUST_SERVICE_URL", "")
+
+# Where page content comes from: "input" analyzes the pasted text itself,
+# "fetch" downloads each URL and analyzes the page text.
+PAGE_SOURCE = os.environ.get("PENTRUST_SOURCE", "input")
+FETCH_CONCURRENCY = int(os.environ.get("PENTRUST_FETCH_CONCURRENCY", "32"))
+FETCH_PER_HOST = int(os.environ.get("PENTRUST_FETCH_PER_HOST", "4"))  # open requests per host
+FETCH_RATE_PER_HOST = float(os.environ.get("PENTRUST_FETCH_RATE", "8"))  # requests/s per host; 0 = unlimited
+FETCH_TIMEOUT_SECONDS = float(os.environ.get("PENTRUST_FETCH_TIMEOUT", "15"))
+FETCH_RETRIES = int(os.environ.get("PENTRUST_FETCH_RETRIES", "2"))
+FETCH_MAX_BYTES = int(os.environ.get("PENTRUST_FETCH_MAX_BYTES", "5000000"))
+FETCH_USER_AGENT = os.environ.get("PENTRUST_USER_AGENT", "PenTrust/1.0 (content clarity audit)")
+
+# Streaming duplicate detection (CLI): pages remembered in memory before
+# the rest move to a temporary SQLite table, bounding memory for any list.
+SEEN_MEMORY_PAGES = int(os.environ.get("PENTRUST_SEEN_MEMORY_PAGES", "1000000"))
+
+# Page lists the app may read from the server's disk ("Server file" input):
+# paths are resolved inside this directory. Empty: uploads and pasting only.
+INGEST_DIR = os.environ.get("PENTRUST_INGEST_DIR", "")
+
+# Score history: every audit's scores are appended here (a directory) and
+# drive the Clarity Score Trend chart. Empty: off (the chart shows the
+# analyzer's sample trend).
+HISTORY_PATH = os.environ.get("PENTRUST_HISTORY_PATH", ".pentrust_history")
+
+# Re-audits: pages analyzed longer ago than this are re-analyzed even when
+# their content is unchanged. 0 disables the age check.
+REAUDIT_MAX_AGE_DAYS = float(os.environ.get("PENTRUST_REAUDIT_MAX_AGE_DAYS", "30"))
+
+# Per-rerun timing metrics: appended as JSONL, or as Prometheus text when
+# the path ends in .prom (or PENTRUST_METRICS_FORMAT=prometheus). Empty: off.
+METRICS_PATH = os.environ.get("PENTRUST_METRICS_PATH", "")
+METRICS_FORMAT = os.environ.get("PENTRUST_METRICS_FORMAT", "") or None
@@ -0,0 +1,302 @@
+"""Streaming export of the audit table to CSV, Parquet and XLSX.
+
+Rows go out in chunks of ``EXPORT_CHUNK_ROWS``: each chunk is built as a
+small DataFrame, handed to the format's writer and dropped, so peak memory
+depends on the chunk size, not on how many pages the audit holds.
+
+* CSV: one header, then each chunk appended; list columns are joined.
+* Parquet: one row group per chunk through ``pyarrow`` (installed with
+  Streamlit; the CLI only needs it for this format). Lists stay lists.
+* XLSX: written directly as the zipped SpreadsheetML parts, streaming rows
+  into the sheet XML, so no spreadsheet library is needed. A sheet holds at
+  most ``XLSX_MAX_ROWS`` rows; longer exports continue on further sheets.
+"""
+import io
+import re
+import zipfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from pentrust.analysis import TREND_POINTS
+from pentrust.store import N_ISSUES, N_SCORES, NO_ISSUE
+from pentrust.table import SCORE_COLUMNS, TABLE_COLUMNS, table_frame
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_COLUMNS = TABLE_COLUMNS + ["Issue descriptions", "Clarity trend"]
+# Column kinds; anything not listed is text.
+COLUMN_KINDS = {
+    **dict.fromkeys(SCORE_COLUMNS, "int"),
+    "Issue descriptions": "text list",
+    "Clarity trend": "int list",
+}
+# How CSV and XLSX cells spell list columns.
+LIST_SEPARATORS = {"text list": "; ", "int list": ", "}
+XLSX_MAX_ROWS = 1_048_576  # Excel's sheet limit, header row included
+XLSX_MAX_CHARS = 32_767  # Excel's cell text limit
+XLSX_SLICE_ROWS = 1_000  # rows turned into XML at a time
+# Characters XML 1.0 cannot carry at all.
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _rows(column, start, stop, width):
+    # Slicing the array copies it; a NumPy view would pin its buffer and
+    # make the session's next write to the store fail.
+    return np.frombuffer(column[start * width:stop * width], dtype=np.uint8).reshape(-1, width)
+
+
+def store_frames(store, chunk_rows=EXPORT_CHUNK_ROWS):
+    """The audit table of ``store`` as ``EXPORT_COLUMNS`` frames of up to
+    ``chunk_rows`` rows, in store order.
+
+    Safe to run on another thread while the session keeps adding pages:
+    every chunk copies its rows first and rows past the store's length when
+    the export started are left out.
+    """
+    for start in range(0, len(store), chunk_rows):
+        stop = start + chunk_rows
+        pages = store.pages[start:stop]
+        scores = _rows(store.scores, start, stop, N_SCORES)
+        codes = _rows(store.issues, start, stop, N_ISSUES)
+        trend = _rows(store.trend, start, stop, TREND_POINTS)
+        issue_table = list(store.issue_table)
+        n = min(len(pages), len(scores), len(codes), len(trend))
+        frame = table_frame(pages[:n], scores[:n], codes[:n], issue_table, store.aliases)
+        frame["Issue descriptions"] = [
+            [issue_table[c][1] for c in pair if c != NO_ISSUE] for pair in codes[:n].tolist()
+        ]
+        frame["Clarity trend"] = trend[:n].tolist()
+        yield frame
+
+
+def _typed(frame):
+    """``frame`` with its int columns as nullable Int64."""
+    for column in frame.columns:
+        if COLUMN_KINDS.get(column) == "int":
+            frame[column] = frame[column].astype("Int64")
+    return frame
+
+
+def _flatten(frame, columns):
+    """``frame`` with list columns joined and int columns nullable, for text formats."""
+    frame = _typed(frame.reindex(columns=columns))
+    for column in columns:
+        kind = COLUMN_KINDS.get(column, "text")
+        if kind in LIST_SEPARATORS:
+            sep = LIST_SEPARATORS[kind]
+            frame[column] = [
+                sep.join(map(str, v)) if isinstance(v, list) else None for v in frame[column].tolist()
+            ]
+    return frame
+
+
+class CsvExport:
+    def __init__(self, fh, columns):
+        self.columns = columns
+        self._out = io.TextIOWrapper(fh, encoding="utf-8", newline="", write_through=True)
+        self._header = True
+
+    def write(self, frame):
+        _flatten(frame, self.columns).to_csv(self._out, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if self._header:
+            pd.DataFrame(columns=self.columns).to_csv(self._out, index=False)
+        self._out.flush()
+        self._out.detach()  # leave ``fh`` open for the caller
+
+
+class ParquetExport:
+    def __init__(self, fh, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from None
+        self.columns = columns
+        self._pa = pa
+        types = {"int": pa.int64(), "text": pa.string(),
+                 "text list": pa.list_(pa.string()), "int list": pa.list_(pa.int64())}
+        schema = pa.schema([(c, types[COLUMN_KINDS.get(c, "text")]) for c in columns])
+        # Record the pandas dtypes too, so readers get nullable Int64 score
+        # columns back rather than float64 (rows without an analysis, such
+        # as CLI duplicates, have no scores).
+        self._schema = pa.Table.from_pandas(
+            _typed(pd.DataFrame(columns=columns)), schema=schema, preserve_index=False
+        ).schema
+        self._writer = pq.ParquetWriter(fh, self._schema, compression="zstd")
+
+    def write(self, frame):
+        frame = _typed(frame.reindex(columns=self.columns))
+        arrays = []
+        for field in self._schema:
+            values = frame[field.name]
+            if values.isna().all():
+                # e.g. a CLI chunk of only duplicates: NaN floats, not lists
+                arrays.append(self._pa.nulls(len(values), field.type))
+            else:
+                arrays.append(self._pa.Array.from_pandas(values, type=field.type))
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _column_letter(i):
+    letters = ""
+    i += 1
+    while i:
+        i, rem = divmod(i - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+@lru_cache(maxsize=4096)  # labels, risk levels and descriptions repeat a lot
+def _text_cell(value):
+    value = _XML_ILLEGAL.sub("", str(value))[:XLSX_MAX_CHARS]
+    return f'" t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+_NS = "http://schemas.openxmlformats.org"
+
+
+class XlsxExport:
+    def __init__(self, fh, columns):
+        self.columns = columns
+        self._letters = [_column_letter(i) for i in range(len(columns))]
+        self._zip = zipfile.ZipFile(fh, "w", zipfile.ZIP_DEFLATED)
+        self._sheets = 0
+        self._sheet = None
+        self._row = 0  # rows written to the current sheet, header included
+
+    def _open_sheet(self):
+        self._close_sheet()
+        self._sheets += 1
+        part = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", "w", force_zip64=True)
+        self._sheet = io.TextIOWrapper(part, encoding="utf-8")
+        self._sheet.write(_SHEET_HEAD)
+        header = "".join(f'<c r="{letter}1{_text_cell(c)}' for letter, c in zip(self._letters, self.columns))
+        self._sheet.write(f'<row r="1">{header}</row>')
+        self._row = 1
+
+    def _close_sheet(self):
+        if self._sheet is not None:
+            self._sheet.write(_SHEET_TAIL)
+            self._sheet.close()
+            self._sheet = None
+
+    def write(self, frame):
+        frame = _flatten(frame, self.columns)
+        done = 0
+        while done < len(frame):
+            if self._sheet is None or self._row == XLSX_MAX_ROWS:
+                self._open_sheet()
+            part = frame.iloc[done:done + min(XLSX_SLICE_ROWS, XLSX_MAX_ROWS - self._row)]
+            self._sheet.write(self._rows_xml(part, self._row + 1))
+            self._row += len(part)
+            done += len(part)
+
+    def _rows_xml(self, frame, first):
+        numbers = range(first, first + len(frame))
+        columns = []
+        for letter, column in zip(self._letters, self.columns):
+            values = frame[column].tolist()
+            if COLUMN_KINDS.get(column) == "int":
+                cells = [
+                    "" if v is pd.NA else f'<c r="{letter}{n}"><v>{v}</v></c>' for n, v in zip(numbers, values)
+                ]
+            else:
+                cells = [
+                    "" if v is None or v is pd.NA or v != v else f'<c r="{letter}{n}{_text_cell(v)}'
+                    for n, v in zip(numbers, values)
+                ]
+            columns.append(cells)
+        return "".join(f'<row r="{n}">{"".join(cells)}</row>' for n, *cells in zip(numbers, *columns))
+
+    def close(self):
+        if self._sheet is None:
+            self._open_sheet()
+        self._close_sheet()
+        names = ["Audit"] + [f"Audit {i}" for i in range(2, self._sheets + 1)]
+        sheets = range(1, self._sheets + 1)
+        self._zip.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Types xmlns="{_NS}/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in sheets
+            )
+            + "</Types>"
+        ))
+        self._zip.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_NS}/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_NS}/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_NS}/spreadsheetml/2006/main" '
+            f'xmlns:r="{_NS}/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="{names[i - 1]}" sheetId="{i}" r:id="rId{i}"/>' for i in sheets)
+            + "</sheets></workbook>"
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_NS}/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" Type="{_NS}/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in sheets
+            )
+            + "</Relationships>"
+        ))
+        self._zip.close()
+
+
+# format -> (writer, MIME type)
+EXPORT_FORMATS = {
+    "csv": (CsvExport, "text/csv"),
+    "parquet": (ParquetExport, "application/vnd.apache.parquet"),
+    "xlsx": (XlsxExport, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def export_format(path):
+    """Export format named by ``path``'s extension, or None."""
+    ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    return ext if ext in EXPORT_FORMATS else None
+
+
+def open_export(fmt, fh, columns=EXPORT_COLUMNS):
+    """Writer for ``fmt`` on the binary file ``fh``: ``write(frame)`` per
+    chunk, then ``close()`` (which leaves ``fh`` itself open)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; use one of {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[fmt][0](fh, columns)
+
+
+def write_export(frames, fmt, fh, columns=EXPORT_COLUMNS):
+    """Stream ``frames`` to ``fh`` as ``fmt``; returns the number of rows."""
+    writer = open_export(fmt, fh, columns)
+    rows = 0
+    for frame in frames:
+        writer.write(frame)
+        rows += len(frame)
+    writer.close()
+    return rows
@@ -0,0 +1,638 @@
+"""Fetch stage: download page content ahead of analysis.
+
+A small asyncio HTTP/1.1 client built on the standard library:
+
+* bounded concurrency overall and per host, plus a per-host request rate;
+* keep-alive connections pooled per (scheme, host, port) and reused across
+  calls, because the event loop lives on one background thread per
+  ``Fetcher``;
+* timeouts on the network exchange (not on time spent queued for a host),
+  and retries with capped backoff on connection errors, 429 and 5xx;
+* conditional requests: ETag / Last-Modified validators are remembered per
+  URL, so an unchanged page answers 304 and is neither downloaded nor
+  re-analyzed (its analysis is looked up by the content digest recorded on
+  the previous download).
+
+HTML is reduced to its readable text before analysis.
+"""
+import asyncio
+import gzip
+import sqlite3
+import ssl
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from pentrust.analysis import page_digest
+from pentrust.cache import _SQL_CHUNK
+from pentrust.config import (
+    FETCH_CONCURRENCY,
+    FETCH_MAX_BYTES,
+    FETCH_PER_HOST,
+    FETCH_RATE_PER_HOST,
+    FETCH_RETRIES,
+    FETCH_TIMEOUT_SECONDS,
+    FETCH_USER_AGENT,
+)
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0  # also caps a server's Retry-After
+MAX_IDLE_PER_HOST = 8
+IDLE_SECONDS = 30.0
+TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+class FetchError(Exception):
+    """A response that could not be read as HTTP/1.1."""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL.
+
+    ``digest`` identifies the page text (``page_digest``); on a 304 it is the
+    digest recorded with the validators, and ``text`` is empty.
+    """
+
+    url: str
+    status: int = 0
+    text: str = ""
+    digest: str = None
+    etag: str = None
+    last_modified: str = None
+    not_modified: bool = False
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# -----------------------------
+# Validator store
+# -----------------------------
+class ValidatorStore:
+    """ETag / Last-Modified and content digest of the last download, per URL."""
+
+    def __init__(self, path=None):
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fetch_validators (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    digest TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+
+    def get_many(self, urls):
+        """url -> (etag, last_modified, digest) for URLs with a validator."""
+        found = {}
+        urls = list(urls)
+        with self._lock:
+            for start in range(0, len(urls), _SQL_CHUNK):
+                chunk = urls[start:start + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT url, etag, last_modified, digest FROM fetch_validators "
+                    f"WHERE url IN ({marks}) AND (etag IS NOT NULL OR last_modified IS NOT NULL)",
+                    chunk,
+                )
+                for url, etag, last_modified, digest in rows:
+                    found[url] = (etag, last_modified, digest)
+        return found
+
+    def put_many(self, results):
+        now = time.time()
+        rows = [(r.url, r.etag, r.last_modified, r.digest, now) for r in results]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fetch_validators (url, etag, last_modified, digest, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fetch_validators")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -----------------------------
+# HTML to text
+# -----------------------------
+class _TextExtractor(HTMLParser):
+    # Blocks become line breaks, so headings and list items read as their
+    # own sentences; list items keep a "- " marker for structure scoring.
+    SKIP = frozenset(("script", "style", "noscript", "template", "svg", "nav", "head"))
+    BLOCKS = frozenset((
+        "p", "div", "br", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "tr", "td", "th",
+        "section", "article", "header", "footer", "main", "aside", "blockquote", "table",
+        "form", "fieldset", "dt", "dd", "figcaption", "pre", "hr",
+    ))
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCKS or tag == "li":
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line and line != "-")
+
+
+# -----------------------------
+# HTTP/1.1 over asyncio streams
+# -----------------------------
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+        self.idle_since = time.monotonic()
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)."""
+
+    def __init__(self, max_idle_per_host=MAX_IDLE_PER_HOST, idle_seconds=IDLE_SECONDS):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_seconds = idle_seconds
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self, key, fresh=False):
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle and not fresh:
+            conn = idle.pop()
+            if now - conn.idle_since > self.idle_seconds or conn.reader.at_eof():
+                conn.close()
+                continue
+            conn.reused = True
+            self.reused += 1
+            return conn
+        scheme, host, port = key
+        if scheme == "https":
+            reader, writer = await asyncio.open_connection(host, port, ssl=self._ssl, server_hostname=host)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def release(self, key, conn):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) >= self.max_idle_per_host:
+            conn.close()
+            return
+        conn.idle_since = time.monotonic()
+        idle.append(conn)
+
+    def close(self):
+        for idle in self._idle.values():
+            for conn in idle:
+                conn.close()
+        self._idle.clear()
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: dict
+    body: bytes
+    keep_alive: bool
+    url: str = ""
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise FetchError("connection closed in headers")
+        if line in (b"\r\n", b"\n"):
+            return headers
+        name, sep, value = line.decode("latin-1").partition(":")
+        if not sep:
+            raise FetchError(f"malformed header line {line[:60]!r}")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+
+async def _read_chunked(reader, max_bytes):
+    parts = []
+    size_total = 0
+    while True:
+        line = await reader.readline()
+        try:
+            size = int(line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise FetchError(f"bad chunk size {line[:20]!r}") from None
+        if size == 0:
+            await _read_headers(reader)  # trailers
+            return b"".join(parts)
+        size_total += size
+        if size_total > max_bytes:
+            raise FetchError(f"response larger than {max_bytes:,} bytes")
+        parts.append(await reader.readexactly(size))
+        await reader.readline()
+
+
+async def _read_response(reader, max_bytes):
+    while True:
+        line = await reader.readline()
+        if not line:
+            # An idle keep-alive connection the server already closed.
+            raise ConnectionResetError("connection closed before response")
+        parts = line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise FetchError(f"malformed status line {line[:60]!r}")
+        version, status = parts[0], int(parts[1])
+        headers = await _read_headers(reader)
+        if not 100 <= status < 200:
+            break
+
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if status in (204, 304):
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        body = await _read_chunked(reader, max_bytes)
+    elif "content-length" in headers:
+        value = headers["content-length"].strip()
+        if not value.isdigit():
+            raise FetchError(f"bad Content-Length {value[:20]!r}")
+        length = int(value)
+        if length > max_bytes:
+            raise FetchError(f"response larger than {max_bytes:,} bytes")
+        body = await reader.readexactly(length)
+    else:
+        body = await reader.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            raise FetchError(f"response larger than {max_bytes:,} bytes")
+        keep_alive = False
+
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "deflate":
+        body = zlib.decompress(body)
+    return _Response(status, headers, body, keep_alive)
+
+
+def _split_url(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname or any(c.isspace() for c in parts.hostname):
+        raise ValueError(f"not an http(s) URL: {url}")
+    host = parts.hostname.encode("idna").decode("ascii")
+    default_port = 443 if scheme == "https" else 80
+    port = parts.port or default_port
+    host_header = host if port == default_port else f"{host}:{port}"
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return (scheme, host, port), host_header, target
+
+
+def _retry_after(response):
+    value = response.headers.get("retry-after", "")
+    return float(value) if value.isdigit() else None
+
+
+def _decode_body(response):
+    content_type = response.headers.get("content-type", "text/html")
+    media_type, _, params = content_type.partition(";")
+    media_type = media_type.strip().lower()
+    if media_type not in TEXT_TYPES:
+        return None
+    charset = "utf-8"
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+    try:
+        text = response.body.decode(charset, errors="replace")
+    except LookupError:
+        text = response.body.decode("utf-8", errors="replace")
+    return text if media_type == "text/plain" else html_to_text(text)
+
+
+# -----------------------------
+# Fetcher
+# -----------------------------
+class Fetcher:
+    """Pooled, rate-limited page downloader.
+
+    ``fetch_many`` is synchronous and thread-safe: requests run on the
+    fetcher's own event loop thread, so pooled connections survive between
+    calls (and between Streamlit reruns when the fetcher is a shared resource).
+    """
+
+    def __init__(self, validators=None, concurrency=FETCH_CONCURRENCY, per_host=FETCH_PER_HOST,
+                 rate_per_host=FETCH_RATE_PER_HOST, timeout=FETCH_TIMEOUT_SECONDS,
+                 retries=FETCH_RETRIES, max_bytes=FETCH_MAX_BYTES, user_agent=FETCH_USER_AGENT):
+        self.validators = validators
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate_per_host = rate_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.pool = ConnectionPool()
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # Created on the loop thread, on first use.
+        self._limit = None
+        self._host_limits = {}
+        self._next_slot = {}
+        self._stats_lock = threading.Lock()
+        self.downloaded = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.retried = 0
+        self.bytes_read = 0
+
+    # Public API -------------------------------------------------------
+    def fetch_many(self, urls, conditional=True):
+        """One FetchResult per URL, in input order.
+
+        With ``conditional`` (and a validator store) previously seen pages
+        are revalidated; pass False to force full downloads.
+        """
+        urls = list(urls)
+        unique = list(dict.fromkeys(urls))
+        known = self.validators.get_many(unique) if conditional and self.validators else {}
+        results = self._run(self._fetch_all(unique, known))
+        if self.validators is not None:
+            self.validators.put_many([r for r in results if r.ok and not r.not_modified])
+        by_url = dict(zip(unique, results))
+        return [by_url[u] for u in urls]
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "downloaded": self.downloaded,
+                "not_modified": self.not_modified,
+                "failed": self.failed,
+                "retried": self.retried,
+                "bytes": self.bytes_read,
+                "connections_opened": self.pool.opened,
+                "connections_reused": self.pool.reused,
+            }
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self.pool.close)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+    # Event loop thread ----------------------------------------------
+    def _run(self, coro):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="pentrust-fetch", daemon=True
+                )
+                self._thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _fetch_all(self, urls, known):
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._fetch(url, known.get(url)) for url in urls))
+
+    async def _host_slot(self, host):
+        # Spaces request starts at least 1/rate apart per host. The slot is
+        # claimed before awaiting, so concurrent callers queue up in order.
+        if self.rate_per_host <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + 1.0 / self.rate_per_host
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _fetch(self, url, validators):
+        headers = {}
+        if validators:
+            etag, last_modified, _ = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        error = "not fetched"
+        async with self._limit:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self._count(retried=1)
+                try:
+                    response = await self._follow(url, headers)
+                except ValueError as exc:
+                    error = str(exc)
+                    break  # bad URL: retrying won't help
+                except (OSError, asyncio.TimeoutError, FetchError, EOFError, zlib.error) as exc:
+                    error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+                    delay = BACKOFF_SECONDS * 2 ** attempt
+                else:
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        error = f"HTTP {response.status}"
+                        delay = _retry_after(response) or BACKOFF_SECONDS * 2 ** attempt
+                    else:
+                        return self._result(url, response, validators)
+                if attempt < self.retries:
+                    await asyncio.sleep(min(delay, MAX_BACKOFF_SECONDS))
+        self._count(failed=1)
+        return FetchResult(url, error=error)
+
+    async def _follow(self, url, headers):
+        target = url if "://" in url else f"https://{url}"
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(target, headers)
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                response.url = target
+                return response
+            target = urljoin(target, location)
+        raise FetchError(f"more than {MAX_REDIRECTS} redirects")
+
+    async def _request(self, url, extra_headers):
+        key, host_header, target = _split_url(url)
+        host = key[1]
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        lines = [
+            f"GET {target} HTTP/1.1",
+            f"Host: {host_header}",
+            f"User-Agent: {self.user_agent}",
+            "Accept: text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.1",
+            "Accept-Encoding: gzip, deflate",
+            "Connection: keep-alive",
+        ]
+        lines += [f"{name}: {value}" for name, value in extra_headers.items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        async with limit:
+            await self._host_slot(host)
+            # The timeout starts once the host's turn has come: waiting for a
+            # per-host slot is not the server being slow.
+            # A pooled connection may have been closed by the server while
+            # idle; that surfaces on first use, so try once more on a new one.
+            for fresh in (False, True):
+                response = await asyncio.wait_for(self._exchange(key, request, fresh), self.timeout)
+                if response is not None:
+                    self._count(bytes_read=len(response.body))
+                    return response
+
+    async def _exchange(self, key, request, fresh):
+        """Send ``request`` and read the response; None if a reused
+        connection turned out to be closed."""
+        conn = await self.pool.acquire(key, fresh=fresh)
+        try:
+            conn.writer.write(request)
+            await conn.writer.drain()
+            response = await _read_response(conn.reader, self.max_bytes)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            conn.close()
+            if conn.reused:
+                return None
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        if response.keep_alive:
+            self.pool.release(key, conn)
+        else:
+            conn.close()
+        return response
+
+    def _result(self, url, response, validators):
+        if response.status == 304 and validators:
+            self._count(not_modified=1)
+            return FetchResult(url, 304, digest=validators[2], etag=validators[0],
+                               last_modified=validators[1], not_modified=True)
+        if response.status != 200:
+            self._count(failed=1)
+            return FetchResult(url, response.status, error=f"HTTP {response.status}")
+        text = _decode_body(response)
+        if text is None:
+            self._count(failed=1)
+            content_type = response.headers.get("content-type", "")
+            return FetchResult(url, 200, error=f"unsupported content type {content_type}")
+        self._count(downloaded=1)
+        return FetchResult(
+            url, 200, text, page_digest(text),
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+
+def fetch_and_analyze(fetcher, urls, analyze_many, cache=None):
+    """(FetchResult, analysis or None) per URL, in input order.
+
+    Downloaded pages are analyzed through ``cache`` when given. Pages that
+    answered 304 reuse the cached analysis for their recorded digest; if it
+    has since been evicted (or the analyzer version changed) the page is
+    downloaded again unconditionally. Failed fetches get ``None``.
+    """
+    urls = list(urls)
+    results = fetcher.fetch_many(urls, conditional=cache is not None)
+    reused = {}
+    if cache is not None:
+        reused = cache.lookup([r.digest for r in results if r.not_modified])
+        stale = [i for i, r in enumerate(results) if r.not_modified and r.digest not in reused]
+        if stale:
+            refetched = fetcher.fetch_many([urls[i] for i in stale], conditional=False)
+            for i, result in zip(stale, refetched):
+                results[i] = result
+
+    downloaded = [i for i, r in enumerate(results) if r.ok and not r.not_modified]
+    texts = [results[i].text for i in downloaded]
+    if cache is not None:
+        computed = cache.get_or_compute_many(texts, analyze_many)
+    else:
+        computed = analyze_many(texts)
+
+    analyses = [reused.get(r.digest) if r.not_modified else None for r in results]
+    for i, analysis in zip(downloaded, computed):
+        analyses[i] = analysis
+    return list(zip(results, analyses))
+
+
+def fetch_digests(fetcher, urls):
+    """Fetch for a re-audit: ((url, digest, text or None) items, {url: error}).
+
+    A 304 contributes the digest recorded at the last download and no text.
+    """
+    items, errors = [], {}
+    for result in fetcher.fetch_many(urls):
+        if not result.ok:
+            errors[result.url] = result.error
+        else:
+            items.append((result.url, result.digest, None if result.not_modified else result.text))
+    return items, errors
+
+
+def refetch_pages(fetcher, urls):
+    """Unconditional download: (digest, text) per URL, (None, None) on failure."""
+    return [(r.digest, r.text) if r.ok else (None, None) for r in fetcher.fetch_many(urls, conditional=False)]
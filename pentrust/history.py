@@ -0,0 +1,142 @@
+"""Score history: every audit of a page, appended to a local time series.
+
+Records are fixed-size rows (previous record of the same page, time,
+scores) appended to ``history.bin`` and read back through a memory map.
+``index.sqlite3`` holds, per page, its latest record and point count. A
+page's history is the chain of ``prev`` links from its latest record, so a
+trend query touches only that page's rows, however many millions the file
+holds, and nothing is loaded up front.
+
+Any number of processes may share a history directory (app replicas, job
+workers, the CLI). Each append takes an exclusive ``flock`` on
+``history.bin``, numbers its records from the file size it finds under
+the lock, and commits the index before letting go, so writers never
+build ``prev`` links on a stale view of the file. Readers take no lock.
+"""
+import contextlib
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from pentrust.analysis import SCORE_NAMES
+from pentrust.cache import _SQL_CHUNK
+
+RECORD = np.dtype([("prev", "<i8"), ("time", "<f8"), ("scores", "u1", (len(SCORE_NAMES),))])
+NO_RECORD = -1
+HISTORY_POINTS = 30  # points per trend query
+
+
+class HistoryStore:
+    """Append-only per-page score history in the directory ``path``."""
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = os.path.join(path, "history.bin")
+        self._lock = threading.Lock()  # threads of this process; flock covers other processes
+        self._file = open(self.path, "ab")
+        self._map = None
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history_index (
+                    page TEXT PRIMARY KEY,
+                    last INTEGER NOT NULL,
+                    points INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+
+    def __len__(self):
+        return os.path.getsize(self.path) // RECORD.itemsize
+
+    def _heads(self, pages):
+        """page -> (last record, points) for the pages that have history."""
+        heads = {}
+        for start in range(0, len(pages), _SQL_CHUNK):
+            chunk = pages[start:start + _SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for page, last, points in self._conn.execute(
+                f"SELECT page, last, points FROM history_index WHERE page IN ({marks})", chunk
+            ):
+                heads[page] = (last, points)
+        return heads
+
+    def append(self, items, when=None):
+        """Record (page, analysis) pairs as audited at ``when`` (default: now)."""
+        items = list(items)
+        if not items:
+            return
+        when = time.time() if when is None else when
+        with self._lock, self._writing() as first:
+            pages = list(dict.fromkeys(page for page, _ in items))
+            heads = self._heads(pages)
+            prev = []
+            for record, (page, _) in enumerate(items, first):
+                last, points = heads.get(page, (NO_RECORD, 0))
+                prev.append(last)
+                heads[page] = (record, points + 1)
+            rows = np.zeros(len(items), dtype=RECORD)
+            rows["prev"] = prev
+            rows["time"] = when
+            rows["scores"] = [[analysis["scores"][name] for name in SCORE_NAMES] for _, analysis in items]
+            # Rows go to disk before the index points at them; a crash in
+            # between leaves unreferenced rows, never a dangling link.
+            self._file.write(rows.tobytes())
+            self._file.flush()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO history_index (page, last, points) VALUES (?, ?, ?)",
+                    [(page, *heads[page]) for page in pages],
+                )
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Hold the directory's write lock; yields the next record number."""
+        fd = self._file.fileno()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(fd).st_size
+            # A writer that crashed mid-append can leave a torn record; drop it.
+            if size % RECORD.itemsize:
+                size -= size % RECORD.itemsize
+                os.ftruncate(fd, size)
+            yield size // RECORD.itemsize
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def points(self, page):
+        """How many audits of ``page`` are recorded."""
+        with self._lock:
+            return self._heads([page]).get(page, (NO_RECORD, 0))[1]
+
+    def trend(self, page, limit=HISTORY_POINTS):
+        """The latest ``limit`` records of ``page``, oldest first (a RECORD array)."""
+        with self._lock:
+            last, _ = self._heads([page]).get(page, (NO_RECORD, 0))
+            if last == NO_RECORD:
+                return np.zeros(0, dtype=RECORD)
+            rows = self._mapped(last + 1)
+            chain = []
+            while last != NO_RECORD and len(chain) < limit:
+                chain.append(last)
+                last = int(rows["prev"][last])
+            return np.asarray(rows[chain[::-1]])
+
+    def _mapped(self, records):
+        """Memory map covering at least ``records`` rows (remapped as the file grows)."""
+        if self._map is None or len(self._map) < records:
+            self._map = np.memmap(self.path, dtype=RECORD, mode="r")
+        return self._map
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._conn.close()
+            self._map = None
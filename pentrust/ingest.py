@@ -0,0 +1,209 @@
+"""Streaming page-list ingestion from sitemaps, CSV and plain text files.
+
+Each reader is a generator over a binary file object, so pages flow into
+``PageIndex`` (and on to analysis) as they are parsed; no reader holds the
+whole file, its decoded text or a list of its lines:
+
+* sitemap XML is read with ``iterparse`` and every ``<url>`` is cleared as
+  soon as its ``<loc>`` is out. Sitemap indexes are followed: a child is
+  read from the index's own directory when a file of that name is there,
+  otherwise downloaded (streamed, never saved);
+* CSV is read row by row; the page column is found by header name;
+* text is one page per line.
+
+Gzip-compressed files (``.gz`` or just gzip content) are decompressed on
+the fly. The format comes from the file name, or is sniffed from the first
+bytes when the name doesn't tell.
+"""
+import csv
+import gzip
+import io
+import os
+import xml.etree.ElementTree as ET
+import zlib
+from itertools import chain
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from pentrust.analysis import iter_normalized
+from pentrust.config import FETCH_TIMEOUT_SECONDS, FETCH_USER_AGENT
+
+INGEST_FORMATS = ("sitemap", "csv", "text")
+# Upload types offered in the app.
+INGEST_EXTENSIONS = ("xml", "gz", "csv", "txt")
+# Fields tried, in order, for the page of a JSONL record or CSV row.
+PAGE_FIELDS = ("url", "page", "label", "loc")
+# CSV headers also recognized: crawler exports (e.g. Screaming Frog).
+CSV_PAGE_FIELDS = PAGE_FIELDS + ("address",)
+# Sitemap indexes may point at further indexes; stop following past this.
+MAX_SITEMAP_DEPTH = 3
+SNIFF_BYTES = 512
+
+
+class IngestError(Exception):
+    """A page list could not be read: bad path, format or content."""
+
+
+def _local(tag):
+    return tag.rpartition("}")[2]
+
+
+def _buffered(fh):
+    """``fh`` with ``peek``; gzip content is transparently decompressed."""
+    if not hasattr(fh, "peek"):
+        fh = io.BufferedReader(fh)
+    if fh.peek(2)[:2] == b"\x1f\x8b":
+        fh = io.BufferedReader(gzip.GzipFile(fileobj=fh))
+    return fh
+
+
+def _text(fh, newline=None):
+    return io.TextIOWrapper(fh, encoding="utf-8-sig", errors="replace", newline=newline)
+
+
+def source_format(name, head=b""):
+    """Format of a page list named ``name`` starting with ``head`` (decompressed)."""
+    name = name.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    ext = name.rpartition(".")[2] if "." in name else ""
+    if ext == "xml":
+        return "sitemap"
+    if ext == "csv":
+        return "csv"
+    if ext == "txt":
+        return "text"
+    return "sitemap" if head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<") else "text"
+
+
+def iter_source(fh, name="", fmt=None, column=None, base_dir=None, errors=None):
+    """Pages in the binary file ``fh``, parsed incrementally.
+
+    ``fmt`` is one of INGEST_FORMATS (default: from ``name``/content).
+    ``column`` names the CSV page column. ``base_dir`` is where sitemap
+    index children are looked for first. Children that cannot be read are
+    skipped and reported in ``errors`` as (location, reason) when given;
+    anything else wrong raises ``IngestError``.
+    """
+    if fmt is not None and fmt not in INGEST_FORMATS:
+        raise IngestError(f"unknown page list format {fmt!r}; use one of {', '.join(INGEST_FORMATS)}")
+    try:
+        fh = _buffered(fh)
+        fmt = fmt or source_format(name, fh.peek(SNIFF_BYTES))
+        if fmt == "sitemap":
+            yield from _iter_sitemap(fh, name, base_dir, errors, depth=0, seen={name})
+        elif fmt == "csv":
+            yield from iter_csv(_text(fh, newline=""), column)
+        else:
+            yield from iter_normalized(_text(fh))
+    except (OSError, EOFError, zlib.error) as exc:
+        # e.g. a truncated or corrupt .gz
+        raise IngestError(f"{name or 'input'}: {exc}") from None
+
+
+def iter_path(path, fmt=None, column=None, root=None, errors=None):
+    """Pages in the local file ``path`` (see ``iter_source``).
+
+    With ``root``, only files inside that directory may be read.
+    """
+    real = os.path.realpath(path)
+    if root is not None:
+        root = os.path.realpath(root)
+        if os.path.commonpath([root, real]) != root:
+            raise IngestError(f"{path}: outside the import directory")
+    try:
+        fh = open(real, "rb")
+    except OSError as exc:
+        raise IngestError(f"{path}: {exc.strerror or exc}") from None
+    with fh:
+        yield from iter_source(fh, path, fmt, column, os.path.dirname(real), errors)
+
+
+def iter_csv(lines, column=None):
+    """Page column of CSV ``lines``.
+
+    The column is ``column`` if given, else the first header among
+    CSV_PAGE_FIELDS (case-insensitive), else the first column. A first row
+    whose first cell is a URL is data, not a header.
+    """
+    reader = csv.reader(lines)
+    first = next(reader, None)
+    if first is None:
+        return
+    names = [cell.strip().lower() for cell in first]
+    wanted = (column.strip().lower(),) if column else CSV_PAGE_FIELDS
+    index = next((names.index(n) for n in wanted if n in names), None)
+    rows = reader
+    if index is None:
+        if column:
+            raise IngestError(f"no {column!r} column in the CSV header")
+        index = 0
+        if first and "://" in first[0]:
+            rows = chain([first], reader)
+    for row in rows:
+        if len(row) > index:
+            page = row[index].strip()
+            if page:
+                yield page
+
+
+def _iter_sitemap(fh, location, base_dir, errors, depth, seen):
+    children = []
+    root = None
+    try:
+        for event, elem in ET.iterparse(fh, events=("start", "end")):
+            if root is None:
+                root = elem
+                if _local(root.tag) not in ("urlset", "sitemapindex"):
+                    raise IngestError(f"{location or 'input'}: not a sitemap (<{_local(root.tag)}> root)")
+            if event != "end":
+                continue
+            kind = _local(elem.tag)
+            if kind in ("url", "sitemap"):
+                # Only the direct <loc>: image/video extensions have their own.
+                loc = next((c.text for c in elem if _local(c.tag) == "loc" and c.text), None)
+                if loc and loc.strip():
+                    if kind == "url":
+                        yield loc.strip()
+                    else:
+                        children.append(loc.strip())
+                root.clear()
+    except ET.ParseError as exc:
+        raise IngestError(f"{location or 'input'}: malformed sitemap XML ({exc})") from None
+
+    for child in children:
+        if child in seen:
+            continue
+        seen.add(child)
+        if depth + 1 > MAX_SITEMAP_DEPTH:
+            _skip(errors, child, f"nested deeper than {MAX_SITEMAP_DEPTH} sitemap indexes")
+            continue
+        try:
+            fh, child_dir = _open_child(child, base_dir)
+        except (OSError, ValueError) as exc:
+            _skip(errors, child, f"{type(exc).__name__}: {exc}")
+            continue
+        with fh:
+            try:
+                yield from _iter_sitemap(_buffered(fh), child, child_dir, errors, depth + 1, seen)
+            except (IngestError, OSError, EOFError, zlib.error) as exc:
+                # A bad child doesn't void the pages the others list.
+                _skip(errors, child, str(exc))
+
+
+def _skip(errors, location, reason):
+    if errors is not None:
+        errors.append((location, reason))
+
+
+def _open_child(location, base_dir):
+    """Open a child sitemap: a same-named file next to the index, else the URL."""
+    name = os.path.basename(urlsplit(location).path)
+    if base_dir and name:
+        local = os.path.join(base_dir, name)
+        if os.path.isfile(local):
+            return open(local, "rb"), base_dir
+    if urlsplit(location).scheme not in ("http", "https"):
+        raise ValueError("not an http(s) URL and no local copy")
+    request = Request(location, headers={"User-Agent": FETCH_USER_AGENT})
+    return urlopen(request, timeout=FETCH_TIMEOUT_SECONDS), None
@@ -0,0 +1,158 @@
+"""Per-rerun timing spans, one-shot profiling and metrics export.
+
+A ``RerunTimer`` is created at the top of every script run; code wraps its
+phases in ``timer.span("analyze")`` and so on. Repeated spans with the same
+name add up. At the end of the run the timings go to the debug panel and,
+if configured, to a ``MetricsSink``:
+
+* JSONL: one line per rerun with every span, for ad-hoc analysis;
+* Prometheus text format: cumulative histograms per span and label set
+  (e.g. ``kind="fragment"`` for a panel rerun), rewritten atomically so a node_exporter textfile collector (or anything that
+  tails the file) can scrape it.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the Prometheus histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_LINES = 40
+
+
+class RerunTimer:
+    """Named wall-clock spans for one script run."""
+
+    def __init__(self, profile=False):
+        self.started = time.perf_counter()
+        self.spans = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.finished = None
+        self.profile_text = None
+        self._profiler = None
+        if profile:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another session's profiler is running (only one may be
+                # active per process on newer Pythons).
+                self._profiler = None
+                self.profile_text = "Profiler busy in another session; try again."
+
+    @contextmanager
+    def span(self, name):
+        """Time a block. Spans may nest: time inside both counts for both."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] += time.perf_counter() - started
+            self.counts[name] += 1
+
+    def timed(self, name):
+        """Decorator form of ``span``."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def finish(self):
+        """Stop the clock (and profiler); returns total seconds."""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+            if self._profiler is not None:
+                self._profiler.disable()
+                out = io.StringIO()
+                stats = pstats.Stats(self._profiler, stream=out)
+                stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+                self.profile_text = out.getvalue()
+                self._profiler = None
+        return self.total
+
+    @property
+    def total(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def record(self):
+        """Plain dict of this run's timings (seconds)."""
+        return {
+            "total": self.total,
+            "spans": dict(self.spans),
+            "counts": dict(self.counts),
+        }
+
+
+def _escape(value):
+    # Prometheus label values: backslash, double quote and newline are escaped.
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsSink:
+    """Appends rerun timings to ``path`` as JSONL or Prometheus text.
+
+    The format follows the file extension (``.prom`` -> Prometheus) unless
+    given. Safe to share between sessions.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = fmt or ("prometheus" if path.endswith(".prom") else "jsonl")
+        if self.format not in ("jsonl", "prometheus"):
+            raise ValueError(f"unknown metrics format {self.format!r}; use 'jsonl' or 'prometheus'")
+        self._lock = threading.Lock()
+        # (span, labels) -> [bucket counts..., +Inf count], sum
+        self._buckets = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+        self._sums = defaultdict(float)
+
+    def write(self, timer, **labels):
+        """Record one run. ``labels`` go on every line (JSONL) or series
+        (Prometheus), so e.g. fragment reruns stay apart from full ones."""
+        record = timer.record()
+        spans = dict(record["spans"], total=record["total"])
+        with self._lock:
+            if self.format == "jsonl":
+                line = {"ts": time.time(), **labels, **record}
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(line) + "\n")
+                return
+            label_items = tuple(sorted((key, str(value)) for key, value in labels.items()))
+            for name, seconds in spans.items():
+                key = (name, label_items)
+                buckets = self._buckets[key]
+                for i, bound in enumerate(BUCKETS):
+                    if seconds <= bound:
+                        buckets[i] += 1
+                buckets[-1] += 1
+                self._sums[key] += seconds
+            self._write_prometheus()
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP pentrust_rerun_span_seconds Wall time of named phases of a Streamlit rerun.",
+            "# TYPE pentrust_rerun_span_seconds histogram",
+        ]
+        for key in sorted(self._buckets):
+            name, label_items = key
+            series = ",".join(f'{label}="{_escape(value)}"' for label, value in (("span", name), *label_items))
+            buckets = self._buckets[key]
+            for bound, count in zip(BUCKETS, buckets):
+                lines.append(f'pentrust_rerun_span_seconds_bucket{{{series},le="{bound:g}"}} {count}')
+            lines.append(f'pentrust_rerun_span_seconds_bucket{{{series},le="+Inf"}} {buckets[-1]}')
+            lines.append(f'pentrust_rerun_span_seconds_sum{{{series}}} {self._sums[key]:.6f}')
+            lines.append(f'pentrust_rerun_span_seconds_count{{{series}}} {buckets[-1]}')
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
@@ -0,0 +1,117 @@
+"""Healthcare jargon and copy-cue dictionaries used by the text analyzer.
+
+Entries are lowercase and matched on whole words; multi-word entries match
+as phrases. Keep them here rather than inline so the lists can grow without
+touching the analyzer.
+"""
+
+# Clinical, insurance and administrative terms that patients commonly
+# misread or skip. Plain-language replacements live with the rewrite engine.
+HEALTHCARE_JARGON = (
+    # Insurance and billing
+    "adjudication", "claim adjudication", "prior authorization", "preauthorization",
+    "pre-authorization", "precertification", "pre-certification", "referral authorization",
+    "deductible", "coinsurance", "co-insurance", "copayment", "co-payment", "copay",
+    "out-of-pocket maximum", "out of pocket maximum", "explanation of benefits", "eob",
+    "formulary", "tiered formulary", "non-formulary", "in-network", "out-of-network",
+    "network provider", "allowed amount", "balance billing", "coordination of benefits",
+    "utilization review", "utilization management", "medical necessity", "medically necessary",
+    "durable medical equipment", "dme", "premium", "capitation", "fee schedule",
+    "claim denial", "appeal rights", "grievance", "subrogation", "beneficiary", "subscriber",
+    "dependent coverage", "covered services", "non-covered services", "benefit period",
+    "lifetime maximum", "open enrollment", "special enrollment period", "qualifying life event",
+    "cobra", "health savings account", "flexible spending account", "hsa", "fsa", "hmo", "ppo",
+    "epo", "pos plan", "primary care physician", "pcp", "superbill", "cpt code", "icd-10",
+    "icd code", "diagnosis code", "procedure code", "revenue cycle", "remittance advice",
+    "clearinghouse", "attestation", "documentation requirements", "supporting documentation",
+    "release of information", "authorization form", "advance beneficiary notice", "abn",
+    "facility fee", "professional fee", "itemized statement", "financial assistance policy",
+    "charity care", "sliding fee scale", "self-pay", "retroactive eligibility",
+    # Care settings and administration
+    "ambulatory", "ambulatory care", "outpatient", "inpatient", "observation status",
+    "admission", "discharge planning", "discharge summary", "transition of care",
+    "continuum of care", "care coordination", "case management", "tertiary care",
+    "tertiary care center", "acute care", "post-acute care", "skilled nursing facility", "snf",
+    "long-term acute care", "intake", "triage", "telehealth modality", "patient portal",
+    "health information exchange", "electronic health record", "ehr", "emr",
+    "protected health information", "phi", "hipaa", "notice of privacy practices",
+    "informed consent", "advance directive", "health care proxy", "power of attorney",
+    "interdisciplinary team", "multidisciplinary", "allied health", "credentialing",
+    "scope of practice", "standard of care", "clinical pathway", "care plan", "plan of care",
+    "facilitate", "facilitates", "utilize", "utilization", "aforementioned", "pursuant to",
+    "in accordance with", "prior to", "subsequent to", "notwithstanding", "hereby", "herein",
+    "thereof", "whereby", "commence", "terminate", "remit", "endeavor", "ascertain",
+    # Clinical terms
+    "hypertension", "hypotension", "hyperlipidemia", "hyperglycemia", "hypoglycemia",
+    "myocardial infarction", "cerebrovascular accident", "cva", "transient ischemic attack",
+    "atrial fibrillation", "arrhythmia", "tachycardia", "bradycardia", "congestive heart failure",
+    "cardiomyopathy", "angina", "ischemia", "thrombosis", "deep vein thrombosis",
+    "pulmonary embolism", "embolism", "anticoagulant", "anticoagulation", "antiplatelet",
+    "copd", "chronic obstructive pulmonary disease", "dyspnea", "apnea", "hypoxia",
+    "bronchodilator", "nebulizer", "spirometry", "pneumothorax", "edema", "peripheral edema",
+    "renal insufficiency", "chronic kidney disease", "nephropathy", "dialysis",
+    "glomerular filtration rate", "gfr", "creatinine", "diabetes mellitus", "hba1c", "a1c",
+    "glycemic control", "insulin resistance", "neuropathy", "peripheral neuropathy",
+    "retinopathy", "hepatic", "hepatitis", "cirrhosis", "gastrointestinal", "gi",
+    "gastroesophageal reflux disease", "gerd", "dysphagia", "nausea and emesis", "emesis",
+    "colonoscopy", "endoscopy", "biopsy", "malignant", "benign", "neoplasm", "metastasis",
+    "metastatic", "oncology", "chemotherapy", "radiotherapy", "immunotherapy", "remission",
+    "prognosis", "diagnosis", "differential diagnosis", "etiology", "idiopathic", "comorbidity",
+    "comorbidities", "sequelae", "contraindication", "contraindicated", "indication",
+    "adverse event", "adverse reaction", "side effect profile", "pharmacokinetics",
+    "titrate", "titration", "dosage", "dose-dependent", "bid", "tid", "qid", "prn", "po",
+    "npo", "nothing by mouth", "sublingual", "intravenous", "iv", "intramuscular",
+    "subcutaneous", "topical application", "prophylaxis", "prophylactic", "analgesic",
+    "analgesia", "anesthesia", "sedation", "conscious sedation", "nsaid", "nsaids",
+    "antibiotic regimen", "antimicrobial", "antiviral", "vaccination schedule", "immunization",
+    "booster", "contagious", "communicable", "asymptomatic", "symptomatic", "acute", "chronic",
+    "exacerbation", "inflammation", "inflammatory", "lesion", "laceration", "contusion",
+    "fracture", "sprain", "orthopedic", "musculoskeletal", "ambulation", "ambulate",
+    "range of motion", "physical therapy", "occupational therapy", "rehabilitation",
+    "post-operative", "postoperative", "pre-operative", "preoperative", "perioperative",
+    "incision", "sutures", "wound dehiscence", "surgical site infection", "laparoscopic",
+    "arthroscopic", "minimally invasive", "outpatient procedure", "anesthesiologist",
+    "radiology", "imaging study", "mri", "ct scan", "ultrasound", "echocardiogram", "ekg",
+    "ecg", "electrocardiogram", "mammogram", "screening", "diagnostic imaging", "contrast dye",
+    "lab panel", "complete blood count", "cbc", "metabolic panel", "lipid panel", "urinalysis",
+    "culture and sensitivity", "specimen", "fasting", "fasting blood glucose",
+    "blood pressure reading", "vital signs", "bmi", "body mass index", "obesity",
+    "morbid obesity", "bariatric", "cognitive impairment", "dementia", "neurological",
+    "seizure disorder", "epilepsy", "migraine", "syncope", "vertigo", "psychiatric",
+    "behavioral health", "depressive disorder", "anxiety disorder", "psychotherapy",
+    "cognitive behavioral therapy", "substance use disorder", "prenatal", "antenatal",
+    "postpartum", "gestational", "gestational diabetes", "preeclampsia", "obstetric",
+    "gynecologic", "pediatric", "geriatric", "palliative", "palliative care", "hospice",
+    "end-of-life care", "prognostic", "therapeutic", "therapeutic intervention", "intervention",
+    "modality", "regimen", "protocol", "adherence", "compliance", "non-compliance",
+    "follow-up visit", "follow-up care", "clinical trial", "informed consent form",
+)
+
+# Cues that tell readers what to do next or when to expect something.
+NEXT_STEP_CUES = (
+    "next", "next step", "next steps", "what happens next", "what to expect", "then",
+    "call", "call us", "book", "schedule", "reschedule", "upload", "submit", "bring", "visit",
+    "sign in", "log in", "check in", "complete", "fill out", "reply", "click", "select",
+    "choose", "confirm", "start", "go to", "contact", "text", "email us", "you will receive",
+    "you'll receive", "you will get", "you'll get", "we will contact", "we'll contact",
+    "within 24 hours", "within 48 hours", "within 2 business days", "within 3 business days",
+    "business days", "step 1", "step 2", "step 3", "first", "second", "finally",
+)
+
+# Reassurance and ownership cues near sensitive content.
+TRUST_CUES = (
+    "reviewed by", "medically reviewed", "last updated", "updated on", "written by",
+    "our care team", "care team", "your care team", "privacy", "private", "confidential",
+    "secure", "securely", "encrypted", "protected", "we will never", "we never share",
+    "only used", "used only", "only for your care", "you can", "you can ask",
+    "questions", "if you have questions", "we're here", "we are here", "here to help",
+    "board-certified", "licensed", "accredited", "certified", "trusted", "free of charge",
+    "no cost", "your rights", "you have the right",
+)
+
+# Vague claims that weaken trust when not backed by specifics.
+VAGUE_CLAIMS = (
+    "world-class", "world class", "best-in-class", "cutting-edge", "state-of-the-art",
+    "leading", "industry-leading", "unparalleled", "premier", "top-notch", "best possible",
+    "seamless", "innovative", "holistic", "synergy", "robust",
+)
@@ -0,0 +1,210 @@
+"""Background analysis jobs on a worker pool owned by the server process.
+
+A session submits its page list as a ``Job`` and goes on rerunning
+normally; workers analyze the job chunk by chunk and keep the outcomes
+until the session ``drain``s them on its next rerun. Jobs report status
+and progress and can be cancelled between chunks.
+
+Workers take one chunk at a time, going round-robin over the sessions
+(owners) with work queued, so a short audit is never stuck behind a long
+one; a session's own jobs run in submission order, one chunk in flight per
+job so results arrive in input order.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+
+from pentrust.pipeline import RunProgress
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+# Finished jobs are dropped from the queue's registry after this long.
+JOB_RETENTION_SECONDS = 3600.0
+
+
+class Job:
+    """One page list being analyzed by ``work`` (pages -> outcome)."""
+
+    def __init__(self, owner, pages, work, chunk_size, skip=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.pages = pages
+        self.progress = RunProgress(len(pages))
+        self.status = "queued"
+        self.error = None
+        self.finished_at = None
+        self._work = work
+        self._chunk_size = chunk_size
+        self._next = 0  # first position not yet claimed by a worker
+        self._skip = set(skip)  # positions the session analyzed itself
+        self._busy = False
+        self._cancelled = False
+        self._outcomes = []
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.progress.started
+
+    def take(self, position):
+        """Let the session analyze ``pages[position]`` itself.
+
+        True if no worker has claimed it yet (the job will skip it); False
+        if it is already done or in flight, in which case it arrives via
+        ``drain``.
+        """
+        with self._lock:
+            if position < self._next or position in self._skip:
+                return False
+            self._skip.add(position)
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self.active and not self._busy:
+                self._finish("cancelled")
+
+    def drain(self):
+        """Outcomes of the chunks finished since the last call, in order."""
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, []
+        return outcomes
+
+    # -- Worker side -----------------------------------------------------------
+
+    def _runnable(self):
+        return self.active and not self._busy and not self._cancelled
+
+    def _claim(self):
+        """Positions [start, stop) of the next chunk and its pages; marks
+        the job busy.
+
+        The pages are picked under the lock that moves ``_next`` past the
+        chunk, so a ``take`` either got in first (and the page is left out)
+        or is refused (and the page is analyzed here).
+        """
+        with self._lock:
+            start = self._next
+            self._next = stop = min(len(self.pages), start + self._chunk_size)
+            chunk = [self.pages[i] for i in range(start, stop) if i not in self._skip]
+            self._busy = True
+            self.status = "running"
+        return start, stop, chunk
+
+    def _run(self, start, stop, chunk):
+        try:
+            outcome = self._work(chunk) if chunk else None
+        except Exception as exc:  # reported to the session, not the worker
+            with self._lock:
+                self._busy = False
+                self.error = f"{type(exc).__name__}: {exc}"
+                self._finish("failed")
+            return
+        with self._lock:
+            if outcome is not None:
+                self._outcomes.append(outcome)
+            self.progress.advance(stop - start)
+            self._busy = False
+            if self._cancelled:
+                self._finish("cancelled")
+            elif self._next >= len(self.pages):
+                self._finish("done")
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.monotonic()
+
+
+class JobQueue:
+    """Worker threads shared by every session, scheduling chunks fairly."""
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._jobs = {}  # id -> Job
+        self._owners = deque()  # owners with unfinished jobs, in turn order
+        self._queues = {}  # owner -> deque of that owner's unfinished jobs
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, owner, pages, work, chunk_size, skip=()):
+        job = Job(owner, pages, work, chunk_size, skip)
+        if not pages:
+            job._finish("done")
+        with self._cond:
+            self._prune()
+            self._jobs[job.id] = job
+            if job.active:
+                if owner not in self._queues:
+                    self._queues[owner] = deque()
+                    self._owners.append(owner)
+                self._queues[owner].append(job)
+                self._start_workers()
+                self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def jobs(self, owner=None):
+        with self._cond:
+            return [job for job in self._jobs.values() if owner is None or job.owner == owner]
+
+    def stats(self):
+        counts = dict.fromkeys(JOB_STATES, 0)
+        for job in self.jobs():
+            counts[job.status] += 1
+        return counts
+
+    def _prune(self):
+        oldest = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            if not job.active and job.finished_at < oldest:
+                del self._jobs[job_id]
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"pentrust-job-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _pick(self):
+        """Next runnable job, taking owners in turn; drops finished jobs."""
+        for _ in range(len(self._owners)):
+            owner = self._owners[0]
+            self._owners.rotate(-1)
+            queue = self._queues[owner]
+            while queue and not queue[0].active:
+                queue.popleft()
+            if not queue:
+                del self._queues[owner]
+                self._owners.remove(owner)
+                continue
+            if queue[0]._runnable():
+                return queue[0]
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None:
+                    # Woken by new jobs and finished chunks; the timeout
+                    # catches jobs cancelled while idle.
+                    self._cond.wait(timeout=1.0)
+                    job = self._pick()
+                start, stop, chunk = job._claim()
+            job._run(start, stop, chunk)
+            with self._cond:
+                self._cond.notify_all()
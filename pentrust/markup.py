@@ -0,0 +1,192 @@
+"""Static HTML for the app's cards and stylesheet.
+
+Streamlit re-executes the script on every rerun, so anything memoized in
+the script itself is rebuilt each time. These builders live in a module
+and are ``lru_cache``d: redrawing a page's cards is a dict lookup per
+card instead of re-rendering (and re-dedenting) the markup.
+"""
+import html
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def stylesheet(primary, bg, card_bg, text, muted, border):
+    return f"""<style>
+.stApp {{
+    background: {bg};
+    color: {text};
+}}
+
+/* Sidebar */
+section[data-testid="stSidebar"] {{
+    background: linear-gradient(180deg, {primary} 0%, #FCE57A 100%);
+    border-right: 1px solid rgba(0,0,0,0.04);
+}}
+section[data-testid="stSidebar"] * {{
+    color: {text} !important;
+}}
+
+/* Input outline clarity */
+textarea {{
+    border: 1.5px solid {border} !important;
+    border-radius: 12px !important;
+}}
+
+/* Button styling */
+.stButton>button {{
+    background: {text};
+    color: white;
+    border-radius: 12px;
+    padding: 0.6rem 1rem;
+    border: none;
+    font-weight: 600;
+}}
+.stButton>button:hover {{
+    background: #111827;
+}}
+
+/* Card styles */
+.pt-card {{
+    background: {card_bg};
+    border: 1px solid {border};
+    border-radius: 18px;
+    padding: 18px 20px;
+    box-shadow: 0 6px 18px rgba(2, 6, 23, 0.06);
+}}
+
+.pt-metric {{
+    border-radius: 18px;
+    padding: 22px 22px;
+    border: 1px solid {border};
+    background: {card_bg};
+    box-shadow: 0 6px 18px rgba(2, 6, 23, 0.06);
+    min-height: 140px;
+}}
+.pt-metric.primary {{
+    background: linear-gradient(135deg, {primary} 0%, #FFECA0 100%);
+}}
+.pt-metric.blue {{
+    background: linear-gradient(135deg, #DBEAFE 0%, #C7D2FE 100%);
+}}
+.pt-metric.soft {{
+    background: #FFF7E6;
+}}
+
+.pt-metric-title {{
+    font-size: 1.1rem;
+    font-weight: 600;
+    color: {text};
+    margin-bottom: 6px;
+}}
+.pt-metric-value {{
+    font-size: 2.4rem;
+    font-weight: 800;
+    letter-spacing: -0.02em;
+    margin: 0;
+    color: {text};
+}}
+.pt-metric-sub {{
+    font-size: 0.95rem;
+    color: {muted};
+    margin-top: 6px;
+}}
+
+.pt-section-title {{
+    font-size: 1.6rem;
+    font-weight: 800;
+    margin-bottom: 6px;
+}}
+
+.pt-caption {{
+    color: {muted};
+    font-size: 0.98rem;
+}}
+
+.pt-pill {{
+    display: inline-block;
+    padding: 4px 10px;
+    border-radius: 999px;
+    font-size: 0.8rem;
+    font-weight: 600;
+    background: #EEF2FF;
+    color: {text};
+    border: 1px solid {border};
+}}
+
+/* Reduce default top padding feel */
+.block-container {{
+    padding-top: 1.4rem;
+}}
+</style>"""
+
+
+HEADER = """<div class="pt-card">
+<div class="pt-section-title">PenTrust – Healthcare Content Clarity Analyzer</div>
+<div class="pt-caption">
+Paste multiple URLs or page labels to simulate how an AI content audit could surface clarity,
+next-step, trust, and accessibility-aware writing risks.
+</div>
+</div>"""
+
+NOTIFICATIONS = """<div class="pt-card">
+<div class="pt-section-title" style="font-size:1.3rem;">Notifications</div>
+<div style="margin-top:12px;">
+<div style="font-weight:600;">⚠️ Clarity alert detected</div>
+<div class="pt-caption">Just now</div>
+</div>
+<div style="margin-top:14px;">
+<div style="font-weight:600;">👥 New page added to review</div>
+<div class="pt-caption">A few minutes ago</div>
+</div>
+<div style="margin-top:14px;">
+<div style="font-weight:600;">✅ Analysis complete</div>
+<div class="pt-caption">Moments ago</div>
+</div>
+</div>"""
+
+ACTIVITIES = """<div class="pt-card">
+<div class="pt-section-title" style="font-size:1.3rem;">Activities</div>
+<div style="margin-top:12px;">
+<div style="font-weight:600;">📄 Report previewed</div>
+<div class="pt-caption">Just now</div>
+</div>
+<div style="margin-top:14px;">
+<div style="font-weight:600;">🧭 Page switched</div>
+<div class="pt-caption">Live selection enabled</div>
+</div>
+</div>"""
+
+
+@lru_cache(maxsize=64)
+def section_header(title, caption):
+    return f"""<div style="display:flex; justify-content: space-between; align-items:center; margin-bottom: 8px;">
+<div class="pt-section-title">{title}</div>
+<div class="pt-caption">{caption}</div>
+</div>"""
+
+
+@lru_cache(maxsize=1024)
+def metric_card(title, value, sub, style_class=""):
+    return f"""<div class="pt-metric {style_class}">
+<div class="pt-metric-title">{title}</div>
+<div class="pt-metric-value">{value}</div>
+<div class="pt-metric-sub">{sub}</div>
+</div>"""
+
+
+@lru_cache(maxsize=1024)
+def issue_card(title, desc):
+    return f"""<div class="pt-card" style="margin-bottom: 10px;">
+<span class="pt-pill">Issue</span>
+<div style="font-weight: 700; font-size: 1.05rem; margin-top: 6px;">⚠️ {title}</div>
+<div class="pt-caption" style="margin-top: 2px;">{desc}</div>
+</div>"""
+
+
+@lru_cache(maxsize=1024)
+def page_card(page):
+    # The page is user input: escape it.
+    return f"""<div class="pt-card">
+<div style="font-weight:700;">Page under review</div>
+<div class="pt-caption">{html.escape(page)}</div>
+</div>"""
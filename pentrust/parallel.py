@@ -0,0 +1,88 @@
+"""Process-pool execution mode for large page lists.
+
+Pages are split into contiguous chunks, each chunk is scored by
+``analyze_batch`` in a worker process and the chunks are merged back in input
+order, so the result is identical to the serial path.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pentrust import batch
+from pentrust.batch import BatchResult, analyze_batch
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(workers=None):
+    """Process pool shared across calls; workers are spawned once per size."""
+    workers = workers or os.cpu_count() or 1
+    with _lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            # spawn, not fork: the Streamlit server process is multi-threaded.
+            executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _executors[workers] = executor
+        return executor
+
+
+def shutdown_executors():
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(cancel_futures=True)
+        _executors.clear()
+
+
+atexit.register(shutdown_executors)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def merge_batches(batches, pages):
+    if not batches:
+        return analyze_batch(pages)
+    return BatchResult(
+        pages,
+        np.concatenate([b.scores for b in batches]),
+        np.concatenate([b.issues for b in batches]),
+        np.concatenate([b.trend for b in batches]),
+    )
+
+
+def analyze_batch_parallel(pages, workers=None, chunk_size=5000):
+    """Like ``analyze_batch`` but sharded across a process pool."""
+    pages = list(pages)
+    if len(pages) <= chunk_size:
+        # Not worth the inter-process round trip
+        return analyze_batch(pages)
+    executor = get_executor(workers)
+    # Executor.map yields in submission order, which keeps input order.
+    batches = list(executor.map(analyze_batch, chunked(pages, chunk_size)))
+    return merge_batches(batches, pages)
+
+
+def analyze_many_parallel(pages, workers=None, chunk_size=5000, analyze_many=None):
+    """One analysis dict per page, computed on the process pool.
+
+    ``analyze_many`` picks another backend (see ``pentrust.analyzers``); it
+    must be a module-level function so workers can unpickle it.
+    """
+    if analyze_many is None or analyze_many is batch.analyze_many:
+        # Columnar chunks pickle far smaller than lists of dicts
+        return analyze_batch_parallel(pages, workers, chunk_size).analyses()
+    pages = list(pages)
+    if len(pages) <= chunk_size:
+        return analyze_many(pages)
+    executor = get_executor(workers)
+    results = []
+    for chunk in executor.map(analyze_many, chunked(pages, chunk_size)):
+        results.extend(chunk)
+    return results
@@ -0,0 +1,62 @@
+"""Bookkeeping for runs that are analyzed incrementally across reruns."""
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RunProgress:
+    """Progress of one "Run analysis" click over ``total`` pages."""
+
+    total: int
+    done: int = 0
+    started: float = field(default_factory=time.monotonic)
+    # Audit table is redrawn when ``done`` reaches this; doubled each time
+    # so redraws cost O(total) overall.
+    next_table_refresh: int = 1
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 1.0
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        return (self.total - self.done) / rate if rate else None
+
+    def advance(self, n):
+        self.done = min(self.total, self.done + n)
+
+    def table_due(self):
+        if self.finished or self.done >= self.next_table_refresh:
+            self.next_table_refresh = max(1, self.done) * 2
+            return True
+        return False
+
+    def label(self):
+        eta = self.eta()
+        eta_text = "—" if eta is None else format_duration(eta)
+        return (
+            f"Analyzed {self.done:,} / {self.total:,} pages · "
+            f"{self.rate():,.0f} pages/sec · ETA {eta_text}"
+        )
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
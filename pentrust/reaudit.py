@@ -0,0 +1,206 @@
+"""Incremental re-audits: analyze only what changed since the last run.
+
+The manifest remembers, per page of a portfolio, the digest of the content
+that was analyzed, the analyzer version and when. A re-audit compares the
+current content digests against it:
+
+* added     – page not in the manifest
+* changed   – content digest differs
+* stale     – same content, but another analyzer version or older than
+              ``max_age`` seconds
+* unchanged – carried forward from the manifest, not re-analyzed
+* removed   – in the manifest but no longer in the page list
+
+so the work done is proportional to what changed, not to portfolio size.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from pentrust.cache import _SQL_CHUNK, _decode, _encode
+from pentrust.urls import SeenPages
+
+CHANGE_KINDS = ("added", "changed", "stale", "unchanged", "removed")
+
+
+@dataclass
+class AuditDiff:
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    stale: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+
+    def merge(self, other):
+        for kind in CHANGE_KINDS:
+            getattr(self, kind).extend(getattr(other, kind))
+        return self
+
+    def counts(self):
+        return {kind: len(getattr(self, kind)) for kind in CHANGE_KINDS}
+
+    def kind_of(self):
+        """page -> change kind."""
+        return {page: kind for kind in CHANGE_KINDS for page in getattr(self, kind)}
+
+    def summary(self):
+        return format_counts(self.counts())
+
+
+def format_counts(counts):
+    """"1 added · 0 changed · …" for change kind -> count."""
+    return " · ".join(f"{counts.get(kind, 0):,} {kind}" for kind in CHANGE_KINDS)
+
+
+class AuditManifest:
+    """SQLite record of the last analysis of every page in a portfolio."""
+
+    def __init__(self, path=None, portfolio="default"):
+        self.portfolio = portfolio
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS audit_manifest (
+                    portfolio TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    analyzed_at REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (portfolio, url)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM audit_manifest WHERE portfolio = ?", (self.portfolio,)
+            ).fetchone()
+        return count
+
+    def _select(self, columns, pages):
+        pages = list(pages)
+        with self._lock:
+            for start in range(0, len(pages), _SQL_CHUNK):
+                chunk = pages[start:start + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                yield from self._conn.execute(
+                    f"SELECT url, {columns} FROM audit_manifest WHERE portfolio = ? AND url IN ({marks})",
+                    [self.portfolio, *chunk],
+                ).fetchall()
+
+    def classify(self, digests, version, max_age=None):
+        """AuditDiff (without ``removed``) for ``digests``: page -> content digest."""
+        known = {url: rest for url, *rest in self._select("digest, version, analyzed_at", digests)}
+        oldest = time.time() - max_age if max_age else None
+        diff = AuditDiff()
+        for page, digest in digests.items():
+            entry = known.get(page)
+            if entry is None:
+                diff.added.append(page)
+            elif entry[0] != digest:
+                diff.changed.append(page)
+            elif entry[1] != version or (oldest is not None and entry[2] < oldest):
+                diff.stale.append(page)
+            else:
+                diff.unchanged.append(page)
+        return diff
+
+    def removed(self, pages):
+        """Manifest pages that are not in ``pages``, in manifest order.
+
+        ``pages`` is an iterable of pages or a ``SeenPages``; the manifest
+        is read in chunks and checked against it chunk by chunk.
+        """
+        if isinstance(pages, SeenPages):
+            present = pages.contains_many
+        else:
+            pages = set(pages)
+            present = pages.intersection
+        removed = []
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT url FROM audit_manifest WHERE portfolio = ?", (self.portfolio,)
+            )
+            while rows := [url for (url,) in cursor.fetchmany(_SQL_CHUNK)]:
+                found = present(rows)
+                removed.extend(url for url in rows if url not in found)
+        return removed
+
+    def load(self, pages):
+        """page -> analysis recorded for it."""
+        return {url: _decode(payload) for url, payload in self._select("payload", pages)}
+
+    def record(self, rows, version):
+        """Store (page, digest, analysis) rows as analyzed now with ``version``."""
+        now = time.time()
+        rows = [(self.portfolio, page, digest, version, now, _encode(analysis)) for page, digest, analysis in rows]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO audit_manifest (portfolio, url, digest, version, analyzed_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def forget(self, pages):
+        pages = list(pages)
+        with self._lock, self._conn:
+            for start in range(0, len(pages), _SQL_CHUNK):
+                chunk = pages[start:start + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(
+                    f"DELETE FROM audit_manifest WHERE portfolio = ? AND url IN ({marks})",
+                    [self.portfolio, *chunk],
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def reaudit_batch(manifest, items, analyze_many, version, max_age=None, refetch=None):
+    """Re-audit one batch of pages against ``manifest``.
+
+    ``items`` are (page, digest, content) triples; ``content`` may be None
+    when only the digest is known (an HTTP 304), in which case ``refetch``
+    maps such pages to fresh (digest, content) pairs if they need
+    re-analysis after all ((None, None) when that fails). Returns (analyses
+    in ``items`` order, AuditDiff); pages whose refetch failed get None and
+    are left out of the diff. The diff's ``removed`` is left to the caller,
+    who knows the full list.
+    """
+    items = list(items)
+    digests = {page: digest for page, digest, _ in items}
+    contents = {page: content for page, _, content in items}
+    diff = manifest.classify(digests, version, max_age)
+
+    todo = diff.added + diff.changed + diff.stale
+    missing = [page for page in todo if contents[page] is None]
+    if missing:
+        for page, (digest, content) in zip(missing, refetch(missing)):
+            digests[page], contents[page] = digest, content
+        failed = {page for page in missing if contents[page] is None}
+        if failed:
+            todo = [page for page in todo if page not in failed]
+            for kind in ("added", "changed", "stale"):
+                setattr(diff, kind, [page for page in getattr(diff, kind) if page not in failed])
+        # A refetch can reveal the content changed after all.
+        refetched = {page: digests[page] for page in missing if page not in failed}
+        recheck = manifest.classify(refetched, version, max_age)
+        for page in recheck.changed:
+            if page in diff.stale:
+                diff.stale.remove(page)
+                diff.changed.append(page)
+
+    analyzed = dict(zip(todo, analyze_many([contents[page] for page in todo])))
+    manifest.record([(page, digests[page], analyzed[page]) for page in todo], version)
+    analyzed.update(manifest.load(diff.unchanged))
+    return [analyzed.get(page) for page, _, _ in items], diff
@@ -0,0 +1,489 @@
+"""Plain-language rewrite suggestions for the Deep Analysis page.
+
+``ISSUE_GUIDES`` is the table behind the page: for every issue title, the
+explanation, the fix, sample Before/After copy and the rewrite rule
+applied to the sample (and to any copy the user pastes). The rules share one sentence-level
+core:
+
+* jargon and wordy phrases are swapped for plain language in a single
+  pass of a ``PhraseMatcher`` compiled from ``PLAIN_LANGUAGE``, longest
+  phrase first wherever matches overlap;
+* a dense instruction (a long sentence of comma- or semicolon-separated
+  clauses) is split into a short lead and numbered steps.
+
+Sentence rewrites are memoized in an LRU cache keyed by the sentence, so
+boilerplate repeated across an audit (footers, consent lines, portal
+instructions) is rewritten once per process.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from pentrust.text_analysis import PhraseMatcher, default_matcher, tokenize
+
+# Distinct sentences whose rewrites are kept.
+REWRITE_CACHE_SIZE = 65_536
+# A sentence this long with at least DENSE_MIN_CLAUSES clauses is split
+# into steps.
+DENSE_MIN_WORDS = 20
+DENSE_MIN_CLAUSES = 3
+
+# Jargon (see pentrust.jargon) and wordy phrases -> plain language. Keys are
+# lowercase and matched on whole words; replacements keep the original's
+# leading capital. Words with an everyday meaning ("premium", "intake",
+# "benign") are left out: the map only holds terms a patient page would
+# not use in any other sense.
+PLAIN_LANGUAGE = {
+    # Insurance and billing
+    "adjudication": "review",
+    "claim adjudication": "claim review",
+    "prior authorization": "approval from your plan first",
+    "preauthorization": "approval from your plan first",
+    "pre-authorization": "approval from your plan first",
+    "precertification": "approval from your plan first",
+    "pre-certification": "approval from your plan first",
+    "referral authorization": "referral approval",
+    "deductible": "amount you pay before your plan pays",
+    "coinsurance": "your share of the cost",
+    "co-insurance": "your share of the cost",
+    "copayment": "fixed fee",
+    "co-payment": "fixed fee",
+    "copay": "fixed fee",
+    "out-of-pocket maximum": "most you pay in a year",
+    "out of pocket maximum": "most you pay in a year",
+    "explanation of benefits": "statement from your plan",
+    "formulary": "list of covered drugs",
+    "tiered formulary": "list of covered drugs",
+    "non-formulary": "not on your plan's drug list",
+    "in-network": "covered by your plan",
+    "out-of-network": "not covered by your plan",
+    "network provider": "provider your plan covers",
+    "allowed amount": "amount your plan agrees to pay",
+    "balance billing": "billing you for the rest of the cost",
+    "coordination of benefits": "how your plans share the cost",
+    "utilization review": "plan review of your care",
+    "utilization management": "plan review of your care",
+    "medical necessity": "medical need",
+    "medically necessary": "needed for your health",
+    "durable medical equipment": "medical equipment for home use",
+    "dme": "medical equipment for home use",
+    "claim denial": "claim that was not approved",
+    "appeal rights": "right to ask for another review",
+    "grievance": "complaint",
+    "beneficiary": "member",
+    "dependent coverage": "coverage for family members",
+    "covered services": "care your plan pays for",
+    "non-covered services": "care your plan does not pay for",
+    "benefit period": "coverage period",
+    "open enrollment": "yearly sign-up period",
+    "special enrollment period": "sign-up period after a life change",
+    "qualifying life event": "life change such as a move, birth or marriage",
+    "primary care physician": "main doctor",
+    "pcp": "main doctor",
+    "superbill": "detailed receipt",
+    "cpt code": "billing code",
+    "icd code": "diagnosis code",
+    "procedure code": "billing code",
+    "remittance advice": "payment notice",
+    "attestation": "signed statement",
+    "documentation": "documents",
+    "documentation requirements": "documents we need",
+    "supporting documentation": "documents",
+    "required documentation": "documents we need",
+    "release of information": "permission to share your records",
+    "authorization form": "permission form",
+    "advance beneficiary notice": "notice that Medicare may not pay",
+    "itemized statement": "detailed bill",
+    "financial assistance policy": "help paying your bill",
+    "charity care": "free or low-cost care",
+    "sliding fee scale": "fees based on income",
+    "self-pay": "paying without insurance",
+    "retroactive eligibility": "coverage that starts in the past",
+    # Care settings and administration
+    "ambulatory care": "care without a hospital stay",
+    "outpatient visit": "clinic visit",
+    "outpatient procedure": "procedure without a hospital stay",
+    "inpatient stay": "hospital stay",
+    "observation status": "short hospital stay for monitoring",
+    "discharge planning": "planning for going home",
+    "discharge summary": "notes for when you go home",
+    "transition of care": "move to another care setting",
+    "continuum of care": "all stages of your care",
+    "care coordination": "help organizing your care",
+    "case management": "help managing your care",
+    "tertiary care center": "specialty hospital",
+    "tertiary care": "specialty care",
+    "acute care": "short-term care",
+    "post-acute care": "care after a hospital stay",
+    "skilled nursing facility": "nursing home for recovery",
+    "snf": "nursing home for recovery",
+    "triage": "deciding who needs care first",
+    "telehealth modality": "video or phone visit",
+    "electronic health record": "health record",
+    "ehr": "health record",
+    "emr": "health record",
+    "protected health information": "your health information",
+    "phi": "your health information",
+    "notice of privacy practices": "privacy notice",
+    "informed consent": "permission after learning the risks",
+    "informed consent form": "permission form",
+    "advance directive": "written wishes for your care",
+    "health care proxy": "person who can decide for you",
+    "interdisciplinary team": "care team",
+    "multidisciplinary": "team-based",
+    "scope of practice": "what a provider is allowed to do",
+    "standard of care": "usual care",
+    "clinical pathway": "care plan",
+    "plan of care": "care plan",
+    # Wordy phrases
+    "facilitate": "help with",
+    "facilitates": "helps with",
+    "utilize": "use",
+    "utilization": "use",
+    "aforementioned": "this",
+    "pursuant to": "under",
+    "in accordance with": "following",
+    "prior to": "before",
+    "subsequent to": "after",
+    "notwithstanding": "despite",
+    "commence": "start",
+    "endeavor": "try",
+    "ascertain": "find out",
+    "in order to": "to",
+    "at this point in time": "now",
+    "due to the fact that": "because",
+    "in the event that": "if",
+    "a sufficient number of": "enough",
+    "is required to": "must",
+    "are required to": "must",
+    # Clinical terms
+    "hypertension": "high blood pressure",
+    "hypotension": "low blood pressure",
+    "hyperlipidemia": "high cholesterol",
+    "hyperglycemia": "high blood sugar",
+    "hypoglycemia": "low blood sugar",
+    "myocardial infarction": "heart attack",
+    "cerebrovascular accident": "stroke",
+    "cva": "stroke",
+    "transient ischemic attack": "mini-stroke",
+    "atrial fibrillation": "irregular heartbeat",
+    "arrhythmia": "irregular heartbeat",
+    "tachycardia": "fast heartbeat",
+    "bradycardia": "slow heartbeat",
+    "congestive heart failure": "heart failure",
+    "ischemia": "poor blood flow",
+    "thrombosis": "blood clot",
+    "deep vein thrombosis": "blood clot in a leg vein",
+    "pulmonary embolism": "blood clot in the lungs",
+    "anticoagulant": "blood thinner",
+    "anticoagulation": "blood thinners",
+    "chronic obstructive pulmonary disease": "COPD (long-term lung disease)",
+    "dyspnea": "shortness of breath",
+    "apnea": "pauses in breathing",
+    "hypoxia": "low oxygen",
+    "bronchodilator": "inhaler that opens the airways",
+    "edema": "swelling",
+    "peripheral edema": "swelling in the legs or arms",
+    "renal insufficiency": "weak kidneys",
+    "chronic kidney disease": "long-term kidney disease",
+    "nephropathy": "kidney damage",
+    "diabetes mellitus": "diabetes",
+    "glycemic control": "blood sugar control",
+    "neuropathy": "nerve damage",
+    "peripheral neuropathy": "nerve damage in the hands or feet",
+    "retinopathy": "eye damage",
+    "hepatic": "liver",
+    "gastrointestinal": "stomach and bowel",
+    "gastroesophageal reflux disease": "acid reflux",
+    "gerd": "acid reflux",
+    "dysphagia": "trouble swallowing",
+    "nausea and emesis": "nausea and vomiting",
+    "emesis": "vomiting",
+    "malignant": "cancerous",
+    "neoplasm": "growth",
+    "metastasis": "cancer spread",
+    "metastatic": "cancer that has spread",
+    "oncology": "cancer care",
+    "radiotherapy": "radiation therapy",
+    "remission": "no signs of disease",
+    "prognosis": "likely outcome",
+    "etiology": "cause",
+    "idiopathic": "of unknown cause",
+    "comorbidity": "other health condition",
+    "comorbidities": "other health conditions",
+    "sequelae": "after-effects",
+    "contraindication": "reason not to use a treatment",
+    "contraindicated": "not safe to use",
+    "adverse event": "harmful effect",
+    "adverse reaction": "bad reaction",
+    "titrate": "adjust the dose",
+    "titration": "dose adjustment",
+    "dosage": "dose",
+    "bid": "twice a day",
+    "tid": "three times a day",
+    "qid": "four times a day",
+    "prn": "as needed",
+    "npo": "nothing to eat or drink",
+    "nothing by mouth": "nothing to eat or drink",
+    "sublingual": "under the tongue",
+    "intravenous": "through a vein",
+    "intramuscular": "into a muscle",
+    "subcutaneous": "under the skin",
+    "prophylaxis": "prevention",
+    "prophylactic": "preventive",
+    "analgesic": "pain reliever",
+    "analgesia": "pain relief",
+    "conscious sedation": "medicine to relax you while awake",
+    "antimicrobial": "germ-fighting",
+    "immunization": "vaccine",
+    "contagious": "spreads easily",
+    "communicable": "can spread to others",
+    "asymptomatic": "without symptoms",
+    "exacerbation": "flare-up",
+    "lesion": "sore or growth",
+    "laceration": "cut",
+    "contusion": "bruise",
+    "ambulation": "walking",
+    "ambulate": "walk",
+    "post-operative": "after surgery",
+    "postoperative": "after surgery",
+    "pre-operative": "before surgery",
+    "preoperative": "before surgery",
+    "perioperative": "around the time of surgery",
+    "incision": "cut",
+    "sutures": "stitches",
+    "wound dehiscence": "wound opening",
+    "surgical site infection": "infection where you had surgery",
+    "laparoscopic": "keyhole",
+    "minimally invasive": "using small cuts",
+    "imaging study": "scan",
+    "diagnostic imaging": "scans",
+    "echocardiogram": "heart ultrasound",
+    "electrocardiogram": "heart rhythm test",
+    "contrast dye": "dye that shows up on scans",
+    "complete blood count": "blood test",
+    "lab panel": "blood tests",
+    "metabolic panel": "blood test",
+    "specimen": "sample",
+    "vital signs": "temperature, pulse and blood pressure",
+    "cognitive impairment": "memory or thinking problems",
+    "syncope": "fainting",
+    "vertigo": "dizziness",
+    "psychotherapy": "talk therapy",
+    "prenatal": "during pregnancy",
+    "antenatal": "during pregnancy",
+    "postpartum": "after giving birth",
+    "gestational": "pregnancy",
+    "pediatric": "children's",
+    "geriatric": "older adults'",
+    "palliative care": "care to ease symptoms",
+    "therapeutic intervention": "treatment",
+    "regimen": "plan",
+    "adherence": "sticking to your treatment",
+}
+
+# Abbreviations that are ordinary words in lowercase ("bid", "phi"); they
+# are only replaced when written in capitals.
+UPPERCASE_ONLY = frozenset({
+    "bid", "tid", "qid", "prn", "npo", "dme", "pcp", "snf", "ehr", "emr", "phi", "cva", "gerd",
+})
+
+# Placeholders the writer fills in; a generic rule can't know the action
+# or the reviewer.
+NEXT_STEP_PROMPT = "**Next:** [the one thing to do now, and when they'll hear back]."
+TRUST_PROMPT = "Reviewed by [team or role] · Last updated [month year]. We use this only for [purpose]."
+
+_SPLIT_TEXT = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+_WORD_SPAN = re.compile(r"[A-Za-z0-9]+(?:['’-][A-Za-z0-9]+)*")
+_CLAUSES = re.compile(r"\s*;\s*|,\s+(?:and\s+|then\s+|or\s+)?")
+_PURPOSE = re.compile(r"^(to|before|after|when|if|once)\b", re.IGNORECASE)
+_POLITE = re.compile(r"^(?:please|and|then|also)\s+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def plain_matcher():
+    """(PhraseMatcher over PLAIN_LANGUAGE, replacement per pattern id,
+    words per pattern id, whether each pattern must be in capitals),
+    compiled once per process."""
+    matcher = PhraseMatcher({"plain": PLAIN_LANGUAGE})
+    replacements = [PLAIN_LANGUAGE[phrase] for _, phrase in matcher.phrases]
+    lengths = [len(tokenize(phrase)) for _, phrase in matcher.phrases]
+    upper = [phrase in UPPERCASE_ONLY for _, phrase in matcher.phrases]
+    return matcher, replacements, lengths, upper
+
+
+def _match_case(original, replacement, sentence_start):
+    # "Hypertension" -> "High blood pressure", but "take it BID" -> "take
+    # it twice a day"
+    if original[:1].isupper() and (sentence_start or not original.isupper()):
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def plain_language(sentence):
+    """``sentence`` with every PLAIN_LANGUAGE phrase replaced."""
+    spans = list(_WORD_SPAN.finditer(sentence))
+    if not spans:
+        return sentence
+    matcher, replacements, lengths, upper = plain_matcher()
+    # Longest phrase starting at each token; the scan below takes them
+    # leftmost first, so overlaps resolve leftmost-longest.
+    longest = {}
+    for end, pid in matcher.iter_matches([m.group().lower() for m in spans]):
+        start = end - lengths[pid] + 1
+        if upper[pid] and not spans[start].group().isupper():
+            continue
+        if lengths[pid] > longest.get(start, (0, None))[0]:
+            longest[start] = (lengths[pid], pid)
+    if not longest:
+        return sentence
+    out, pos, i = [], 0, 0
+    while i < len(spans):
+        if i in longest:
+            length, pid = longest[i]
+            first, last = spans[i], spans[i + length - 1]
+            out.append(sentence[pos:first.start()])
+            out.append(_match_case(first.group(), replacements[pid], i == 0))
+            pos = last.end()
+            i += length
+        else:
+            i += 1
+    out.append(sentence[pos:])
+    return "".join(out)
+
+
+def dense_steps(sentence):
+    """(lead or None, steps) for a dense instruction, or None if it reads fine."""
+    if len(tokenize(sentence)) < DENSE_MIN_WORDS:
+        return None
+    body = sentence.rstrip(".!? ")
+    clauses = []
+    for clause in _CLAUSES.split(body):
+        clause = clause.strip()
+        if clauses and len(clause.split()) < 3:
+            # e.g. "Dr. Lee, MD": not a step of its own
+            clauses[-1] = f"{clauses[-1]}, {clause}"
+        elif clause:
+            clauses.append(clause)
+    lead = None
+    if clauses and _PURPOSE.match(clauses[0]):
+        lead = clauses.pop(0)
+    if len(clauses) + (lead is not None) < DENSE_MIN_CLAUSES:
+        return None
+    steps = [_POLITE.sub("", clause) for clause in clauses]
+    return lead, [step[:1].upper() + step[1:] for step in steps]
+
+
+@lru_cache(maxsize=REWRITE_CACHE_SIZE)
+def rewrite_sentence(sentence):
+    """Plain-language version of one sentence; dense ones become steps."""
+    plain = plain_language(sentence)
+    split = dense_steps(plain)
+    if split is None:
+        return plain
+    lead, steps = split
+    listed = "\n".join(f"{n}. {step}." for n, step in enumerate(steps, 1))
+    return f"{lead}:\n\n{listed}" if lead else listed
+
+
+def split_text(text):
+    return [s for s in _SPLIT_TEXT.split(text.strip()) if s]
+
+
+def _join(sentences):
+    # Numbered steps need blank lines around them to render as a list.
+    return "".join(
+        ("\n\n" if i and ("\n" in s or "\n" in sentences[i - 1]) else " " if i else "") + s
+        for i, s in enumerate(sentences)
+    )
+
+
+@dataclass(frozen=True)
+class IssueGuide:
+    heading: str
+    problem: str
+    fix: str
+    # Sample copy shown as Before and a hand-written After; the engine's
+    # rewrite of the Before is shown alongside...
+    before: str = ""
+    after: str = ""
+    # ...or, instead, a checklist for the writer.
+    checklist: tuple = ()
+    # Rewrite rule: "list" puts one sentence per line; a (default_matcher
+    # category, prompt) cue appends the prompt when the copy has no such cue.
+    layout: str = "prose"
+    cue: tuple = ()
+
+
+ISSUE_GUIDES = {
+    "Dense instructions": IssueGuide(
+        "Instructions are too dense for quick scanning",
+        "Actions are embedded in long paragraphs, lowering scan and completion rates.",
+        "Lead with a 1-line summary, then 2–3 short steps. Add headings and whitespace.",
+        before=(
+            "To complete your appointment request, please review the following detailed instructions, "
+            "ensure you have your insurance information ready, and confirm your provider preference before proceeding."
+        ),
+        after=(
+            "**Book in 3 steps:** 1) Choose a date  2) Select a provider  3) Confirm your details. "
+            "Have your insurance card ready for step 3."
+        ),
+    ),
+    "Unclear next steps": IssueGuide(
+        "Next steps are unclear after key actions",
+        "Users receive acknowledgment without instructions for what to do next.",
+        "Add explicit next-step microcopy + one primary CTA + time expectation.",
+        before="Your request was received. We’ll review it.",
+        after="Request received. **Next:** Upload your insurance card to continue. You’ll get an update within 24 hours.",
+        cue=("next_step", NEXT_STEP_PROMPT),
+    ),
+    "Weak micro trust": IssueGuide(
+        "Trust signals need reinforcement near sensitive moments",
+        "Sensitive information appears without brief reassurance or ownership cues.",
+        "Add micro trust cues: “Reviewed by…”, “Last updated…”, and 1-line data reassurance.",
+        before="This information will be used to support your care.",
+        after=(
+            "This information supports your care. **We use it only for your treatment and service updates.** "
+            "Reviewed by the care team • Last updated this month."
+        ),
+        cue=("trust", TRUST_PROMPT),
+    ),
+    "Readability mismatch": IssueGuide(
+        "Readability may be too complex for broad patient use",
+        "Medical or administrative language may increase confusion and support dependence.",
+        "Swap jargon for plain language and add short examples.",
+        before="Please submit the required documentation to facilitate claim adjudication.",
+        after="Please upload your documents so we can process your insurance claim.",
+    ),
+    "Accessibility gaps": IssueGuide(
+        "Accessibility-aware writing structure is inconsistent",
+        "Headings, lists, and chunking may not support quick assistive scanning.",
+        "Use descriptive headings, short paragraphs, and consistent list patterns.",
+        checklist=(
+            "One idea per paragraph",
+            "Use numbered steps for tasks",
+            "Put critical warnings first",
+            "Keep labels consistent across pages",
+            "Avoid multi-clause instruction sentences",
+        ),
+        layout="list",
+    ),
+}
+
+
+def rewrite_copy(text, issues=()):
+    """Suggested rewrite of ``text`` for the given issue titles. Every
+    sentence gets the plain-language pass; the issues' guides add layout
+    and missing cues."""
+    guides = [ISSUE_GUIDES[title] for title in issues if title in ISSUE_GUIDES]
+    sentences = [rewrite_sentence(s) for s in split_text(text)]
+    if len(sentences) > 1 and any(guide.layout == "list" for guide in guides):
+        # One point per line, so assistive tech can step through them.
+        text = "\n".join(s if "\n" in s else f"- {s}" for s in sentences)
+    else:
+        text = _join(sentences)
+    cues = [guide.cue for guide in guides if guide.cue]
+    if cues:
+        found = default_matcher().category_counts(tokenize(text))
+        text = " ".join([text, *(prompt for category, prompt in cues if not found[category])])
+    return text
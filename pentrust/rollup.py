@@ -0,0 +1,282 @@
+"""Portfolio-wide rollup of an ``AnalysisStore``, maintained incrementally.
+
+``PortfolioRollup`` keeps the aggregates behind the Portfolio view: pages
+per risk level, pages per issue, a score histogram and sum per dimension,
+and the worst ``WORST_N`` pages of each dimension. Like ``AuditTable`` it
+follows the store's change journal: appended rows are folded in
+vectorized, replaced rows have their old contribution subtracted and the
+new one added, and only removals (or a journal gap) rebuild from scratch.
+The view itself reads a snapshot whose size depends on ``WORST_N`` and
+the number of distinct issues, not on the number of pages.
+
+Worst pages are kept in a bounded max-heap per dimension (root: the best
+of the worst). A replaced page's old entry is left in place and skipped
+as stale when it surfaces (lazy deletion); only when a page drops out of
+the worst N and nothing already seen can take its place is that
+dimension re-selected from the rollup's copy of the scores.
+"""
+import heapq
+from array import array
+
+import numpy as np
+
+from pentrust.analysis import SCORE_NAMES
+from pentrust.store import N_ISSUES, N_SCORES, NO_ISSUE
+from pentrust.table import RISK_LEVELS, RISK_THRESHOLDS
+
+WORST_N = 10
+# Histogram bins over the 0–100 score range; 100 falls in the last one.
+HISTOGRAM_BIN = 10
+N_BINS = 100 // HISTOGRAM_BIN
+
+
+def _risk_codes(scores):
+    """Index into RISK_LEVELS per row of an (N, N_SCORES) score matrix."""
+    lowest = scores.min(axis=1)
+    # High < Medium < Low as the lowest score crosses each threshold
+    return (lowest >= RISK_THRESHOLDS[0]).astype(np.intp) + (lowest >= RISK_THRESHOLDS[1])
+
+
+class _WorstPages:
+    """The ``n`` lowest (score, row) keys of one dimension, with lazy deletion."""
+
+    def __init__(self, n):
+        self.n = n
+        self.heap = []  # (-score, -row, stamp): root is the highest key kept
+        self.members = {}  # row -> stamp of its live entry
+        self.stale = 0
+        self.rows = 0  # rows seen, members or not
+        self.complete = True  # False: a member left and its successor is unknown
+
+    def root(self):
+        """(score, row) of the highest live key, or None if empty."""
+        while self.heap and self.members.get(-self.heap[0][1]) != self.heap[0][2]:
+            heapq.heappop(self.heap)
+            self.stale -= 1
+        if not self.heap:
+            return None
+        score, row, _ = self.heap[0]
+        return -score, -row
+
+    def add(self, score, row):
+        self.rows += 1
+        self._offer(score, row, 0)
+
+    def update(self, score, row, stamp):
+        """``row`` was rewritten with ``score``; its old entry goes stale."""
+        if self.members.pop(row, None) is None:
+            self._offer(score, row, stamp)
+            return
+        self.stale += 1
+        if len(self.members) + 1 == self.rows or self._below_root(score, row):
+            self._push(score, row, stamp)
+        else:
+            # Some page outside the heap may now belong in the worst n.
+            self.complete = False
+
+    def _offer(self, score, row, stamp):
+        if len(self.members) < self.n:
+            # Not full: every row is a member, unless one left (then the
+            # next read selects again anyway).
+            if self.complete:
+                self._push(score, row, stamp)
+        elif self._below_root(score, row):
+            # root() just dropped any stale entries, so this evicts a live one
+            _, evicted, _ = heapq.heappushpop(self.heap, (-score, -row, stamp))
+            del self.members[-evicted]
+            self.members[row] = stamp
+
+    def compact(self):
+        if self.stale > self.n:
+            self.heap = [entry for entry in self.heap if self.members.get(-entry[1]) == entry[2]]
+            heapq.heapify(self.heap)
+            self.stale = 0
+
+    def reset(self, keys, stamps):
+        """Refill from (score, row) arrays covering every row."""
+        self.heap, self.members, self.stale, self.complete = [], {}, 0, True
+        self.rows = len(keys[0])
+        if len(keys[0]) > self.n:
+            pick = np.argpartition((keys[0].astype(np.int64) << 32) | keys[1], self.n - 1)[:self.n]
+        else:
+            pick = np.arange(len(keys[0]))
+        for score, row in zip(keys[0][pick].tolist(), keys[1][pick].tolist()):
+            self._push(score, row, stamps[row])
+
+    def ranked(self):
+        """Live (score, row) pairs, worst first."""
+        return sorted((-score, -row) for score, row, stamp in self.heap if self.members.get(-row) == stamp)
+
+    def _below_root(self, score, row):
+        root = self.root()
+        return root is not None and (score, row) < root
+
+    def _push(self, score, row, stamp):
+        heapq.heappush(self.heap, (-score, -row, stamp))
+        self.members[row] = stamp
+
+
+class PortfolioRollup:
+    """Aggregates over one ``AnalysisStore``, kept in sync incrementally.
+
+    ``summary(store)`` returns the cached snapshot while the store's content
+    fingerprint is unchanged; otherwise it folds in only the rows written
+    since the last call.
+    """
+
+    def __init__(self, worst_n=WORST_N):
+        self.worst_n = worst_n
+        self._store_id = None
+        self._version = None
+        self._fingerprint = None
+        self._summary = None
+        self._reset()
+
+    def _reset(self):
+        # The rollup's own copy of each row, so a replaced row's old
+        # contribution can be taken back out.
+        self._scores = array("B")
+        self._issues = array("B")
+        self._stamps = array("L")  # per row, bumped on every rewrite
+        self._risk = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        self._issue_counts = np.zeros(0, dtype=np.int64)
+        self._histograms = np.zeros((N_SCORES, 256), dtype=np.int64)
+        self._sums = np.zeros(N_SCORES, dtype=np.int64)
+        self._worst = [_WorstPages(self.worst_n) for _ in SCORE_NAMES]
+
+    def summary(self, store):
+        if (
+            self._summary is not None
+            and self._store_id == store.uid
+            and self._fingerprint == (store.fingerprint, len(store))
+        ):
+            return self._summary
+
+        changes = None
+        if self._summary is not None and self._store_id == store.uid:
+            changes = store.changes_since(self._version)
+        if changes is None:
+            self._reset()
+            self._add(store, 0)
+        elif changes:
+            self._apply(store, changes)
+
+        self._store_id = store.uid
+        self._version = store.version
+        self._fingerprint = (store.fingerprint, len(store))
+        self._summary = self._snapshot(store)
+        return self._summary
+
+    # -- Folding rows in -------------------------------------------------------
+
+    def _apply(self, store, changes):
+        known = len(self._stamps)
+        updated = sorted(row for row in (store.row_of(p) for p in changes if p in store) if row < known)
+        if updated:
+            scores = store.column("scores")[updated].copy()
+            issues = store.column("issues")[updated].copy()
+            for row, row_scores, row_issues in zip(updated, scores.tolist(), issues.tolist()):
+                self._replace(row, row_scores, row_issues)
+        if len(store) > known:
+            self._add(store, known)
+        for worst in self._worst:
+            worst.compact()
+
+    def _add(self, store, start):
+        """Fold in rows [start, len(store)), vectorized."""
+        scores = store.column("scores")[start:].copy()
+        issues = store.column("issues")[start:].copy()
+        if not len(scores):
+            return
+        self._scores.frombytes(scores.tobytes())
+        self._issues.frombytes(issues.tobytes())
+        self._stamps.extend([0] * len(scores))
+
+        self._risk += np.bincount(_risk_codes(scores), minlength=len(RISK_LEVELS))
+        codes = issues[issues != NO_ISSUE]
+        self._count_issues(np.bincount(codes, minlength=len(store.issue_table)))
+        for dim in range(N_SCORES):
+            self._histograms[dim] += np.bincount(scores[:, dim], minlength=256)
+        self._sums += scores.sum(axis=0, dtype=np.int64)
+
+        rows = np.arange(start, start + len(scores), dtype=np.int64)
+        for dim, worst in enumerate(self._worst):
+            column = scores[:, dim]
+            # Only the chunk's own worst n can make the portfolio's worst n.
+            if len(column) > worst.n:
+                pick = np.argpartition((column.astype(np.int64) << 32) | rows, worst.n - 1)[:worst.n]
+                column, chunk_rows = column[pick], rows[pick]
+            else:
+                chunk_rows = rows
+            worst.rows += len(rows) - len(chunk_rows)
+            for score, row in zip(column.tolist(), chunk_rows.tolist()):
+                worst.add(score, row)
+
+    def _replace(self, row, scores, issues):
+        s = row * N_SCORES
+        i = row * N_ISSUES
+        old_scores = self._scores[s:s + N_SCORES]
+        old_issues = self._issues[i:i + N_ISSUES]
+        if list(old_scores) == scores and list(old_issues) == issues:
+            return
+        both = np.array([old_scores, scores], dtype=np.uint8)
+        old_risk, new_risk = _risk_codes(both).tolist()
+        self._risk[old_risk] -= 1
+        self._risk[new_risk] += 1
+        for code in old_issues:
+            if code != NO_ISSUE:
+                self._issue_counts[code] -= 1
+        for code in issues:
+            if code != NO_ISSUE:
+                self._count_issues(np.bincount([code]))
+        for dim in range(N_SCORES):
+            self._histograms[dim, old_scores[dim]] -= 1
+            self._histograms[dim, scores[dim]] += 1
+        self._sums += both[1].astype(np.int64) - both[0]
+
+        self._scores[s:s + N_SCORES] = array("B", scores)
+        self._issues[i:i + N_ISSUES] = array("B", issues)
+        stamp = self._stamps[row] = self._stamps[row] + 1
+        for dim, worst in enumerate(self._worst):
+            worst.update(scores[dim], row, stamp)
+
+    def _count_issues(self, counts):
+        if len(counts) > len(self._issue_counts):
+            self._issue_counts = np.pad(self._issue_counts, (0, len(counts) - len(self._issue_counts)))
+        self._issue_counts[:len(counts)] += counts
+
+    # -- Reading ---------------------------------------------------------------
+
+    def _worst_rows(self, dim):
+        worst = self._worst[dim]
+        if not worst.complete:
+            # A member was replaced by a better score and its successor is
+            # somewhere among the other rows: select again.
+            scores = np.frombuffer(self._scores, dtype=np.uint8).reshape(-1, N_SCORES)[:, dim]
+            worst.reset((scores, np.arange(len(scores), dtype=np.int64)), self._stamps)
+        return worst.ranked()
+
+    def _snapshot(self, store):
+        n = len(self._stamps)
+        issues = sorted(
+            ((store.issue_table[code][0], count) for code, count in enumerate(self._issue_counts.tolist()) if count),
+            key=lambda item: -item[1]
+        )
+        histograms = self._histograms[:, :101].copy()
+        histograms[:, 99] += histograms[:, 100]  # 100 joins the 90–100 bin
+        binned = histograms[:, :100].reshape(N_SCORES, N_BINS, HISTOGRAM_BIN).sum(axis=2)
+        return {
+            "pages": n,
+            "risk": dict(zip(RISK_LEVELS, self._risk.tolist())),
+            "issues": issues,
+            "means": {name: (total / n if n else 0.0) for name, total in zip(SCORE_NAMES, self._sums.tolist())},
+            "histograms": {
+                "bins": [f"{lo}–{lo + HISTOGRAM_BIN - 1 if lo + HISTOGRAM_BIN < 100 else 100}"
+                         for lo in range(0, 100, HISTOGRAM_BIN)],
+                **{name: binned[dim].tolist() for dim, name in enumerate(SCORE_NAMES)},
+            },
+            "worst": {
+                name: [(store.pages[row], score) for score, row in self._worst_rows(dim)]
+                for dim, name in enumerate(SCORE_NAMES)
+            },
+        }
@@ -0,0 +1,458 @@
+"""Standalone analysis service, so several app replicas share one engine.
+
+    python -m pentrust.service --listen http://127.0.0.1:8765
+    python -m pentrust.service --listen unix:/run/pentrust/analysis.sock
+
+Point each Streamlit replica (or the CLI, ``--service``) at it with
+``PENTRUST_SERVICE_URL`` and they all use the service's analysis cache
+instead of each computing and caching the same pages. The service alone
+writes the disk cache (``PENTRUST_CACHE_PATH``); a replica keeps only a
+memory LRU of pages it has already asked for, so reruns don't go over
+the wire. Standard library only.
+
+The protocol is JSON over HTTP/1.1 with keep-alive:
+
+* ``POST /analyze`` ``{"analyzer": "mock", "pages": [...]}`` returns the
+  analyzer ``version``, an ``issues`` table and one ``[scores, issue
+  codes, trend]`` triple per page, in order (compact, and rebuilt into
+  ``mock_analysis_for_url`` dicts by the client);
+* ``POST /table`` takes the same body and returns ``columns`` and ``rows``
+  of ``build_detailed_table`` for those pages;
+* ``GET /health`` lists the analyzers with their versions, plus cache and
+  request counters.
+
+A page that misses the cache while another request is already analyzing
+it waits for that result instead of computing it again, so a burst of
+replicas opening the same audit costs one analysis per page.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import Future
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from pentrust.analysis import SCORE_NAMES, page_digest
+from pentrust.analyzers import ANALYZERS, Analyzer, get_analyzer
+from pentrust.cache import AnalysisCache, ResultStore
+from pentrust.config import (
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+    SERVICE_URL,
+)
+from pentrust.table import TABLE_COLUMNS, build_table_row
+
+DEFAULT_SERVICE_URL = "http://127.0.0.1:8765"
+# Pages per request sent by the client, and the most the server accepts.
+SERVICE_BATCH_SIZE = 2_000
+MAX_BATCH_PAGES = 50_000
+MAX_REQUEST_BYTES = 64 * 2**20
+SERVICE_TIMEOUT_SECONDS = 120.0
+POOL_SIZE = 8  # idle keep-alive connections kept per client
+LISTEN_BACKLOG = 128
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class ServiceError(Exception):
+    """The analysis service could not be reached or refused a request."""
+
+
+def parse_service_url(url):
+    """("unix", path, None) or ("http", host, port) for a service URL."""
+    if url.startswith("unix:"):
+        path = url[len("unix:"):]
+        path = path[2:] if path.startswith("//") else path
+        if not path:
+            raise ValueError(f"no socket path in {url!r}")
+        return "unix", path, None
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    if parts.scheme != "http" or not parts.hostname:
+        raise ValueError(f"unsupported service URL {url!r}; use http://host:port or unix:/path")
+    return "http", parts.hostname, parts.port or 80
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class AnalysisEngine:
+    """One cache per analyzer (sharing a memory budget) with in-flight
+    requests for the same page coalesced."""
+
+    def __init__(self, cache_path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES,
+                 ttl_seconds=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self._memory = ResultStore(max_entries, ttl_seconds, max_bytes)
+        self._cache_path = cache_path or None
+        self._caches = {}  # analyzer name -> AnalysisCache
+        self._inflight = {}  # (version, digest) -> Future of the analysis
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.pages = 0
+        self.analyzed = 0  # cache misses this engine computed itself
+        self.coalesced = 0  # cache misses that waited for another request's result
+
+    def cache(self, name):
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                analyzer = get_analyzer(name)
+                cache = self._caches[name] = AnalysisCache(
+                    self._cache_path, version=analyzer.version, memory=self._memory,
+                    analyze_many=partial(self._analyze_coalesced, analyzer),
+                )
+            return cache
+
+    def analyze(self, name, pages):
+        cache = self.cache(name)
+        with self._lock:
+            self.requests += 1
+            self.pages += len(pages)
+        return cache.get_or_compute_many(pages)
+
+    def _analyze_coalesced(self, analyzer, pages):
+        """Analyze cache misses; pages another request is already analyzing
+        are waited for rather than recomputed."""
+        keys = [(analyzer.version, page_digest(page)) for page in pages]
+        futures = {}
+        mine = {}  # key -> page this call computes
+        with self._lock:
+            for page, key in zip(pages, keys):
+                if key in futures:
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    mine[key] = page
+                else:
+                    self.coalesced += 1
+                futures[key] = future
+            self.analyzed += len(mine)
+        try:
+            results = analyzer.analyze_many(list(mine.values())) if mine else []
+        except BaseException as exc:
+            self._settle(mine, exc=exc)
+            raise
+        computed = dict(zip(mine, results))
+        # Cache before releasing the keys, so a request arriving in between
+        # finds the result instead of computing it again.
+        self._memory.put_many(((digest, version), a) for (version, digest), a in computed.items())
+        self._settle(mine, computed)
+        return [futures[key].result() for key in keys]
+
+    def _settle(self, keys, results=None, exc=None):
+        with self._lock:
+            for key in keys:
+                future = self._inflight.pop(key)
+                if exc is None:
+                    future.set_result(results[key])
+                else:
+                    future.set_exception(exc)
+
+    def stats(self):
+        with self._lock:
+            caches = dict(self._caches)
+            counters = {"requests": self.requests, "pages": self.pages, "analyzed": self.analyzed,
+                        "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+        return {**counters, "cache": {name: cache.stats() for name, cache in caches.items()}}
+
+
+def encode_analyses(version, analyses):
+    """Compact JSON-able form of analyses: an issue table plus per-page
+    [scores, issue codes, trend] triples."""
+    issues, codes = [], {}
+    rows = []
+    for analysis in analyses:
+        row_codes = []
+        for issue in analysis["top_issues"]:
+            issue = tuple(issue)
+            code = codes.get(issue)
+            if code is None:
+                code = codes[issue] = len(issues)
+                issues.append(issue)
+            row_codes.append(code)
+        rows.append([[analysis["scores"][name] for name in SCORE_NAMES], row_codes, analysis["trend"]])
+    return {"version": version, "issues": issues, "results": rows}
+
+
+def decode_analyses(payload):
+    issues = [tuple(issue) for issue in payload["issues"]]
+    return [
+        {
+            "scores": dict(zip(SCORE_NAMES, scores)),
+            "top_issues": [issues[code] for code in codes],
+            "trend": trend,
+        }
+        for scores, codes, trend in payload["results"]
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server_version = "PenTrust/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            engine = self.server.engine
+            self._reply(200, {
+                "status": "ok",
+                "analyzers": {name: analyzer.version for name, analyzer in ANALYZERS.items()},
+                **engine.stats(),
+            })
+        else:
+            self._reply(404, {"error": f"no such endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ("/analyze", "/table"):
+            self._reply(404, {"error": f"no such endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True  # the body's extent is unknown
+            self._reply(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True  # the body is left unread
+            self._reply(413, {"error": f"request body over {MAX_REQUEST_BYTES} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+            name = body.get("analyzer", "mock")
+            pages = body["pages"]
+            if not isinstance(pages, list) or not all(isinstance(p, str) for p in pages):
+                raise ValueError("'pages' must be a list of strings")
+            if len(pages) > MAX_BATCH_PAGES:
+                raise ValueError(f"at most {MAX_BATCH_PAGES} pages per request")
+            analyzer = get_analyzer(name)
+        except (ValueError, KeyError, AttributeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        try:
+            analyses = self.server.engine.analyze(name, pages)
+        except Exception as exc:  # reported to the client; the server carries on
+            self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        if self.path == "/analyze":
+            self._reply(200, encode_analyses(analyzer.version, analyses))
+        else:
+            rows = [build_table_row(page, analysis) for page, analysis in zip(pages, analyses)]
+            self._reply(200, {"columns": TABLE_COLUMNS, "rows": [[row[c] for c in TABLE_COLUMNS] for row in rows]})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # Room for every replica's pool to connect at once.
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def make_server(url, engine=None, verbose=False):
+    """HTTP server for ``url`` (http://host:port or unix:/path), not yet serving."""
+    kind, host, port = parse_service_url(url)
+    if kind == "unix":
+        if os.path.exists(host):
+            os.unlink(host)  # stale socket from a previous run
+        server = _UnixHTTPServer(host, _Handler)
+    else:
+        server = _HTTPServer((host, port), _Handler)
+    server.engine = engine or AnalysisEngine()
+    server.verbose = verbose
+    return server
+
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pentrust.service",
+        description="Run the PenTrust analysis service shared by app replicas.",
+    )
+    parser.add_argument("--listen", default=SERVICE_URL or DEFAULT_SERVICE_URL,
+                        help="http://host:port or unix:/path/to.sock (default: %(default)s)")
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="SQLite analysis cache path (default: %(default)s; '' for memory only)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    kind, host, _ = parse_service_url(args.listen)
+    if kind == "http" and host not in LOOPBACK_HOSTS:
+        print(f"pentrust.service: warning: listening on {host}, which is not loopback; "
+              "the service has no authentication", file=sys.stderr)
+    server = make_server(args.listen, AnalysisEngine(args.cache), args.verbose)
+    print(f"pentrust.service: listening on {args.listen}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if kind == "unix" and os.path.exists(host):
+            os.unlink(host)
+    return 0
+
+
+# -----------------------------
+# Client
+# -----------------------------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class ServiceClient:
+    """Thread-safe client with a pool of keep-alive connections.
+
+    Requests are split into ``batch_size`` pages. A pooled connection the
+    server has meanwhile closed is retried once on a fresh one (requests
+    are idempotent).
+    """
+
+    def __init__(self, url, timeout=SERVICE_TIMEOUT_SECONDS, pool_size=POOL_SIZE, batch_size=SERVICE_BATCH_SIZE):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._kind, self._host, self._port = parse_service_url(url)
+        self._idle = queue.LifoQueue(pool_size)
+        self._stats_lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests = 0
+
+    def _connect(self):
+        with self._stats_lock:
+            self.connections_opened += 1
+        if self._kind == "unix":
+            return _UnixHTTPConnection(self._host, self.timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            try:
+                conn, pooled = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, pooled = self._connect(), False
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                if pooled and attempt == 0:
+                    continue  # went stale while idle
+                raise ServiceError(f"analysis service at {self.url}: {exc}") from None
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                raise ServiceError(f"analysis service at {self.url}: {exc}") from None
+            if response.will_close:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            with self._stats_lock:
+                self.requests += 1
+            return self._decode(response.status, data)
+
+    def _decode(self, status, data):
+        try:
+            result = json.loads(data)
+        except ValueError:
+            # Not the service's JSON: a proxy's error page, say.
+            result = None
+        if status != 200:
+            if isinstance(result, dict) and "error" in result:
+                detail = result["error"]
+            else:
+                detail = data[:200].decode("utf-8", errors="replace").strip()
+            raise ServiceError(f"analysis service at {self.url}: HTTP {status}: {detail}")
+        if not isinstance(result, dict):
+            raise ServiceError(f"analysis service at {self.url}: response is not a JSON object")
+        return result
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def analyze_many(self, pages, analyzer="mock", version=None):
+        """Analyses of ``pages`` from the service, in order. With ``version``,
+        a service running a different analyzer version is an error."""
+        analyses = []
+        for start in range(0, len(pages), self.batch_size):
+            payload = self._request("POST", "/analyze", {"analyzer": analyzer, "pages": pages[start:start + self.batch_size]})
+            if version is not None and payload["version"] != version:
+                raise ServiceError(
+                    f"analysis service now runs {analyzer} {payload['version']}, expected {version}; restart the app"
+                )
+            analyses.extend(decode_analyses(payload))
+        return analyses
+
+    def build_detailed_table(self, pages, analyzer="mock"):
+        """``build_detailed_table`` for ``pages``, computed by the service."""
+        rows = []
+        for start in range(0, len(pages), self.batch_size):
+            payload = self._request("POST", "/table", {"analyzer": analyzer, "pages": pages[start:start + self.batch_size]})
+            rows.extend(payload["rows"])
+        return pd.DataFrame(rows, columns=TABLE_COLUMNS)
+
+    def stats(self):
+        with self._stats_lock:
+            return {"requests": self.requests, "connections_opened": self.connections_opened}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def remote_analyzer(client, name):
+    """An ``Analyzer`` that runs backend ``name`` on the service behind ``client``."""
+    versions = client.health()["analyzers"]
+    if name not in versions:
+        raise ValueError(f"analysis service has no analyzer {name!r}; it offers {', '.join(versions)}")
+    local = ANALYZERS.get(name)
+    return Analyzer(
+        name, versions[name], partial(client.analyze_many, analyzer=name, version=versions[name]),
+        f"{local.description if local else name} Runs on the analysis service."
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
@@ -0,0 +1,245 @@
+"""Compact per-session storage for analyses.
+
+``AnalysisStore`` keeps scores, issue codes and trend points in flat
+one-byte ``array`` columns instead of a nested dict per page. Issues are
+stored as codes into an interned issue table, so the description strings
+exist once per store rather than once per page. It is still a mapping of
+page -> analysis dict, built on access, for the Dashboard and Deep Analysis
+pages.
+
+Every change bumps ``version``, is recorded in a short journal and is folded
+into an order-independent content ``fingerprint`` (XOR of per-row hashes), so
+derived views such as the audit table can update incrementally.
+"""
+from array import array
+from collections.abc import MutableMapping
+from itertools import count
+
+import numpy as np
+
+from pentrust.analysis import ISSUE_POOL, MASK64, SCORE_NAMES, TREND_POINTS, mix64
+from pentrust.batch import mix64_array
+
+N_SCORES = len(SCORE_NAMES)
+N_ISSUES = 2
+NO_ISSUE = 255  # pads rows with fewer than N_ISSUES issues
+ROW_BYTES = N_SCORES + N_ISSUES + TREND_POINTS
+# Oldest journal entries are dropped past this; views then rebuild in full.
+JOURNAL_LIMIT = 256
+
+_store_ids = count()
+
+
+class AnalysisStore(MutableMapping):
+    """Mapping of page -> analysis backed by row-aligned byte columns."""
+
+    def __init__(self, items=(), aliases=None):
+        # Tells stores apart even when one is garbage collected and another
+        # takes its id().
+        self.uid = next(_store_ids)
+        self.pages = []
+        self._rows = {}  # page -> row number
+        # page -> other spellings collapsed into it (see pentrust.urls);
+        # display-only, so not part of the fingerprint.
+        self.aliases = dict(aliases or {})
+        self.scores = array("B")  # N_SCORES per row, SCORE_NAMES order
+        self.issues = array("B")  # N_ISSUES codes per row into issue_table
+        self.trend = array("B")  # TREND_POINTS per row
+        self.issue_table = list(ISSUE_POOL)
+        self._issue_codes = {issue: code for code, issue in enumerate(self.issue_table)}
+        # Bumped on every change; lets derived views tell when to refresh.
+        self.version = 0
+        self.fingerprint = 0
+        # (version, pages written) per change; pages is None for removals.
+        self._journal = []
+        self._journal_floor = 0
+        self.update(items)
+
+    # -- Mapping interface -------------------------------------------------
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __contains__(self, page):
+        return page in self._rows
+
+    def __getitem__(self, page):
+        return self.analysis_at(self._rows[page])
+
+    def __setitem__(self, page, analysis):
+        self._set(page, analysis)
+        self._log([page])
+
+    def __delitem__(self, page):
+        self.remove_many([page])
+
+    # -- Bulk operations ---------------------------------------------------
+
+    def update(self, items=(), **kwargs):
+        """Like ``dict.update``, recorded as a single journal entry."""
+        if hasattr(items, "items"):
+            items = items.items()
+        written = []
+        for page, analysis in [*items, *kwargs.items()]:
+            self._set(page, analysis)
+            written.append(page)
+        if written:
+            self._log(written)
+
+    def extend_batch(self, batch):
+        """Add or replace every row of a ``batch.BatchResult`` at once."""
+        if not len(batch):
+            return
+        if any(p in self._rows for p in batch.pages) or len(set(batch.pages)) != len(batch.pages):
+            for i, page in enumerate(batch.pages):
+                self._write(page, batch.scores[i].tolist(), batch.issues[i].tolist(), batch.trend[i].tolist())
+            self._log(list(batch.pages))
+            return
+        # Batch codes index ISSUE_POOL, which is the head of issue_table.
+        start = len(self.pages)
+        self.pages.extend(batch.pages)
+        self._rows.update(zip(batch.pages, range(start, start + len(batch.pages))))
+        self.scores.frombytes(batch.scores.astype("uint8").tobytes())
+        self.issues.frombytes(batch.issues.astype("uint8").tobytes())
+        self.trend.frombytes(batch.trend.astype("uint8").tobytes())
+        self.fingerprint ^= self._rows_hash(start, len(self.pages))
+        self._log(list(batch.pages))
+
+    def remove_many(self, pages):
+        """Drop pages, keeping the remaining rows in their original order."""
+        doomed = {self._rows[p] for p in pages}
+        if not doomed:
+            return
+        for row in doomed:
+            self.fingerprint ^= self._row_hash(row)
+        keep = [row for row in range(len(self.pages)) if row not in doomed]
+        self.pages = [self.pages[row] for row in keep]
+        self._rows = {page: row for row, page in enumerate(self.pages)}
+        self.scores = _take(self.scores, keep, N_SCORES)
+        self.issues = _take(self.issues, keep, N_ISSUES)
+        self.trend = _take(self.trend, keep, TREND_POINTS)
+        self._log(None)
+
+    def clear(self):
+        version = self.version
+        self.__init__()
+        self.version = version
+        self._journal_floor = version
+        self._log(None)
+
+    # -- Change tracking -----------------------------------------------------
+
+    def changes_since(self, version):
+        """Pages written after ``version``, or None if that cannot be told
+        (rows were removed, or the journal no longer reaches back that far)."""
+        if version < self._journal_floor:
+            return None
+        written = set()
+        for entry_version, pages in reversed(self._journal):
+            if entry_version <= version:
+                break
+            if pages is None:
+                return None
+            written.update(pages)
+        return written
+
+    def _log(self, pages):
+        self.version += 1
+        self._journal.append((self.version, pages))
+        if len(self._journal) > JOURNAL_LIMIT:
+            dropped, _ = self._journal.pop(0)
+            self._journal_floor = dropped
+
+    # -- Row access ----------------------------------------------------------
+
+    def row_of(self, page):
+        return self._rows[page]
+
+    def column(self, name):
+        """Zero-copy (N, width) uint8 NumPy view of "scores", "issues" or "trend".
+
+        Don't keep the view around: the underlying array can't grow while
+        it is exported. Copy whatever needs to outlive the call.
+        """
+        data = getattr(self, name)
+        width = {"scores": N_SCORES, "issues": N_ISSUES, "trend": TREND_POINTS}[name]
+        return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+    def analysis_at(self, row):
+        """Row ``row`` in the dict shape returned by ``mock_analysis_for_url``."""
+        s = row * N_SCORES
+        i = row * N_ISSUES
+        t = row * TREND_POINTS
+        return {
+            "scores": dict(zip(SCORE_NAMES, self.scores[s:s + N_SCORES])),
+            "top_issues": [self.issue_table[c] for c in self.issues[i:i + N_ISSUES] if c != NO_ISSUE],
+            "trend": self.trend[t:t + TREND_POINTS].tolist(),
+        }
+
+    def issue_code(self, issue):
+        issue = tuple(issue)
+        code = self._issue_codes.get(issue)
+        if code is None:
+            code = len(self.issue_table)
+            self.issue_table.append(issue)
+            self._issue_codes[issue] = code
+        return code
+
+    def nbytes(self):
+        """Approximate bytes held by the columns and index (page strings excluded)."""
+        columns = sum(a.buffer_info()[1] * a.itemsize for a in (self.scores, self.issues, self.trend))
+        # list slot + dict entry per page
+        return columns + len(self.pages) * (8 + 3 * 8)
+
+    def _set(self, page, analysis):
+        scores = [analysis["scores"][name] for name in SCORE_NAMES]
+        codes = [self.issue_code(issue) for issue in analysis["top_issues"][:N_ISSUES]]
+        codes += [NO_ISSUE] * (N_ISSUES - len(codes))
+        self._write(page, scores, codes, analysis["trend"])
+
+    def _write(self, page, scores, codes, trend):
+        row = self._rows.get(page)
+        if row is None:
+            row = self._rows[page] = len(self.pages)
+            self.pages.append(page)
+            self.scores.extend(scores)
+            self.issues.extend(codes)
+            self.trend.extend(trend)
+        else:
+            self.fingerprint ^= self._row_hash(row)
+            self.scores[row * N_SCORES:(row + 1) * N_SCORES] = array("B", scores)
+            self.issues[row * N_ISSUES:(row + 1) * N_ISSUES] = array("B", codes)
+            self.trend[row * TREND_POINTS:(row + 1) * TREND_POINTS] = array("B", trend)
+        self.fingerprint ^= self._row_hash(row)
+
+    def _row_hash(self, row):
+        packed = (
+            self.scores[row * N_SCORES:(row + 1) * N_SCORES].tobytes()
+            + self.issues[row * N_ISSUES:(row + 1) * N_ISSUES].tobytes()
+            + self.trend[row * TREND_POINTS:(row + 1) * TREND_POINTS].tobytes()
+            + bytes(16 - ROW_BYTES)
+        )
+        lo = int.from_bytes(packed[:8], "little")
+        hi = int.from_bytes(packed[8:], "little")
+        return mix64(mix64((hash(self.pages[row]) & MASK64) ^ lo) ^ hi)
+
+    def _rows_hash(self, start, stop):
+        """XOR of ``_row_hash`` over rows [start, stop), vectorized."""
+        packed = np.zeros((stop - start, 16), dtype=np.uint8)
+        packed[:, :N_SCORES] = self.column("scores")[start:stop]
+        packed[:, N_SCORES:N_SCORES + N_ISSUES] = self.column("issues")[start:stop]
+        packed[:, N_SCORES + N_ISSUES:ROW_BYTES] = self.column("trend")[start:stop]
+        words = packed.view("<u8")
+        page_hashes = np.fromiter((hash(p) for p in self.pages[start:stop]), dtype=np.int64, count=stop - start)
+        h = mix64_array(mix64_array(page_hashes.view(np.uint64) ^ words[:, 0]) ^ words[:, 1])
+        return int(np.bitwise_xor.reduce(h)) if len(h) else 0
+
+
+def _take(column, rows, width):
+    out = array(column.typecode)
+    for row in rows:
+        out.extend(column[row * width:(row + 1) * width])
+    return out
@@ -0,0 +1,210 @@
+"""The detailed audit table shown on both pages."""
+import numpy as np
+import pandas as pd
+
+from pentrust.store import NO_ISSUE
+
+TABLE_COLUMNS = [
+    "Page / label", "Clarity score", "Next-step score", "Trust score",
+    "Accessibility-aware score", "Top risk signals", "Risk level", "Aliases"
+]
+SCORE_COLUMNS = TABLE_COLUMNS[1:5]  # SCORE_NAMES order
+
+# Simple risk label for presentation clarity
+RISK_LEVELS = ("High", "Medium", "Low")
+RISK_THRESHOLDS = (55, 65)
+
+
+def risk_level(scores):
+    lowest = min(scores.values())
+    return "High" if lowest < RISK_THRESHOLDS[0] else ("Medium" if lowest < RISK_THRESHOLDS[1] else "Low")
+
+
+def risk_levels(scores):
+    """Vectorized ``risk_level`` over an (N, 4) score matrix."""
+    lowest = scores.min(axis=1)
+    return np.select(
+        [lowest < RISK_THRESHOLDS[0], lowest < RISK_THRESHOLDS[1]],
+        RISK_LEVELS[:2],
+        RISK_LEVELS[2]
+    ).astype(object)
+
+
+def build_table_row(url, analysis, aliases=()):
+    s = analysis["scores"]
+    return {
+        "Page / label": url,
+        "Clarity score": s["Clarity"],
+        "Next-step score": s["Next-step guidance"],
+        "Trust score": s["Trust signals"],
+        "Accessibility-aware score": s["Accessibility-aware writing"],
+        "Top risk signals": ", ".join([i[0] for i in analysis["top_issues"]]),
+        "Risk level": risk_level(s),
+        "Aliases": ", ".join(aliases)
+    }
+
+
+def build_detailed_table(analyses: dict):
+    rows = [build_table_row(url, a) for url, a in analyses.items()]
+    if not rows:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    return pd.DataFrame(rows)
+
+
+def frame_from_store(store, rows=None):
+    """Audit table rows for an ``AnalysisStore``, computed column-wise.
+
+    ``rows`` selects store rows (all by default), in store order.
+    """
+    scores = store.column("scores")
+    codes = store.column("issues")
+    if rows is not None:
+        scores, codes = scores[rows], codes[rows]
+        pages = [store.pages[r] for r in rows]
+    else:
+        scores, codes = scores.copy(), codes.copy()
+        pages = list(store.pages)
+    return table_frame(pages, scores, codes, store.issue_table, store.aliases)
+
+
+def table_frame(pages, scores, codes, issue_table, aliases):
+    """Audit table rows from (N, 4) scores and (N, 2) issue codes."""
+    # One "Top risk signals" label per issue code pair, looked up in bulk.
+    # The extra last slot stands for NO_ISSUE.
+    titles = [title for title, _ in issue_table] + [None]
+    labels = np.array([[", ".join(t for t in (a, b) if t) for b in titles] for a in titles], dtype=object)
+    slot = np.where(codes == NO_ISSUE, len(titles) - 1, codes)
+
+    # dtypes given so an empty store (e.g. every fetch failed) still has
+    # string columns, and rows appended to it later keep them.
+    frame = pd.DataFrame({"Page / label": pd.Series(pages, dtype=str)})
+    for i, column in enumerate(SCORE_COLUMNS):
+        frame[column] = scores[:, i].astype(np.int64)
+    frame["Top risk signals"] = pd.Series(labels[slot[:, 0], slot[:, 1]], dtype=str)
+    frame["Risk level"] = pd.Series(risk_levels(scores), dtype=str)
+    frame["Aliases"] = pd.Series([", ".join(aliases.get(p, ())) for p in pages], dtype=str)
+    return frame
+
+
+class AuditTable:
+    """Audit table for one ``AnalysisStore``, kept in sync incrementally.
+
+    ``frame(store)`` returns the cached DataFrame while the store's content
+    fingerprint is unchanged; otherwise it recomputes only the rows written
+    since the last call, appending new pages and patching updated ones. It
+    falls back to a full (vectorized) rebuild after removals or when the
+    store's journal no longer covers the gap.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._store_id = None
+        self._version = None
+        self._fingerprint = None
+        self._index = None
+        self._index_version = None
+
+    def frame(self, store):
+        if (
+            self._frame is not None
+            and self._store_id == store.uid
+            and self._fingerprint == (store.fingerprint, len(store))
+        ):
+            return self._frame
+
+        changes = None
+        if self._frame is not None and self._store_id == store.uid:
+            changes = store.changes_since(self._version)
+        if changes is None:
+            self._frame = frame_from_store(store)
+        elif changes:
+            self._apply(store, changes)
+
+        self._store_id = store.uid
+        self._version = store.version
+        self._fingerprint = (store.fingerprint, len(store))
+        return self._frame
+
+    def index(self, store):
+        """``TableIndex`` over the current frame, rebuilt only when it changes."""
+        frame = self.frame(store)
+        if self._index is None or self._index.frame is not frame or self._index_version != self._version:
+            self._index = TableIndex(frame, [title for title, _ in store.issue_table])
+            self._index_version = self._version
+        return self._index
+
+    def _apply(self, store, changes):
+        known = len(self._frame)
+        rows = sorted(store.row_of(p) for p in changes if p in store)
+        updated = [r for r in rows if r < known]
+        if updated:
+            patch = frame_from_store(store, updated)
+            patch.index = updated
+            self._frame.loc[updated, TABLE_COLUMNS] = patch
+        if len(store) > known:
+            added = frame_from_store(store, list(range(known, len(store))))
+            self._frame = pd.concat([self._frame, added], ignore_index=True)
+
+
+class TableIndex:
+    """Server-side lookup structures over one audit table snapshot.
+
+    Filtering by risk level or issue is answered from precomputed boolean
+    masks, page/label search runs over a cached lowercase column, and sorted
+    row orders are computed once per column and direction. ``query`` returns
+    only the requested page of rows plus the number of matches, so the
+    browser never receives the full table.
+    """
+
+    def __init__(self, frame, issue_titles):
+        self.frame = frame
+        n = len(frame)
+        risk = frame["Risk level"].to_numpy()
+        self.risk_masks = {level: risk == level for level in RISK_LEVELS}
+
+        # Few distinct label strings, so test each one instead of every row.
+        label_codes, labels = pd.factorize(frame["Top risk signals"])
+        self.issue_masks = {}
+        for title in issue_titles:
+            hits = [i for i, label in enumerate(labels) if title in label.split(", ")]
+            self.issue_masks[title] = np.isin(label_codes, hits) if hits else np.zeros(n, dtype=bool)
+
+        # Searching a page also finds it by any of its aliases.
+        self._search_column = (frame["Page / label"] + " " + frame["Aliases"]).str.lower()
+        self._orders = {}
+
+    def order(self, column, descending=False):
+        key = (column, descending)
+        if key not in self._orders:
+            values = self.frame[column]
+            if column == "Risk level":
+                # Severity order (Low < Medium < High), not alphabetical
+                values = pd.Categorical(values, categories=RISK_LEVELS[::-1]).codes
+            elif values.dtype.kind not in "iuf":
+                values = pd.factorize(values, sort=True)[0]
+            values = np.asarray(values, dtype=np.int64)
+            # Stable, so ties keep their original row order either way
+            self._orders[key] = np.argsort(-values if descending else values, kind="stable")
+        return self._orders[key]
+
+    def mask(self, risk_levels=None, issue=None, search=""):
+        mask = np.ones(len(self.frame), dtype=bool)
+        if risk_levels:
+            mask &= np.logical_or.reduce([self.risk_masks[level] for level in risk_levels])
+        if issue:
+            mask &= self.issue_masks.get(issue, np.zeros(len(self.frame), dtype=bool))
+        if search:
+            mask &= self._search_column.str.contains(search.lower(), regex=False).to_numpy(dtype=bool)
+        return mask
+
+    def query(self, sort_by=None, descending=False, risk_levels=None, issue=None, search="",
+              page=1, page_size=50):
+        """Return (rows for ``page``, number of matching rows)."""
+        mask = self.mask(risk_levels, issue, search)
+        if sort_by:
+            order = self.order(sort_by, descending)
+            positions = order[mask[order]]
+        else:
+            positions = np.flatnonzero(mask)
+        start = (max(1, page) - 1) * page_size
+        return self.frame.iloc[positions[start:start + page_size]], len(positions)
@@ -0,0 +1,292 @@
+"""Fast local analysis of page copy.
+
+Produces the same shape as ``mock_analysis_for_url`` (``scores``,
+``top_issues``, ``trend``) from real text: sentence and syllable
+tokenization for reading level, plus one pass of a word-level Aho-Corasick
+automaton that finds jargon, next-step cues, trust cues and vague claims
+together. The automaton is compiled once per process and reused.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from pentrust.analysis import ISSUE_POOL, SCORE_NAMES, TREND_POINTS
+from pentrust.jargon import HEALTHCARE_JARGON, NEXT_STEP_CUES, TRUST_CUES, VAGUE_CLAIMS
+
+TEXT_ANALYZER_VERSION = "text-1"
+
+# A sentence ends at terminal punctuation followed by space, or at a line
+# break (list items and headings count as their own "sentences").
+_SENTENCE_SPLIT = re.compile(r"[.!?]+\s+|\n+")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+_LIST_LINE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+# Words keep inner apostrophes and hyphens ("you'll", "follow-up"). The
+# token regex also yields sentence boundaries (terminal punctuation before
+# whitespace, line breaks) so one findall feeds the whole scoring loop.
+_WORD = re.compile(r"[a-z0-9]+(?:['’-][a-z0-9]+)*")
+_TOKEN = re.compile(r"[a-z0-9]+(?:['’-][a-z0-9]+)*|[.!?](?=\s|$)|\n")
+_BOUNDARIES = frozenset(".!?\n")
+
+LONG_SENTENCE_WORDS = 25
+
+
+# -----------------------------
+# Tokenization
+# -----------------------------
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def tokenize(text):
+    """Lowercase word tokens; hyphenated and contracted words stay whole."""
+    return _WORD.findall(text.lower())
+
+
+@lru_cache(maxsize=100_000)
+def count_syllables(word):
+    """Heuristic English syllable count (vowel groups, minus a silent e)."""
+    if word.isdigit():
+        return 1
+    count = len(_VOWEL_GROUPS.findall(word))
+    if count > 1 and word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+        count -= 1
+    return max(1, count)
+
+
+# -----------------------------
+# Multi-pattern matcher
+# -----------------------------
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    ``phrases`` maps a category name to an iterable of phrases. A scan walks
+    the token list once, whatever the number of phrases, and reports every
+    (possibly overlapping) occurrence with its category.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = []  # pattern id -> (category, phrase)
+        goto = [{}]
+        out = [()]
+        for category, entries in phrases.items():
+            for phrase in entries:
+                words = tokenize(phrase)
+                if not words:
+                    continue
+                node = 0
+                for w in words:
+                    nxt = goto[node].get(w)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][w] = nxt
+                        goto.append({})
+                        out.append(())
+                    node = nxt
+                out[node] += (len(self.phrases),)
+                self.phrases.append((category, phrase))
+
+        # Breadth-first failure links; outputs inherit their fallback's outputs.
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for w, child in goto[node].items():
+                f = fail[node]
+                while f and w not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(w, 0)
+                fail[child] = target if target != child else 0
+                out[child] += out[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        # Exposed so hot loops can step the automaton inline.
+        self.automaton = (goto, fail, out)
+        self.categories = [category for category, _ in self.phrases]
+
+    def iter_matches(self, words):
+        """Yield (end token index, pattern id). ``None`` tokens are boundaries."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, w in enumerate(words):
+            if w is None:
+                node = 0
+                continue
+            while node and w not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(w, 0)
+            if out[node]:
+                for pid in out[node]:
+                    yield i, pid
+
+    def category_counts(self, words):
+        counts = dict.fromkeys({c for c, _ in self.phrases}, 0)
+        for _, pid in self.iter_matches(words):
+            counts[self.phrases[pid][0]] += 1
+        return counts
+
+
+@lru_cache(maxsize=None)
+def default_matcher():
+    return PhraseMatcher({
+        "jargon": HEALTHCARE_JARGON,
+        "next_step": NEXT_STEP_CUES,
+        "trust": TRUST_CUES,
+        "vague": VAGUE_CLAIMS,
+    })
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def _clamp(value, low=0, high=100):
+    return int(round(max(low, min(high, value))))
+
+
+def reading_grade(words, sentences, syllables):
+    """Flesch-Kincaid grade level."""
+    if not words or not sentences:
+        return 0.0
+    return 0.39 * (words / sentences) + 11.8 * (syllables / words) - 15.59
+
+
+def _clarity(words, sentences, long_sentences, jargon):
+    if not words:
+        return 0
+    avg_len = words / sentences
+    return _clamp(
+        100
+        - max(0.0, avg_len - 15)
+        - 20 * (long_sentences / sentences)
+        - 120 * (jargon / words)
+    )
+
+
+def text_stats(text, matcher=None):
+    """Counts the scores are derived from, plus per-sentence (words, jargon).
+
+    Tokenizing, syllable counting and phrase matching are fused into a single
+    loop over the tokens; this is the analyzer's hot path.
+    """
+    matcher = matcher or default_matcher()
+    goto, fail, out = matcher.automaton
+    root = goto[0]
+    categories = matcher.categories
+    counts = dict.fromkeys(("jargon", "next_step", "trust", "vague"), 0)
+    per_sentence = []
+    long_sentences = 0
+    sentence_words = sentence_jargon = 0
+    node = 0
+
+    # List markers ("1.", "-") would otherwise read as one-word sentences.
+    text, list_lines = _LIST_LINE.subn("\n", text.lower())
+    tokens = _TOKEN.findall(text)
+    for token in tokens:
+        if token in _BOUNDARIES:
+            if sentence_words:
+                per_sentence.append((sentence_words, sentence_jargon))
+                long_sentences += sentence_words > LONG_SENTENCE_WORDS
+                sentence_words = sentence_jargon = 0
+            node = 0  # phrases never span sentences
+            continue
+        sentence_words += 1
+        if node:
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+        else:
+            node = root.get(token, 0)
+        if node:
+            for pid in out[node]:
+                category = categories[pid]
+                counts[category] += 1
+                if category == "jargon":
+                    sentence_jargon += 1
+    if sentence_words:
+        per_sentence.append((sentence_words, sentence_jargon))
+        long_sentences += sentence_words > LONG_SENTENCE_WORDS
+
+    # Syllables per distinct word: far fewer calls than per token.
+    vocabulary = Counter(tokens)
+    for boundary in _BOUNDARIES:
+        vocabulary.pop(boundary, None)
+    syllables = sum(count_syllables(w) * n for w, n in vocabulary.items())
+    words = sum(w for w, _ in per_sentence)
+
+    return {
+        "words": words,
+        "sentences": len(per_sentence),
+        "syllables": syllables,
+        "long_sentences": long_sentences,
+        "list_lines": list_lines,
+        "per_sentence": per_sentence,
+        **counts,
+    }
+
+
+def scores_from_stats(stats):
+    words, sentences = stats["words"], stats["sentences"]
+    if not words:
+        return dict.fromkeys(SCORE_NAMES, 0)
+    grade = reading_grade(words, sentences, stats["syllables"])
+    # Cue targets grow slowly with length: a long page needs a few more
+    # signposts than a short one, not proportionally more.
+    next_target = 3 + words / 60
+    trust_target = 2 + words / 100
+    structure_bonus = 5 if stats["list_lines"] else 0
+    return {
+        "Clarity": _clarity(words, sentences, stats["long_sentences"], stats["jargon"]),
+        "Next-step guidance": _clamp(40 + 45 * min(1.0, stats["next_step"] / next_target)),
+        "Trust signals": _clamp(45 + 45 * min(1.0, stats["trust"] / trust_target) - 5 * stats["vague"]),
+        "Accessibility-aware writing": _clamp(
+            100 - 3.5 * max(0.0, grade - 6) - 100 * stats["jargon"] / words + structure_bonus
+        ),
+    }
+
+
+def pick_issues(stats, scores):
+    """The two most severe issues, as (title, description) from ISSUE_POOL."""
+    grade = reading_grade(stats["words"], stats["sentences"], stats["syllables"])
+    severity = {
+        "Dense instructions": 100 - scores["Clarity"],
+        "Unclear next steps": 100 - scores["Next-step guidance"],
+        "Weak micro trust": 100 - scores["Trust signals"],
+        "Readability mismatch": min(100, 6 * max(0.0, grade - 6)),
+        "Accessibility gaps": 100 - scores["Accessibility-aware writing"],
+    }
+    ranked = sorted(ISSUE_POOL, key=lambda issue: -severity[issue[0]])
+    return ranked[:2]
+
+
+def section_trend(stats, overall):
+    """Clarity of TREND_POINTS consecutive sections of the page."""
+    per_sentence = stats["per_sentence"]
+    n = len(per_sentence)
+    trend = []
+    for k in range(TREND_POINTS):
+        section = per_sentence[k * n // TREND_POINTS:(k + 1) * n // TREND_POINTS]
+        if not section:
+            # Short page: repeat the previous section's value.
+            trend.append(trend[-1] if trend else overall)
+            continue
+        words = sum(w for w, _ in section)
+        long_sentences = sum(w > LONG_SENTENCE_WORDS for w, _ in section)
+        jargon = sum(j for _, j in section)
+        trend.append(_clarity(words, len(section), long_sentences, jargon))
+    return trend
+
+
+def analyze_text(text):
+    stats = text_stats(text)
+    scores = scores_from_stats(stats)
+    return {
+        "scores": scores,
+        "top_issues": pick_issues(stats, scores),
+        "trend": section_trend(stats, scores["Clarity"]),
+    }
+
+
+def analyze_texts(texts):
+    return [analyze_text(t) for t in texts]
@@ -0,0 +1,182 @@
+"""URL canonicalization and duplicate collapsing.
+
+Exported link lists often hold the same page several times: different
+scheme/host case, tracking parameters, a trailing slash or a fragment.
+``canonical_url`` maps those spellings to one form and ``PageIndex`` keeps
+each canonical page once, remembering the other spellings as aliases, so a
+page is analyzed and stored once however often it was pasted. Plain page
+labels (anything that isn't an http(s) URL) are only stripped.
+
+``PageIndex`` holds every page it has seen, which is what the app needs.
+Streaming consumers that only ask "seen before?" use ``SeenPages``, which
+moves to a temporary SQLite table past a fixed number of pages, so its
+memory stays bounded however long the input is.
+"""
+import sqlite3
+from urllib.parse import urlsplit, urlunsplit
+
+from pentrust.cache import _SQL_CHUNK
+from pentrust.config import SEEN_MEMORY_PAGES
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = frozenset((
+    "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "igshid", "twclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "vero_id", "s_cid", "ref_src",
+))
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(text):
+    """Canonical form of an http(s) URL; other text is returned stripped.
+
+    Lowercases scheme and host, drops the default port, tracking
+    parameters, the fragment and a trailing slash (except for the root).
+    The remaining query keeps its order, since it can be significant.
+    """
+    text = text.strip()
+    if "://" not in text:
+        return text
+    try:
+        parts = urlsplit(text)
+        port = parts.port
+    except ValueError:
+        return text
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in DEFAULT_PORTS or not host:
+        return text
+
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+    if parts.username is not None:
+        netloc = parts.netloc.rpartition("@")[0] + "@" + netloc
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    query = "&".join(
+        pair for pair in parts.query.split("&") if pair and not is_tracking_param(pair.partition("=")[0])
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class PageIndex:
+    """Canonical pages in first-seen order, with the other spellings of each.
+
+    ``add`` is O(1): membership is a hash-set lookup on the canonical form.
+    """
+
+    def __init__(self, lines=()):
+        self.pages = []
+        self._seen = set()
+        self._aliases = {}  # canonical -> {spelling: None}, an ordered set
+        self.duplicates = 0
+        for line in lines:
+            self.add(line)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, page):
+        return canonical_url(page) in self._seen
+
+    def add(self, line):
+        """Record ``line``; return (canonical page, whether it is new)."""
+        page = canonical_url(line)
+        line = line.strip()
+        if line != page:
+            self._aliases.setdefault(page, {})[line] = None
+        if page in self._seen:
+            self.duplicates += 1
+            return page, False
+        self._seen.add(page)
+        self.pages.append(page)
+        return page, True
+
+    def aliases_of(self, page):
+        return tuple(self._aliases.get(page, ()))
+
+    @property
+    def aliases(self):
+        """page -> tuple of other spellings, for pages that have any."""
+        return {page: tuple(spellings) for page, spellings in self._aliases.items()}
+
+
+
+class SeenPages:
+    """Set of pages with bounded memory, queried and filled in batches.
+
+    Up to ``max_memory`` pages are kept in a Python set. When it grows past
+    that, its pages move to a table in a temporary on-disk SQLite database
+    (deleted on close) and the set starts over, so memory holds at most
+    ``max_memory`` pages plus SQLite's page cache. Lookups check the set and
+    then the table, ``_SQL_CHUNK`` pages per query.
+    """
+
+    def __init__(self, max_memory=SEEN_MEMORY_PAGES):
+        self.max_memory = max_memory
+        self._memory = set()
+        self._conn = None
+        self._spilled = 0
+
+    def __len__(self):
+        return self._spilled + len(self._memory)
+
+    @property
+    def spilled(self):
+        return self._conn is not None
+
+    def add_many(self, pages):
+        """Add ``pages``; whether each was new, in order (a page repeated
+        within ``pages`` is new only the first time)."""
+        pages = list(pages)
+        known = self.contains_many(pages)
+        fresh = set()
+        new = []
+        for page in pages:
+            is_new = page not in known and page not in fresh
+            if is_new:
+                fresh.add(page)
+            new.append(is_new)
+        self._memory |= fresh
+        if len(self._memory) > self.max_memory:
+            self._spill()
+        return new
+
+    def contains_many(self, pages):
+        """The subset of ``pages`` already added."""
+        found = {page for page in pages if page in self._memory}
+        if self._conn is not None:
+            rest = list(dict.fromkeys(page for page in pages if page not in found))
+            for start in range(0, len(rest), _SQL_CHUNK):
+                chunk = rest[start:start + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(page for (page,) in self._conn.execute(
+                    f"SELECT page FROM seen_pages WHERE page IN ({marks})", chunk
+                ))
+        return found
+
+    def _spill(self):
+        if self._conn is None:
+            # An empty name is a private temporary database on disk.
+            self._conn = sqlite3.connect("")
+            self._conn.execute("PRAGMA journal_mode=OFF")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute("CREATE TABLE seen_pages (page TEXT PRIMARY KEY) WITHOUT ROWID")
+        with self._conn:
+            # Sorted, the B-tree is filled in order rather than at random.
+            self._conn.executemany("INSERT INTO seen_pages (page) VALUES (?)", ((p,) for p in sorted(self._memory)))
+        self._spilled += len(self._memory)
+        self._memory = set()
+
+    def close(self):
+        self._memory = set()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,8 +1,56 @@
+import io
+import os
+import tempfile
+import uuid
 import streamlit as st
 import pandas as pd
-import random
-import hashlib
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
+
+from pentrust.analysis import iter_normalized, page_digest
+from pentrust import markup
+from pentrust.analyzers import get_analyzer
+from pentrust.cache import AnalysisCache
+from pentrust.export import EXPORT_FORMATS, store_frames, write_export
+from pentrust.fetch import Fetcher, ValidatorStore, fetch_and_analyze, fetch_digests, refetch_pages
+from pentrust.history import HistoryStore
+from pentrust.ingest import INGEST_EXTENSIONS, IngestError, iter_path, iter_source
+from pentrust.instrument import MetricsSink, RerunTimer
+from pentrust.jobs import JobQueue
+from pentrust.config import (
+    ANALYZER_BACKEND,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+    EXECUTION_MODE,
+    FETCH_CONCURRENCY,
+    HISTORY_PATH,
+    INGEST_DIR,
+    JOB_POLL_SECONDS,
+    JOB_WORKERS,
+    METRICS_FORMAT,
+    METRICS_PATH,
+    PAGE_SOURCE,
+    PARALLEL_CHUNK_SIZE,
+    PARALLEL_WORKERS,
+    REAUDIT_MAX_AGE_DAYS,
+    RUN_CHUNK_SIZE,
+    SERVICE_URL,
+)
+from pentrust.parallel import analyze_many_parallel
+from pentrust.reaudit import AuditDiff, AuditManifest, reaudit_batch
+from pentrust.rewrite import ISSUE_GUIDES, rewrite_copy
+from pentrust.rollup import PortfolioRollup
+from pentrust.service import ServiceClient, ServiceError, remote_analyzer
+from pentrust.store import AnalysisStore
+from pentrust.table import RISK_LEVELS, TABLE_COLUMNS, AuditTable
+from pentrust.urls import PageIndex
+
+# Times this rerun's phases for the sidebar Debug panel (and the metrics
+# file); "Profile next rerun" attaches cProfile to one run.
+timer = RerunTimer(profile=st.session_state.pop("profile_next_rerun", False))
 
 # -----------------------------
 # Brand tokens
@@ -28,222 +76,321 @@ st.set_page_config(
 # -----------------------------
 # CSS (light, clean, card-based)
 # -----------------------------
-st.markdown(
-    f"""
-    <style>
-        .stApp {{
-            background: {BG};
-            color: {TEXT};
-        }}
-
-        /* Sidebar */
-        section[data-testid="stSidebar"] {{
-            background: linear-gradient(180deg, {PRIMARY} 0%, #FCE57A 100%);
-            border-right: 1px solid rgba(0,0,0,0.04);
-        }}
-        section[data-testid="stSidebar"] * {{
-            color: {TEXT} !important;
-        }}
-
-        /* Input outline clarity */
-        textarea {{
-            border: 1.5px solid {BORDER} !important;
-            border-radius: 12px !important;
-        }}
-
-        /* Button styling */
-        .stButton>button {{
-            background: {TEXT};
-            color: white;
-            border-radius: 12px;
-            padding: 0.6rem 1rem;
-            border: none;
-            font-weight: 600;
-        }}
-        .stButton>button:hover {{
-            background: #111827;
-        }}
-
-        /* Card styles */
-        .pt-card {{
-            background: {CARD_BG};
-            border: 1px solid {BORDER};
-            border-radius: 18px;
-            padding: 18px 20px;
-            box-shadow: 0 6px 18px rgba(2, 6, 23, 0.06);
-        }}
-
-        .pt-metric {{
-            border-radius: 18px;
-            padding: 22px 22px;
-            border: 1px solid {BORDER};
-            background: {CARD_BG};
-            box-shadow: 0 6px 18px rgba(2, 6, 23, 0.06);
-            min-height: 140px;
-        }}
-        .pt-metric.primary {{
-            background: linear-gradient(135deg, {PRIMARY} 0%, #FFECA0 100%);
-        }}
-        .pt-metric.blue {{
-            background: linear-gradient(135deg, #DBEAFE 0%, #C7D2FE 100%);
-        }}
-        .pt-metric.soft {{
-            background: #FFF7E6;
-        }}
-
-        .pt-metric-title {{
-            font-size: 1.1rem;
-            font-weight: 600;
-            color: {TEXT};
-            margin-bottom: 6px;
-        }}
-        .pt-metric-value {{
-            font-size: 2.4rem;
-            font-weight: 800;
-            letter-spacing: -0.02em;
-            margin: 0;
-            color: {TEXT};
-        }}
-        .pt-metric-sub {{
-            font-size: 0.95rem;
-            color: {MUTED};
-            margin-top: 6px;
-        }}
-
-        .pt-section-title {{
-            font-size: 1.6rem;
-            font-weight: 800;
-            margin-bottom: 6px;
-        }}
-
-        .pt-caption {{
-            color: {MUTED};
-            font-size: 0.98rem;
-        }}
-
-        .pt-pill {{
-            display: inline-block;
-            padding: 4px 10px;
-            border-radius: 999px;
-            font-size: 0.8rem;
-            font-weight: 600;
-            background: #EEF2FF;
-            color: {TEXT};
-            border: 1px solid {BORDER};
-        }}
-
-        /* Reduce default top padding feel */
-        .block-container {{
-            padding-top: 1.4rem;
-        }}
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(markup.stylesheet(PRIMARY, BG, CARD_BG, TEXT, MUTED, BORDER), unsafe_allow_html=True)
 
 # -----------------------------
 # Utilities
 # -----------------------------
-def normalize_urls(raw: str):
-    if not raw:
-        return []
-    lines = [l.strip() for l in raw.splitlines()]
-    lines = [l for l in lines if l]
-    # Allow simple labels too, but treat as "pages"
-    return lines
-
-def stable_seed(text: str) -> int:
-    h = hashlib.md5(text.encode("utf-8")).hexdigest()
-    return int(h[:8], 16)
-
-def mock_analysis_for_url(url: str):
-    rnd = random.Random(stable_seed(url))
-
-    # Scores intentionally not all perfect (so you can demo problems)
-    clarity = rnd.randint(58, 82)
-    next_steps = rnd.randint(52, 80)
-    trust = rnd.randint(55, 85)
-    accessibility = rnd.randint(48, 78)
-
-    # Pick 2 primary issues to show on dashboard
-    issue_pool = [
-        ("Dense instructions", "Long paragraphs reduce scanability in critical flows."),
-        ("Unclear next steps", "Confirmation copy doesn’t specify the user's next action."),
-        ("Weak micro trust", "Lack of brief reassurance near sensitive content."),
-        ("Readability mismatch", "Reading level may be high for broad patient audiences."),
-        ("Accessibility gaps", "Content structure may not support assistive scanning.")
-    ]
-    rnd.shuffle(issue_pool)
-    top_issues = issue_pool[:2]
-
-    # Trend data for clarity chart
-    trend = [max(40, min(90, clarity + rnd.randint(-8, 8))) for _ in range(8)]
-
-    return {
-        "scores": {
-            "Clarity": clarity,
-            "Next-step guidance": next_steps,
-            "Trust signals": trust,
-            "Accessibility-aware writing": accessibility
-        },
-        "top_issues": top_issues,
-        "trend": trend
-    }
-
-def build_detailed_table(analyses: dict):
-    rows = []
-    for url, a in analyses.items():
-        s = a["scores"]
-        issues = ", ".join([i[0] for i in a["top_issues"]])
-        # Simple risk label for presentation clarity
-        risk = "High" if min(s.values()) < 55 else ("Medium" if min(s.values()) < 65 else "Low")
-
-        rows.append({
-            "Page / label": url,
-            "Clarity score": s["Clarity"],
-            "Next-step score": s["Next-step guidance"],
-            "Trust score": s["Trust signals"],
-            "Accessibility-aware score": s["Accessibility-aware writing"],
-            "Top risk signals": issues,
-            "Risk level": risk
-        })
-    if not rows:
-        return pd.DataFrame(columns=[
-            "Page / label", "Clarity score", "Next-step score", "Trust score",
-            "Accessibility-aware score", "Top risk signals", "Risk level"
-        ])
-    return pd.DataFrame(rows)
+@st.cache_resource
+def get_service_client():
+    # Keep-alive connections to the analysis service, shared by all sessions.
+    return ServiceClient(SERVICE_URL)
+
+@st.cache_resource
+def get_remote_analyzer():
+    return remote_analyzer(get_service_client(), ANALYZER_BACKEND)
+
+if SERVICE_URL:
+    try:
+        ANALYZER = get_remote_analyzer()
+    except ServiceError as exc:
+        st.error(f"{exc}. Start it with `python -m pentrust.service`, or unset PENTRUST_SERVICE_URL.")
+        st.stop()
+else:
+    ANALYZER = get_analyzer(ANALYZER_BACKEND)
+
+# Where Run analysis reads its page list from. "Server file" is offered only
+# when PENTRUST_INGEST_DIR names a directory to read from.
+INPUT_SOURCES = {"paste": "Paste links", "upload": "Upload file", "path": "Server file"}
+
+@st.cache_resource
+def get_analysis_cache():
+    # Shared by every session in this server process. With an analysis
+    # service the service keeps the shared disk cache; each replica only
+    # holds a memory LRU so reruns don't go over the wire.
+    return AnalysisCache(
+        None if SERVICE_URL else CACHE_PATH or None, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS,
+        version=ANALYZER.version, analyze_many=ANALYZER.analyze_many, max_bytes=CACHE_MAX_BYTES
+    )
+
+@st.cache_resource
+def get_fetcher():
+    # One event loop and connection pool for the whole server process;
+    # validators share the analysis cache database.
+    return Fetcher(ValidatorStore(CACHE_PATH or None))
+
+@st.cache_resource
+def get_manifest(portfolio):
+    # Last analyzed digest/version per page, for "Re-audit changed pages only".
+    return AuditManifest(CACHE_PATH or None, portfolio)
+
+@st.cache_resource
+def get_history():
+    return HistoryStore(HISTORY_PATH) if HISTORY_PATH else None
+
+@st.cache_resource
+def get_metrics_sink():
+    return MetricsSink(METRICS_PATH, METRICS_FORMAT) if METRICS_PATH else None
+
+@st.cache_resource
+def get_job_queue():
+    # Worker threads shared by every session: runs analyze in the background.
+    return JobQueue(JOB_WORKERS)
+
+def page_analyzer(mode, source, portfolio=None):
+    # Returns pages -> (analyzed (page, analysis) pairs, fetch errors, AuditDiff
+    # or None). Shared resources are looked up here, in the script thread, so
+    # the callable can run on a job worker too.
+    if mode == "parallel" and not SERVICE_URL:
+        # With the service, the analysis happens there; the pool would only
+        # add processes waiting on it.
+        analyze = partial(
+            analyze_many_parallel, workers=PARALLEL_WORKERS, chunk_size=PARALLEL_CHUNK_SIZE,
+            analyze_many=ANALYZER.analyze_many
+        )
+    else:
+        analyze = ANALYZER.analyze_many
+    cache = get_analysis_cache()
+    fetcher = get_fetcher() if source == "fetch" else None
+    manifest = get_manifest(portfolio) if portfolio else None
+    history = get_history()
+
+    def analyze_chunk(pages):
+        errors, diff = {}, None
+        if manifest is not None:
+            if fetcher is not None:
+                items, errors = fetch_digests(fetcher, pages)
+                refetch = partial(refetch_pages, fetcher)
+            else:
+                items, refetch = [(p, page_digest(p), p) for p in pages], None
+            results, diff = reaudit_batch(
+                manifest, items, partial(cache.get_or_compute_many, analyze_many=analyze),
+                ANALYZER.version, REAUDIT_MAX_AGE_DAYS * 86400, refetch
+            )
+            done = [(page, analysis) for (page, _, _), analysis in zip(items, results) if analysis is not None]
+        elif fetcher is not None:
+            done = []
+            for page, (result, analysis) in zip(pages, fetch_and_analyze(fetcher, pages, analyze, cache)):
+                if analysis is None:
+                    errors[page] = result.error
+                else:
+                    done.append((page, analysis))
+        else:
+            done = list(zip(pages, cache.get_or_compute_many(pages, analyze)))
+        if history is not None:
+            history.append(done)
+        return done, errors, diff
+
+    return analyze_chunk
+
+def apply_outcome(done, errors, diff):
+    st.session_state.analyses.update(done)
+    st.session_state.fetch_errors.update(errors)
+    if diff is not None:
+        st.session_state.audit_diff.merge(diff)
+
+@timer.timed("analyze")
+def analyze_pages_now(pages, mode, source, portfolio=None):
+    apply_outcome(*page_analyzer(mode, source, portfolio)(pages))
+
+def collect_job_results():
+    # Moves whatever the session's job finished since the last rerun into
+    # the session.
+    job = st.session_state.job
+    if job is not None:
+        for outcome in job.drain():
+            apply_outcome(*outcome)
+
+def run_chunk_size(mode, source):
+    if source == "fetch":
+        # Network-bound: small chunks keep the progress bar moving.
+        return FETCH_CONCURRENCY * 4
+    if mode == "parallel":
+        return max(RUN_CHUNK_SIZE, PARALLEL_CHUNK_SIZE * (PARALLEL_WORKERS or os.cpu_count() or 1))
+    return RUN_CHUNK_SIZE
+
+def run_notes(job):
+    progress = job.progress
+    if job.status == "cancelled":
+        notes = [f"Cancelled after {progress.done:,} of {progress.total:,} pages ({job.elapsed():.1f}s)."]
+    else:
+        notes = [f"Analyzed {progress.total:,} pages in {job.elapsed():.1f}s."]
+    if st.session_state.duplicates:
+        notes.append(f"{st.session_state.duplicates:,} duplicate links were merged into their canonical page.")
+    if st.session_state.fetch_errors:
+        notes.append(f"{len(st.session_state.fetch_errors):,} could not be fetched.")
+    if st.session_state.run_portfolio:
+        notes.append(f"Re-audit: {st.session_state.audit_diff.summary()}.")
+    return " ".join(notes)
+
+def read_pages(source, raw, upload, path, skipped):
+    # A lazy iterator: pages stream from the file straight into the
+    # PageIndex. Unreadable child sitemaps are appended to ``skipped``.
+    if source == "upload":
+        return iter_source(upload, upload.name, errors=skipped) if upload is not None else iter(())
+    if source == "path":
+        path = path.strip()
+        return iter_path(os.path.join(INGEST_DIR, path), root=INGEST_DIR, errors=skipped) if path else iter(())
+    return iter_normalized(io.StringIO(raw, newline=None))
+
+def in_fragment_rerun():
+    # A fragment rerun skips the top of the script, so the timer of the
+    # full run it belongs to has already finished.
+    return timer.finished is not None
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress():
+    # Polls the session's job while it runs. Results are picked up as they
+    # come in; the whole page is redrawn at doubling intervals (so table
+    # refreshes cost O(pages) overall), when the page on screen arrives, and
+    # when the job ends.
+    job = st.session_state.job
+    if in_fragment_rerun():
+        collect_job_results()
+        waiting_for = st.session_state.waiting_for
+        arrived = waiting_for in st.session_state.analyses or waiting_for in st.session_state.fetch_errors
+        if not job.active or arrived or job.progress.table_due():
+            st.session_state.waiting_for = None
+            st.rerun()
+    if job.status == "queued":
+        st.progress(0.0, text=f"Queued behind other audits · job {job.id}")
+    else:
+        st.progress(job.progress.fraction, text=f"{job.progress.label()} · job {job.id}")
+    st.button("Cancel run", on_click=job.cancel, key="cancel_job")
+
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# Grouped bars: one per score dimension in each score range.
+HISTOGRAM_CHART = {
+    "mark": {"type": "bar", "tooltip": True},
+    "encoding": {
+        "x": {"field": "Score range", "type": "ordinal", "sort": None, "axis": {"labelAngle": 0}},
+        "xOffset": {"field": "Score", "sort": None},
+        "y": {"field": "Pages", "type": "quantitative"},
+        "color": {"field": "Score", "type": "nominal", "sort": None},
+    },
+}
+
+ISSUE_CHART = {
+    "mark": {"type": "bar", "tooltip": True},
+    "encoding": {
+        "y": {"field": "Risk signal", "type": "nominal", "sort": "-x", "title": None},
+        "x": {"field": "Pages", "type": "quantitative"},
+    },
+}
+
+# A plain Vega-Lite spec: st.bar_chart builds (and schema-validates) an
+# Altair chart on every draw, which dominated a page switch.
+TREND_CHART = {
+    "mark": {"type": "bar", "tooltip": True},
+    "encoding": {
+        "x": {"field": "Audit", "type": "ordinal", "axis": {"labelAngle": 0}},
+        "y": {"field": "Clarity score", "type": "quantitative"},
+    },
+}
+
+def clarity_trend(url, analysis):
+    # (frame, caption) for the trend chart: the page's recorded audits,
+    # oldest first, or the analyzer's sample trend when history is off.
+    history = get_history()
+    points = history.trend(url) if history is not None else ()
+    if not len(points):
+        trend = analysis["trend"]
+        return pd.DataFrame({"Audit": range(1, len(trend) + 1), "Clarity score": trend}), "Sample trend."
+    total = history.points(url)
+    audited = pd.to_datetime(points["time"], unit="s", utc=True).tz_convert(None)
+    frame = pd.DataFrame({
+        "Audit": range(total - len(points) + 1, total + 1),
+        "Clarity score": points["scores"][:, 0],
+        "Audited": audited.strftime("%Y-%m-%d %H:%M"),
+    })
+    return frame, f"{total:,} audits recorded for this page (times in UTC); showing the latest {len(points)}."
+
+def export_table(store, fmt):
+    # Called on Streamlit's download thread when the button is clicked. The
+    # table is written chunk by chunk to a temporary file, never as one
+    # DataFrame; the file is then read once into the bytes Streamlit serves
+    # from memory, so the app holds a single copy of the export (use the
+    # CLI for exports too big for that).
+    with tempfile.TemporaryFile() as out:
+        write_export(store_frames(store), fmt, out)
+        out.seek(0)
+        return out.read()
+
+def render_audit_table(key):
+    # Search, filters, sorting and paging run on the server against the
+    # table index; only the visible page of rows goes to the browser.
+    issue_titles = [title for title, _ in st.session_state.analyses.issue_table]
+
+    f1, f2, f3 = st.columns([2, 1.2, 1.4])
+    with f1:
+        search = st.text_input("Search pages", key=f"{key}_search", placeholder="Filter by page or label")
+    with f2:
+        risk = st.multiselect("Risk level", list(RISK_LEVELS), key=f"{key}_risk")
+    with f3:
+        issue = st.selectbox("Risk signal", ["All signals"] + issue_titles, key=f"{key}_issue")
+
+    s1, s2, s3, s4 = st.columns([1.6, 1, 1, 1])
+    with s1:
+        sort_by = st.selectbox("Sort by", ["Input order"] + TABLE_COLUMNS, key=f"{key}_sort")
+    with s2:
+        st.write("")
+        descending = st.toggle("Descending", key=f"{key}_desc")
+    with s3:
+        page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    with s4:
+        page_no = st.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")
+
+    with timer.span("table"):
+        index = st.session_state.audit_table.index(st.session_state.analyses)
+        query = dict(
+            sort_by=None if sort_by == "Input order" else sort_by,
+            descending=descending,
+            risk_levels=risk,
+            issue=None if issue == "All signals" else issue,
+            search=search.strip(),
+            page_size=page_size
+        )
+        rows, matches = index.query(page=page_no, **query)
+        last_page = max(1, -(-matches // page_size))
+        current = min(page_no, last_page)
+        if current != page_no:
+            rows, matches = index.query(page=current, **query)
+
+        st.dataframe(rows, width="stretch", hide_index=True)
+        first = (current - 1) * page_size + 1 if matches else 0
+        last = first + len(rows) - 1 if matches else 0
+        st.caption(
+            f"Showing {first:,}–{last:,} of {matches:,} matching pages "
+            f"({len(index.frame):,} total) · page {current:,} of {last_page:,}"
+        )
+
+    e1, e2 = st.columns([1, 2])
+    with e1:
+        fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key=f"{key}_export_format", format_func=str.upper)
+    with e2:
+        st.write("")
+        st.download_button(
+            f"Download all {len(st.session_state.analyses):,} pages",
+            data=partial(export_table, st.session_state.analyses, fmt),
+            file_name=f"pentrust-audit.{fmt}",
+            mime=EXPORT_FORMATS[fmt][1],
+            on_click="ignore",
+            key=f"{key}_export"
+        )
 
 def render_metric_card(title, value, sub, style_class=""):
-    st.markdown(
-        f"""
-        <div class="pt-metric {style_class}">
-            <div class="pt-metric-title">{title}</div>
-            <div class="pt-metric-value">{value}</div>
-            <div class="pt-metric-sub">{sub}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(markup.metric_card(title, value, sub, style_class), unsafe_allow_html=True)
 
 def render_issue_list(issues):
-    for title, desc in issues:
-        st.markdown(
-            f"""
-            <div class="pt-card" style="margin-bottom: 10px;">
-                <span class="pt-pill">Issue</span>
-                <div style="font-weight: 700; font-size: 1.05rem; margin-top: 6px;">⚠️ {title}</div>
-                <div class="pt-caption" style="margin-top: 2px;">{desc}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    # One element for the whole list: fewer deltas to send on a page switch.
+    st.markdown("".join(markup.issue_card(title, desc) for title, desc in issues), unsafe_allow_html=True)
 
 # -----------------------------
 # Session state
 # -----------------------------
 if "analyses" not in st.session_state:
-    st.session_state.analyses = {}  # url -> analysis dict
+    st.session_state.analyses = AnalysisStore()  # url -> analysis, columnar
 
 if "urls" not in st.session_state:
     st.session_state.urls = []
@@ -251,13 +398,46 @@ if "urls" not in st.session_state:
 if "selected_url" not in st.session_state:
     st.session_state.selected_url = None
 
+if "audit_table" not in st.session_state:
+    st.session_state.audit_table = AuditTable()  # memoized view of analyses
+
+if "rollup" not in st.session_state:
+    st.session_state.rollup = PortfolioRollup()  # incremental aggregates of analyses
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # job owner, for fair queueing
+
+if "job" not in st.session_state:
+    st.session_state.job = None  # background Job analyzing the latest run
+
+if "waiting_for" not in st.session_state:
+    st.session_state.waiting_for = None  # page on screen that the job is analyzing
+
+if "fetch_errors" not in st.session_state:
+    st.session_state.fetch_errors = {}  # url -> reason, when fetching live pages
+
+if "audit_diff" not in st.session_state:
+    st.session_state.audit_diff = None  # AuditDiff of the latest re-audit
+
+if "duplicates" not in st.session_state:
+    st.session_state.duplicates = 0  # pasted lines collapsed into an earlier page
+
+if "skipped_sitemaps" not in st.session_state:
+    st.session_state.skipped_sitemaps = []  # (child sitemap, reason) not read by the latest run
+
+if "run_portfolio" not in st.session_state:
+    st.session_state.run_portfolio = None  # portfolio re-audited by the latest run
+
+# Results the background job finished since the last rerun.
+collect_job_results()
+
 # -----------------------------
-# Sidebar nav (ONLY 2)
+# Sidebar nav
 # -----------------------------
 st.sidebar.markdown("## ✏️ PenTrust")
 page = st.sidebar.radio(
     "Navigation",
-    ["Dashboard", "Deep Analysis"],
+    ["Dashboard", "Deep Analysis", "Portfolio"],
     label_visibility="collapsed"
 )
 
@@ -267,21 +447,33 @@ st.sidebar.markdown(
     "for healthcare UX and content teams."
 )
 
+with st.sidebar.expander("Run settings"):
+    execution_mode = st.radio(
+        "Execution",
+        ["serial", "parallel"],
+        index=1 if EXECUTION_MODE == "parallel" else 0,
+        format_func=str.capitalize,
+        help="Parallel shards large page lists across a process pool."
+    )
+    page_source = st.radio(
+        "Page content",
+        ["input", "fetch"],
+        index=1 if PAGE_SOURCE == "fetch" else 0,
+        format_func={"input": "Pasted text", "fetch": "Fetch live pages"}.get,
+        help="Fetch downloads each URL and analyzes the page text. "
+             "Unchanged pages (HTTP 304) reuse their previous analysis."
+    )
+    reaudit = st.toggle(
+        "Re-audit changed pages only",
+        help="Compares each page's content with the last re-audit of this portfolio and only "
+             f"analyzes pages that are new, changed, or older than {REAUDIT_MAX_AGE_DAYS:g} days."
+    )
+    portfolio = st.text_input("Portfolio", value="default").strip() if reaudit else None
+
 # -----------------------------
 # Header (top area)
 # -----------------------------
-st.markdown(
-    """
-    <div class="pt-card">
-        <div class="pt-section-title">PenTrust – Healthcare Content Clarity Analyzer</div>
-        <div class="pt-caption">
-            Paste multiple URLs or page labels to simulate how an AI content audit could surface clarity,
-            next-step, trust, and accessibility-aware writing risks.
-        </div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(markup.HEADER, unsafe_allow_html=True)
 
 st.write("")
 
@@ -292,29 +484,108 @@ with st.container():
     left, right = st.columns([3, 1])
 
     with left:
-        raw = st.text_area(
-            "Pages to review",
-            value="",
-            height=110,
-            placeholder="Paste the link(s) here — one per line",
-            label_visibility="visible"
+        input_source = st.radio(
+            "Pages from",
+            list(INPUT_SOURCES) if INGEST_DIR else ["paste", "upload"],
+            format_func=INPUT_SOURCES.get,
+            horizontal=True,
+            label_visibility="collapsed"
         )
+        raw, upload, server_path = "", None, ""
+        if input_source == "paste":
+            raw = st.text_area(
+                "Pages to review",
+                value="",
+                height=110,
+                placeholder="Paste the link(s) here — one per line",
+                label_visibility="visible"
+            )
+        elif input_source == "upload":
+            upload = st.file_uploader(
+                "Sitemap, CSV or text file",
+                type=list(INGEST_EXTENSIONS),
+                help="Sitemap XML (sitemap indexes are followed), a CSV with a url/page column, "
+                     "or one page per line. Gzipped files work too."
+            )
+        else:
+            server_path = st.text_input(
+                "File on the server",
+                placeholder="sitemap.xml",
+                help=f"A sitemap, CSV or text file under {INGEST_DIR}."
+            )
 
     with right:
         st.write("")
-        run = st.button("Run analysis", use_container_width=True)
-        st.caption("Demo logic generates realistic signals for presentation use.")
+        run = st.button("Run analysis", width="stretch")
+        if ANALYZER.name == "mock":
+            st.caption("Demo logic generates realistic signals for presentation use.")
+        else:
+            st.caption(ANALYZER.description)
 
+    page_index = None
     if run:
-        urls = normalize_urls(raw)
+        # Spellings of the same page (case, tracking parameters, trailing
+        # slash, fragment) collapse into one canonical page.
+        skipped = []
+        with timer.span("parse"):
+            try:
+                page_index = PageIndex(read_pages(input_source, raw, upload, server_path, skipped))
+            except IngestError as exc:
+                st.error(f"Couldn't read the page list: {exc}")
+        st.session_state.skipped_sitemaps = skipped
+
+    if page_index is not None:
+        urls = page_index.pages
         st.session_state.urls = urls
+        st.session_state.duplicates = page_index.duplicates
+        st.session_state.analyses = AnalysisStore(aliases=page_index.aliases)
+        st.session_state.fetch_errors = {}
+        st.session_state.audit_diff = None
+        st.session_state.run_portfolio = portfolio
+        if portfolio:
+            manifest = get_manifest(portfolio)
+            st.session_state.audit_diff = AuditDiff(removed=manifest.removed(urls))
+            manifest.forget(st.session_state.audit_diff.removed)
+        st.session_state.selected_url = urls[0] if urls else None
+        st.session_state.waiting_for = None
+        if st.session_state.job is not None:
+            st.session_state.job.cancel()
+        st.session_state.job = None
+        if urls:
+            # The first page is analyzed right away so its dashboard shows at
+            # once; the rest goes to a background job.
+            analyze_pages_now(urls[:1], execution_mode, page_source, portfolio)
+            st.session_state.job = get_job_queue().submit(
+                st.session_state.session_id, urls, page_analyzer(execution_mode, page_source, portfolio),
+                run_chunk_size(execution_mode, page_source), skip=(0,)
+            )
 
-        analyses = {}
-        for u in urls:
-            analyses[u] = mock_analysis_for_url(u)
+    job = st.session_state.job
+    if job is not None:
+        if job.active:
+            job_progress()
+        elif job.status == "failed":
+            st.error(f"Analysis stopped after {job.progress.done:,} pages: {job.error}")
+        else:
+            st.caption(run_notes(job))
+    skipped = st.session_state.skipped_sitemaps
+    if skipped:
+        location, reason = skipped[0]
+        st.warning(
+            f"{len(skipped):,} sitemap(s) listed in the index could not be read and were skipped, "
+            f"e.g. {location} ({reason})."
+        )
 
-        st.session_state.analyses = analyses
-        st.session_state.selected_url = urls[0] if urls else None
+    diff = st.session_state.audit_diff
+    if diff is not None and job is not None and not job.active:
+        with st.expander(f"What changed since the last audit of “{st.session_state.run_portfolio}”"):
+            st.caption(diff.summary())
+            for kind in ("added", "changed", "stale", "removed"):
+                changed_pages = getattr(diff, kind)
+                if changed_pages:
+                    more = f"\n… and {len(changed_pages) - 100:,} more" if len(changed_pages) > 100 else ""
+                    st.markdown(f"**{kind.capitalize()}** ({len(changed_pages):,})")
+                    st.text("\n".join(changed_pages[:100]) + more)
 
 # If we already have urls but the user didn't press run this time
 if not st.session_state.selected_url and st.session_state.urls:
@@ -324,42 +595,69 @@ analyses = st.session_state.analyses
 urls = st.session_state.urls
 
 # -----------------------------
-# URL selector
+# Page panels (rerun as fragments)
 # -----------------------------
-if urls:
+# Picking another page only redraws the panel holding the selector, cards
+# and solutions; the stylesheet, run settings and audit table are left as
+# they are.
+def fragment_span(name):
+    # Fragment reruns are timed on their own and reported as the last page switch.
+    if not in_fragment_rerun():
+        return timer.span(name)
+    return fragment_rerun_span(name)
+
+@contextmanager
+def fragment_rerun_span(name):
+    fragment_timer = RerunTimer()
+    with fragment_timer.span(name):
+        yield
+    fragment_timer.finish()
+    st.session_state.last_fragment_timing = (name, fragment_timer.total)
+    metrics_sink = get_metrics_sink()
+    if metrics_sink is not None:
+        metrics_sink.write(fragment_timer, kind="fragment", page=page, fragment=name)
+
+def select_page():
+    # Returns (selected url, its analysis or None, fetch error or None).
     st.markdown("##### Select a page")
-    selected = st.selectbox(
+    selected_url = st.selectbox(
         "Select a page",
         options=urls,
         index=urls.index(st.session_state.selected_url) if st.session_state.selected_url in urls else 0,
         label_visibility="collapsed"
     )
-    st.session_state.selected_url = selected
+    st.session_state.selected_url = selected_url
+    # The selected page is analyzed ahead of the rest of the run, so its
+    # dashboard appears immediately however many pages were pasted. A page
+    # the job is already working on shows up with its chunk instead.
+    if selected_url not in analyses and selected_url not in st.session_state.fetch_errors:
+        job = st.session_state.job
+        if job is None or not job.active or job.take(urls.index(selected_url)):
+            analyze_pages_now([selected_url], execution_mode, page_source, st.session_state.run_portfolio)
+        else:
+            st.session_state.waiting_for = selected_url
+    return selected_url, analyses.get(selected_url), st.session_state.fetch_errors.get(selected_url)
+
+def show_missing_page(url, fetch_error):
+    if fetch_error is None:
+        st.info(f"Analyzing **{url}** in the background; it appears here as soon as it is done.")
+    else:
+        st.warning(f"Couldn't fetch **{url}** ({fetch_error}). Pick another page or run again.")
 
-selected_url = st.session_state.selected_url
-selected_analysis = analyses.get(selected_url) if selected_url else None
+@st.fragment
+def draw_dashboard():
+    with fragment_span("dashboard panel"):
+        selected_url, selected_analysis, fetch_error = select_page()
+        if selected_analysis is None:
+            show_missing_page(selected_url, fetch_error)
+            return
 
-# -----------------------------
-# DASHBOARD PAGE
-# -----------------------------
-if page == "Dashboard":
-    if not urls:
-        st.info("Add pages in **Pages to review** and click **Run analysis** to generate the dashboard.")
-    else:
         # Layout similar to your reference:
         # left main area + right notifications/activities
         main, side = st.columns([3.2, 1.2])
 
         with main:
-            st.markdown(
-                f"""
-                <div style="display:flex; justify-content: space-between; align-items:center; margin-bottom: 8px;">
-                    <div class="pt-section-title">Dashboard</div>
-                    <div class="pt-caption">Today</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+            st.markdown(markup.section_header("Dashboard", "Today"), unsafe_allow_html=True)
 
             # Metric cards (2x2)
             c1, c2 = st.columns(2)
@@ -400,8 +698,9 @@ if page == "Dashboard":
 
             # Clarity score trend chart
             st.markdown("#### Clarity Score Trend")
-            trend_df = pd.DataFrame({"Clarity score": selected_analysis["trend"]})
-            st.bar_chart(trend_df)
+            trend_df, trend_note = clarity_trend(selected_url, selected_analysis)
+            st.vega_lite_chart(trend_df, TREND_CHART, width="stretch")
+            st.caption(trend_note)
 
             st.write("")
 
@@ -410,194 +709,195 @@ if page == "Dashboard":
             render_issue_list(selected_analysis["top_issues"])
 
         with side:
-            st.markdown(
-                """
-                <div class="pt-card">
-                    <div class="pt-section-title" style="font-size:1.3rem;">Notifications</div>
-                    <div style="margin-top:12px;">
-                        <div style="font-weight:600;">⚠️ Clarity alert detected</div>
-                        <div class="pt-caption">Just now</div>
-                    </div>
-                    <div style="margin-top:14px;">
-                        <div style="font-weight:600;">👥 New page added to review</div>
-                        <div class="pt-caption">A few minutes ago</div>
-                    </div>
-                    <div style="margin-top:14px;">
-                        <div style="font-weight:600;">✅ Analysis complete</div>
-                        <div class="pt-caption">Moments ago</div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-
+            st.markdown(markup.NOTIFICATIONS, unsafe_allow_html=True)
             st.write("")
-
-            st.markdown(
-                """
-                <div class="pt-card">
-                    <div class="pt-section-title" style="font-size:1.3rem;">Activities</div>
-                    <div style="margin-top:12px;">
-                        <div style="font-weight:600;">📄 Report previewed</div>
-                        <div class="pt-caption">Just now</div>
-                    </div>
-                    <div style="margin-top:14px;">
-                        <div style="font-weight:600;">🧭 Page switched</div>
-                        <div class="pt-caption">Live selection enabled</div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
+            st.markdown(markup.ACTIVITIES, unsafe_allow_html=True)
+
+def draw_portfolio():
+    # Everything here comes from the rollup's snapshot: its size depends on
+    # the number of distinct issues, not pages.
+    with timer.span("rollup"):
+        summary = st.session_state.rollup.summary(st.session_state.analyses)
+    total = summary["pages"]
+
+    st.markdown(markup.section_header("Portfolio", f"{total:,} pages"), unsafe_allow_html=True)
+    c1, c2 = st.columns(2)
+    c3, c4 = st.columns(2)
+    with c1:
+        render_metric_card("Pages audited", f"{total:,}", "Across the whole portfolio", "primary")
+    for col, level, style in ((c2, "High", "blue"), (c3, "Medium", "soft"), (c4, "Low", "blue")):
+        with col:
+            count = summary["risk"][level]
+            render_metric_card(f"{level} risk pages", f"{count:,}", f"{count / total:.0%} of pages", style)
+
+    st.write("")
+    st.markdown("#### Score distribution")
+    bins = summary["histograms"]["bins"]
+    histogram = pd.DataFrame([
+        {"Score range": label, "Score": name, "Pages": pages}
+        for name in summary["means"]
+        for label, pages in zip(bins, summary["histograms"][name])
+    ])
+    st.vega_lite_chart(histogram, HISTOGRAM_CHART, width="stretch")
+    st.caption(" · ".join(f"{name}: average {mean:.1f}" for name, mean in summary["means"].items()))
+
+    st.markdown("#### Most frequent risk signals")
+    if summary["issues"]:
+        issues = pd.DataFrame(summary["issues"], columns=["Risk signal", "Pages"])
+        st.vega_lite_chart(issues, ISSUE_CHART, width="stretch")
+    else:
+        st.caption("No risk signals flagged.")
+
+    st.markdown("#### Lowest-scoring pages")
+    for tab, (name, worst) in zip(st.tabs(list(summary["worst"])), summary["worst"].items()):
+        with tab:
+            st.dataframe(
+                pd.DataFrame(worst, columns=["Page / label", f"{name} score"]),
+                width="stretch", hide_index=True
             )
 
-        st.write("")
-        st.markdown("### Detailed audit table")
-        st.caption("This is your big table for grading + screenshots.")
-        st.dataframe(
-            build_detailed_table(analyses),
-            use_container_width=True,
-            hide_index=True
-        )
+@st.fragment
+def draw_deep_analysis():
+    with fragment_span("deep analysis panel"):
+        selected_url, selected_analysis, fetch_error = select_page()
+        if selected_analysis is None:
+            show_missing_page(selected_url, fetch_error)
+            return
 
-# -----------------------------
-# DEEP ANALYSIS PAGE (Solutions)
-# -----------------------------
-elif page == "Deep Analysis":
-    if not urls:
-        st.info("Add pages in **Pages to review** and click **Run analysis** to generate deep analysis.")
-    else:
-        st.markdown(
-            f"""
-            <div style="display:flex; justify-content: space-between; align-items:center; margin-bottom: 8px;">
-                <div class="pt-section-title">Deep Analysis</div>
-                <div class="pt-caption">Solutions & rewrite guidance</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-        st.markdown(
-            f"""
-            <div class="pt-card">
-                <div style="font-weight:700;">Page under review</div>
-                <div class="pt-caption">{selected_url}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(markup.section_header("Deep Analysis", "Solutions & rewrite guidance"), unsafe_allow_html=True)
+        st.markdown(markup.page_card(selected_url), unsafe_allow_html=True)
 
         st.write("")
 
-        # We show solutions that map to the dashboard issues,
-        # without any HTML/code snippets.
-        issues = selected_analysis["top_issues"]
-        issue_titles = [i[0] for i in issues]
-
-        # 1) Dense instructions
-        if "Dense instructions" in issue_titles:
-            st.markdown("### 1. Instructions are too dense for quick scanning")
+        # Solutions for the page's issues, from the issue guide table,
+        # with the rewrite engine's suggestion for each sample.
+        issue_titles = [i[0] for i in selected_analysis["top_issues"]]
+        for number, (title, guide) in enumerate(ISSUE_GUIDES.items(), 1):
+            if title not in issue_titles:
+                continue
+            st.markdown(f"### {number}. {guide.heading}")
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown("**⚠️ Problem signal**")
-                st.info("Actions are embedded in long paragraphs, lowering scan and completion rates.")
+                st.info(guide.problem)
             with col2:
                 st.markdown("**✅ Suggested fix**")
-                st.success("Lead with a 1-line summary, then 2–3 short steps. Add headings and whitespace.")
+                st.success(guide.fix)
 
-            st.markdown("**Before (sample copy)**")
-            st.write(
-                "To complete your appointment request, please review the following detailed instructions, "
-                "ensure you have your insurance information ready, and confirm your provider preference before proceeding."
-            )
-
-            st.markdown("**After (clearer version)**")
-            st.write(
-                "**Book in 3 steps:** 1) Choose a date  2) Select a provider  3) Confirm your details. "
-                "Have your insurance card ready for step 3."
-            )
-            st.markdown("---")
-
-        # 2) Unclear next steps
-        if "Unclear next steps" in issue_titles:
-            st.markdown("### 2. Next steps are unclear after key actions")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**⚠️ Problem signal**")
-                st.info("Users receive acknowledgment without instructions for what to do next.")
-            with col2:
-                st.markdown("**✅ Suggested fix**")
-                st.success("Add explicit next-step microcopy + one primary CTA + time expectation.")
+            if guide.checklist:
+                st.markdown("**Writer checklist**")
+                st.write("\n".join(f"• {item}" for item in guide.checklist))
+            else:
+                st.markdown("**Before (sample copy)**")
+                st.write(guide.before)
 
-            st.markdown("**Before (sample copy)**")
-            st.write("Your request was received. We’ll review it.")
+                st.markdown("**After (clearer version)**")
+                st.write(guide.after)
 
-            st.markdown("**After (clearer version)**")
-            st.write("Request received. **Next:** Upload your insurance card to continue. You’ll get an update within 24 hours.")
+                st.markdown("**Suggested rewrite**")
+                st.write(rewrite_copy(guide.before, [title]))
             st.markdown("---")
 
-        # 3) Weak micro trust
-        if "Weak micro trust" in issue_titles:
-            st.markdown("### 3. Trust signals need reinforcement near sensitive moments")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**⚠️ Problem signal**")
-                st.info("Sensitive information appears without brief reassurance or ownership cues.")
-            with col2:
-                st.markdown("**✅ Suggested fix**")
-                st.success("Add micro trust cues: “Reviewed by…”, “Last updated…”, and 1-line data reassurance.")
-
-            st.markdown("**Before (sample copy)**")
-            st.write("This information will be used to support your care.")
-
-            st.markdown("**After (clearer version)**")
-            st.write(
-                "This information supports your care. **We use it only for your treatment and service updates.** "
-                "Reviewed by the care team • Last updated this month."
+        with st.expander("Rewrite copy from this page"):
+            copy = st.text_area(
+                "Page copy", key="rewrite_input", height=150,
+                placeholder="Paste a paragraph from the page to get a plain-language rewrite."
             )
-            st.markdown("---")
-
-        # 4) Readability mismatch
-        if "Readability mismatch" in issue_titles:
-            st.markdown("### 4. Readability may be too complex for broad patient use")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**⚠️ Problem signal**")
-                st.info("Medical or administrative language may increase confusion and support dependence.")
-            with col2:
-                st.markdown("**✅ Suggested fix**")
-                st.success("Swap jargon for plain language and add short examples.")
+            if copy.strip():
+                st.write(rewrite_copy(copy, issue_titles))
 
-            st.markdown("**Before (sample copy)**")
-            st.write("Please submit the required documentation to facilitate claim adjudication.")
-
-            st.markdown("**After (clearer version)**")
-            st.write("Please upload your documents so we can process your insurance claim.")
-            st.markdown("---")
+# -----------------------------
+# DASHBOARD PAGE
+# -----------------------------
+with timer.span(f"render {page.lower()}"):
+    if page == "Dashboard":
+        if not urls:
+            st.info("Add pages in **Pages to review** and click **Run analysis** to generate the dashboard.")
+        else:
+            draw_dashboard()
 
-        # 5) Accessibility-aware writing
-        if "Accessibility gaps" in issue_titles:
-            st.markdown("### 5. Accessibility-aware writing structure is inconsistent")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**⚠️ Problem signal**")
-                st.info("Headings, lists, and chunking may not support quick assistive scanning.")
-            with col2:
-                st.markdown("**✅ Suggested fix**")
-                st.success("Use descriptive headings, short paragraphs, and consistent list patterns.")
-
-            st.markdown("**Writer checklist**")
-            st.write(
-                "• One idea per paragraph\n"
-                "• Use numbered steps for tasks\n"
-                "• Put critical warnings first\n"
-                "• Keep labels consistent across pages\n"
-                "• Avoid multi-clause instruction sentences"
-            )
-            st.markdown("---")
+            st.write("")
+            st.markdown("### Detailed audit table")
+            st.caption("This is your big table for grading + screenshots.")
+            render_audit_table("dashboard_table")
+
+    # -----------------------------
+    # DEEP ANALYSIS PAGE (Solutions)
+    # -----------------------------
+    elif page == "Deep Analysis":
+        if not urls:
+            st.info("Add pages in **Pages to review** and click **Run analysis** to generate deep analysis.")
+        else:
+            draw_deep_analysis()
+
+            st.markdown("### Detailed audit table")
+            render_audit_table("deep_table")
+
+    # -----------------------------
+    # PORTFOLIO PAGE (Rollup)
+    # -----------------------------
+    elif page == "Portfolio":
+        if not urls:
+            st.info("Add pages in **Pages to review** and click **Run analysis** to see the portfolio rollup.")
+        elif not st.session_state.analyses:
+            st.info("No pages have been analyzed yet.")
+        else:
+            draw_portfolio()
+
+cache_stats = get_analysis_cache().stats()
+st.sidebar.caption(
+    f"Analysis cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits · "
+    f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+)
+budget = cache_stats["memory_max_bytes"]
+st.sidebar.caption(
+    f"Shared results: {cache_stats['memory_entries']:,} pages · "
+    f"{cache_stats['memory_bytes'] / 2**20:.1f} MB" + (f" of {budget / 2**20:.0f} MB" if budget else "")
+    + f" · {cache_stats['memory_evictions']:,} evicted"
+)
+if page_source == "fetch":
+    fetch_stats = get_fetcher().stats()
+    st.sidebar.caption(
+        f"Fetcher: {fetch_stats['downloaded']} downloaded · {fetch_stats['not_modified']} unchanged (304) · "
+        f"{fetch_stats['failed']} failed · {fetch_stats['connections_reused']} connections reused"
+    )
+if SERVICE_URL:
+    service_stats = get_service_client().stats()
+    st.sidebar.caption(
+        f"Analysis service: {SERVICE_URL} · {service_stats['requests']:,} requests over "
+        f"{service_stats['connections_opened']:,} connections"
+    )
+job_stats = get_job_queue().stats()
+if job_stats["running"] or job_stats["queued"]:
+    st.sidebar.caption(f"Background jobs: {job_stats['running']} running · {job_stats['queued']} queued")
 
-        st.markdown("### Detailed audit table")
-        st.dataframe(
-            build_detailed_table(analyses),
-            use_container_width=True,
-            hide_index=True
-        )
+# -----------------------------
+# Debug: rerun timings
+# -----------------------------
+timer.finish()
+metrics_sink = get_metrics_sink()
+if metrics_sink is not None:
+    metrics_sink.write(timer, kind="script", page=page)
+if timer.profile_text:
+    st.session_state.last_profile = timer.profile_text
+
+with st.sidebar.expander("Debug: rerun timings"):
+    timings = pd.DataFrame(
+        [(name, seconds * 1000, timer.counts[name]) for name, seconds in timer.spans.items()]
+        + [("total", timer.total * 1000, 1)],
+        columns=["Span", "ms", "Calls"]
+    )
+    st.dataframe(timings, hide_index=True, width="stretch", column_config={
+        "ms": st.column_config.NumberColumn(format="%.1f")
+    })
+    st.caption("Spans can nest, e.g. a table refresh drawn while rendering the dashboard counts for both.")
+    if "last_fragment_timing" in st.session_state:
+        name, seconds = st.session_state.last_fragment_timing
+        st.caption(f"Last page switch ({name} only): {seconds * 1000:.1f} ms")
+    st.button(
+        "Profile next rerun",
+        on_click=lambda: st.session_state.update(profile_next_rerun=True),
+        help="Runs the app once more under cProfile and shows the slowest calls."
+    )
+    if "last_profile" in st.session_state:
+        st.code(st.session_state.last_profile, language=None)
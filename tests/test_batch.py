@@ -0,0 +1,35 @@
+from pentrust.analysis import analyze_pages, mock_analysis_for_url
+from pentrust.batch import analyze_batch, analyze_many
+from pentrust.store import AnalysisStore
+
+PAGES = [
+    f"https://example.org/section-{i % 7}/page-{i}" for i in range(2000)
+] + ["", "Billing page", "https://exämple.org/ünïcode", "x" * 5000]
+
+
+def test_batch_matches_scalar_analysis():
+    batch = analyze_batch(PAGES)
+    assert len(batch) == len(PAGES)
+    assert batch.analyses() == [mock_analysis_for_url(page) for page in PAGES]
+    assert analyze_many(PAGES) == analyze_pages(PAGES)
+
+
+def test_results_do_not_depend_on_the_batch():
+    whole = analyze_many(PAGES)
+    assert analyze_many(PAGES[1000:1010]) == whole[1000:1010]
+    assert analyze_many(PAGES[::-1]) == whole[::-1]
+    assert analyze_many([]) == []
+
+
+def test_column_shapes():
+    batch = analyze_batch(PAGES[:5])
+    assert batch.scores.shape == (5, 4)
+    assert batch.issues.shape == (5, 2)
+    assert (batch.issues[:, 0] != batch.issues[:, 1]).all()
+
+
+def test_store_extend_batch_matches_dict_path():
+    columnar = AnalysisStore()
+    columnar.extend_batch(analyze_batch(PAGES))
+    assert dict(columnar.items()) == dict(zip(PAGES, analyze_pages(PAGES)))
+    assert columnar.fingerprint == AnalysisStore(zip(PAGES, analyze_pages(PAGES))).fingerprint
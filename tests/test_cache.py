@@ -0,0 +1,121 @@
+import sys
+
+from pentrust.batch import analyze_many
+from pentrust.cache import ENTRY_OVERHEAD, PAYLOAD_OVERHEAD, AnalysisCache, ResultStore, SQLiteStore
+from pentrust.analysis import page_digest
+
+PAGES = [f"https://example.org/page-{i}" for i in range(100)]
+ANALYSES = analyze_many(PAGES)
+
+
+def entry_bytes(store, analysis):
+    return ENTRY_OVERHEAD + sys.getsizeof(store._pack(analysis)) + PAYLOAD_OVERHEAD
+
+
+def test_round_trip_returns_fresh_copies():
+    store = ResultStore()
+    store.put(("a", "v1"), ANALYSES[0])
+    got = store.get(("a", "v1"))
+    assert got == ANALYSES[0]
+    got["scores"]["Clarity"] = -1
+    assert store.get(("a", "v1")) == ANALYSES[0]
+    assert store.get(("a", "v2")) is None
+
+
+def test_byte_budget_evicts_least_recently_used():
+    probe = ResultStore()
+    size = entry_bytes(probe, ANALYSES[0])
+    store = ResultStore(max_entries=10**6, max_bytes=10 * size)
+    store.put_many(((page, "v"), analysis) for page, analysis in zip(PAGES[:10], ANALYSES))
+    assert len(store) == 10 and store.evictions == 0
+    assert store.nbytes <= store.max_bytes
+
+    store.get((PAGES[0], "v"))  # now the most recently used
+    store.put((PAGES[10], "v"), ANALYSES[10])
+    assert store.evictions == 1
+    assert store.get((PAGES[1], "v")) is None
+    assert store.get((PAGES[0], "v")) == ANALYSES[0]
+
+    store.put_many(((page, "v"), analysis) for page, analysis in zip(PAGES, ANALYSES))
+    assert len(store) == 10 and store.nbytes <= store.max_bytes
+    assert [store.get((page, "v")) for page in PAGES[-10:]] == ANALYSES[-10:]
+
+    store.clear()
+    assert store.stats() == {"entries": 0, "unique_results": 0, "bytes": 0,
+                             "max_bytes": store.max_bytes, "evictions": 0}
+
+
+def test_identical_payloads_are_stored_and_counted_once():
+    store = ResultStore()
+    for i in range(50):
+        store.put((f"key-{i}", "v"), ANALYSES[0])
+    stats = store.stats()
+    assert stats["entries"] == 50 and stats["unique_results"] == 1
+    assert stats["bytes"] == 50 * ENTRY_OVERHEAD + entry_bytes(store, ANALYSES[0]) - ENTRY_OVERHEAD
+
+    for i in range(50):
+        store.put((f"key-{i}", "v"), ANALYSES[i])
+    assert store.stats()["unique_results"] == len({str(a) for a in ANALYSES[:50]})
+    store.clear()
+    assert store.stats()["bytes"] == 0
+
+
+def test_expired_entries_are_dropped():
+    store = ResultStore(ttl_seconds=-1)
+    store.put(("a", "v"), ANALYSES[0])
+    assert store.get(("a", "v")) is None
+    assert len(store) == 0
+
+
+def test_cache_tiers(tmp_path):
+    calls = []
+
+    def analyze(pages):
+        if pages:
+            calls.append(len(pages))
+        return analyze_many(pages)
+
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(path, analyze_many=analyze)
+    assert cache.get_or_compute_many(PAGES + PAGES[:5]) == ANALYSES + ANALYSES[:5]
+    assert calls == [100]
+    assert cache.get_or_compute_many(PAGES[:20]) == ANALYSES[:20]
+    assert cache.stats()["memory_hits"] == 20
+
+    reopened = AnalysisCache(path, analyze_many=analyze)
+    assert reopened.get_or_compute_many(PAGES[:30]) == ANALYSES[:30]
+    assert calls == [100] and reopened.stats()["disk_hits"] == 30
+    assert reopened.lookup([page_digest(PAGES[0]), "unknown"]) == {page_digest(PAGES[0]): ANALYSES[0]}
+
+    other_version = AnalysisCache(path, version="other", analyze_many=analyze)
+    other_version.get_or_compute_many(PAGES[:3])
+    assert calls == [100, 3]
+
+
+def test_disk_tier_keeps_its_row_budget(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteStore(path, max_rows=50)
+    for start in range(0, 100, 10):
+        store.put_many(zip(PAGES[start:start + 10], ANALYSES[start:start + 10]), "v")
+    assert len(store) <= 50 and store.evictions == 100 - len(store)
+    # The oldest written rows go first.
+    assert set(store.get_many(PAGES[-10:], "v")) == set(PAGES[-10:])
+    assert store.get_many(PAGES[:10], "v") == {}
+    store.close()
+
+    reopened = SQLiteStore(path, max_rows=20)
+    assert len(reopened) == 18
+
+
+def test_disk_tier_expires_old_rows(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteStore(path)
+    store.put_many(zip(PAGES[:10], ANALYSES[:10]), "v")
+    store.close()
+
+    expiring = SQLiteStore(path, max_age_seconds=-1)
+    assert len(expiring) == 0 and expiring.evictions == 10
+    expiring.put_many(zip(PAGES[:10], ANALYSES[:10]), "v")
+    assert expiring.get_many(PAGES[:10], "v") == {}
+    expiring.clear()
+    assert expiring.evictions == 0
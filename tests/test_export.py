@@ -0,0 +1,124 @@
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+import pytest
+
+from pentrust import export
+from pentrust.batch import analyze_many
+from pentrust.export import EXPORT_COLUMNS, SCORE_COLUMNS, open_export, store_frames, write_export
+from pentrust.store import AnalysisStore
+from pentrust.table import build_detailed_table
+
+PAGES = [f"https://example.org/page-{i}" for i in range(250)]
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+@pytest.fixture
+def store():
+    return AnalysisStore(zip(PAGES, analyze_many(PAGES)))
+
+
+def export_bytes(frames, fmt, columns=EXPORT_COLUMNS):
+    out = io.BytesIO()
+    writer = open_export(fmt, out, columns)
+    for frame in frames:
+        writer.write(frame)
+    writer.close()
+    return out.getvalue()
+
+
+def read_xlsx(data):
+    """Each sheet as a list of rows (cell text, or None for an empty cell)."""
+    sheets = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = sorted(n for n in archive.namelist() if n.startswith("xl/worksheets/"))
+        for name in sorted(names, key=lambda n: int(n[len("xl/worksheets/sheet"):-4])):
+            rows = []
+            for row in ET.fromstring(archive.read(name)).iter(f"{_MAIN}row"):
+                cells = {}
+                for cell in row:
+                    column = cell.get("r").rstrip("0123456789")
+                    text = cell.find(f"{_MAIN}is/{_MAIN}t")
+                    cells[column] = text.text if text is not None else cell.find(f"{_MAIN}v").text
+                rows.append([cells.get(export._column_letter(i)) for i in range(len(EXPORT_COLUMNS))])
+            sheets.append(rows)
+    return sheets
+
+
+def test_store_frames_match_the_audit_table(store):
+    frames = list(store_frames(store, chunk_rows=100))
+    assert [len(f) for f in frames] == [100, 100, 50]
+    frame = pd.concat(frames, ignore_index=True)
+    expected = build_detailed_table(dict(zip(PAGES, analyze_many(PAGES))))
+    for column in ("Page / label", *SCORE_COLUMNS, "Risk level"):
+        assert frame[column].tolist() == expected[column].tolist()
+    assert frame["Clarity trend"].tolist() == [a["trend"] for a in analyze_many(PAGES)]
+
+
+def test_parquet_round_trip(store):
+    data = export_bytes(store_frames(store, chunk_rows=100), "parquet")
+    frame = pd.read_parquet(io.BytesIO(data))
+    expected = pd.concat(store_frames(store), ignore_index=True)
+    assert list(frame.columns) == EXPORT_COLUMNS
+    assert len(frame) == len(PAGES)
+    for column in SCORE_COLUMNS:
+        assert frame[column].dtype == "Int64"
+        assert frame[column].tolist() == expected[column].tolist()
+    assert [list(v) for v in frame["Clarity trend"]] == expected["Clarity trend"].tolist()
+    assert [list(v) for v in frame["Issue descriptions"]] == expected["Issue descriptions"].tolist()
+
+
+def test_parquet_keeps_int_columns_with_missing_scores(store):
+    # As the CLI writes them: duplicates are rows with a page and no scores.
+    columns = EXPORT_COLUMNS + ["Duplicate of"]
+    chunk = next(store_frames(store, chunk_rows=3))
+    duplicates = pd.DataFrame.from_records(
+        [{"Page / label": "https://example.org/page-0/", "Duplicate of": PAGES[0]}], columns=columns
+    )
+    data = export_bytes([pd.concat([chunk, duplicates], ignore_index=True), duplicates], "parquet", columns)
+    frame = pd.read_parquet(io.BytesIO(data))
+    assert frame["Clarity score"].dtype == "Int64"
+    assert frame["Clarity score"].isna().tolist() == [False, False, False, True, True]
+    assert frame["Clarity score"][:3].tolist() == chunk["Clarity score"].tolist()
+
+
+def test_csv_round_trip(store):
+    data = export_bytes(store_frames(store, chunk_rows=100), "csv")
+    frame = pd.read_csv(io.BytesIO(data))
+    expected = pd.concat(store_frames(store), ignore_index=True)
+    assert list(frame.columns) == EXPORT_COLUMNS
+    assert frame["Clarity score"].tolist() == expected["Clarity score"].tolist()
+    assert frame["Clarity trend"].tolist() == [", ".join(map(str, t)) for t in expected["Clarity trend"]]
+
+
+def test_xlsx_round_trip(store):
+    (sheet,) = read_xlsx(export_bytes(store_frames(store, chunk_rows=100), "xlsx"))
+    expected = pd.concat(store_frames(store), ignore_index=True)
+    assert sheet[0] == EXPORT_COLUMNS
+    assert len(sheet) == len(PAGES) + 1
+    clarity = EXPORT_COLUMNS.index("Clarity score")
+    assert [int(row[clarity]) for row in sheet[1:]] == expected["Clarity score"].tolist()
+    assert [row[0] for row in sheet[1:]] == PAGES
+
+
+def test_xlsx_continues_on_further_sheets(store, monkeypatch):
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 101)
+    sheets = read_xlsx(export_bytes(store_frames(store, chunk_rows=64), "xlsx"))
+    assert [len(sheet) for sheet in sheets] == [101, 101, 51]
+    assert all(sheet[0] == EXPORT_COLUMNS for sheet in sheets)
+    assert [row[0] for sheet in sheets for row in sheet[1:]] == PAGES
+
+
+def test_xlsx_cells_are_escaped():
+    frame = pd.DataFrame({"Page / label": ["<a & b>\x01"], "Clarity score": [None]})
+    (sheet,) = read_xlsx(export_bytes([frame], "xlsx"))
+    assert sheet[1][0] == "<a & b>"
+    assert sheet[1][1] is None
+
+
+def test_empty_export_has_a_header():
+    for fmt in ("csv", "parquet"):
+        assert write_export([], fmt, io.BytesIO()) == 0
+    assert read_xlsx(export_bytes([], "xlsx")) == [[EXPORT_COLUMNS]]
@@ -0,0 +1,196 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pentrust import fetch
+from pentrust.cache import AnalysisCache
+from pentrust.batch import analyze_many
+from pentrust.fetch import Fetcher, ValidatorStore, fetch_and_analyze
+
+
+class _Site(BaseHTTPRequestHandler):
+    """Stand-in site: /page-N answers with an ETag and honours If-None-Match;
+    /slow sleeps first; /busy answers 503 with a long Retry-After once;
+    /bad-length sends a malformed Content-Length."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+            server.connections.add(self.client_address)
+        if self.path.startswith("/slow"):
+            time.sleep(server.delay)
+        if self.path == "/busy" and server.busy:
+            server.busy -= 1
+            return self._send(503, b"", {"Retry-After": "3600"})
+        if self.path == "/bad-length":
+            self.send_response(200)
+            self.send_header("Content-Length", server.bad_length)
+            self.end_headers()
+            return
+        etag = f'"{self.path}-v{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", {"ETag": etag})
+        body = f"<html><body><h1>{self.path}</h1><p>Version {server.version}.</p></body></html>".encode()
+        self._send(200, body, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.connections = set()
+    server.version = 1
+    server.delay = 0.0
+    server.busy = 0
+    server.bad_length = "-1"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = Fetcher(validators=ValidatorStore(), rate_per_host=0, retries=1, timeout=5)
+    yield fetcher
+    fetcher.close()
+
+
+def test_download_extracts_text(site, fetcher):
+    (result,) = fetcher.fetch_many([f"{site.url}/page-1"])
+    assert result.ok and result.status == 200
+    assert result.text == "/page-1\nVersion 1."
+    assert result.etag == '"/page-1-v1"'
+
+
+def test_conditional_get_answers_not_modified(site, fetcher):
+    urls = [f"{site.url}/page-{i}" for i in range(5)]
+    first = fetcher.fetch_many(urls)
+    second = fetcher.fetch_many(urls)
+
+    assert all(r.status == 304 and r.not_modified and r.text == "" for r in second)
+    assert [r.digest for r in second] == [r.digest for r in first]
+    assert sorted(site.requests[5:]) == [(f"/page-{i}", f'"/page-{i}-v1"') for i in range(5)]
+    assert fetcher.stats()["downloaded"] == 5 and fetcher.stats()["not_modified"] == 5
+
+    site.version = 2
+    third = fetcher.fetch_many(urls)
+    assert all(r.status == 200 and "Version 2." in r.text for r in third)
+    # Unconditional fetches send no validators.
+    fetcher.fetch_many(urls[:1], conditional=False)
+    assert site.requests[-1][1] is None
+
+
+def test_not_modified_pages_reuse_cached_analyses(site, fetcher):
+    cache = AnalysisCache()
+    urls = [f"{site.url}/page-{i}" for i in range(3)]
+    first = fetch_and_analyze(fetcher, urls, analyze_many, cache)
+    second = fetch_and_analyze(fetcher, urls, analyze_many, cache)
+
+    assert all(result.not_modified for result, _ in second)
+    assert [analysis for _, analysis in second] == [analysis for _, analysis in first]
+
+
+def test_keep_alive_connections_are_reused(site):
+    fetcher = Fetcher(rate_per_host=0, per_host=1, concurrency=1)
+    try:
+        for i in range(3):
+            results = fetcher.fetch_many([f"{site.url}/page-{i}-{j}" for j in range(4)])
+            assert all(r.ok for r in results)
+        stats = fetcher.stats()
+    finally:
+        fetcher.close()
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 11
+    assert len(site.connections) == 1
+
+
+def test_stale_pooled_connection_is_replaced(site):
+    fetcher = Fetcher(rate_per_host=0, retries=0)
+    try:
+        assert fetcher.fetch_many([f"{site.url}/page-1"])[0].ok
+        # Restart the listener's side of the idle connection.
+        site.shutdown()
+        site.server_close()
+        restarted = ThreadingHTTPServer(site.server_address, _Site)
+        restarted.__dict__.update({k: v for k, v in site.__dict__.items() if k in (
+            "lock", "requests", "connections", "version", "delay", "busy")})
+        thread = threading.Thread(target=restarted.serve_forever, daemon=True)
+        thread.start()
+        try:
+            assert fetcher.fetch_many([f"{site.url}/page-2"])[0].ok
+        finally:
+            restarted.shutdown()
+            restarted.server_close()
+        assert fetcher.stats()["failed"] == 0
+    finally:
+        fetcher.close()
+
+
+def test_timeout_does_not_count_time_queued_for_the_host(site):
+    site.delay = 0.3
+    fetcher = Fetcher(rate_per_host=0, per_host=1, retries=0, timeout=0.5)
+    try:
+        started = time.monotonic()
+        results = fetcher.fetch_many([f"{site.url}/slow?{i}" for i in range(4)])
+        elapsed = time.monotonic() - started
+    finally:
+        fetcher.close()
+    # One request at a time: the last waits ~0.9s for its turn, longer than
+    # the timeout, but its own exchange is quick.
+    assert all(r.ok for r in results), [r.error for r in results]
+    assert elapsed >= 1.2
+
+
+def test_slow_server_times_out(site):
+    site.delay = 1.0
+    fetcher = Fetcher(rate_per_host=0, retries=0, timeout=0.2)
+    try:
+        (result,) = fetcher.fetch_many([f"{site.url}/slow"])
+    finally:
+        fetcher.close()
+    assert not result.ok and "Timeout" in result.error
+
+
+def test_retry_after_is_capped(site, monkeypatch):
+    monkeypatch.setattr(fetch, "MAX_BACKOFF_SECONDS", 0.1)
+    site.busy = 1
+    fetcher = Fetcher(rate_per_host=0, retries=1)
+    try:
+        started = time.monotonic()
+        (result,) = fetcher.fetch_many([f"{site.url}/busy"])
+        elapsed = time.monotonic() - started
+        assert fetcher.stats()["retried"] == 1
+    finally:
+        fetcher.close()
+    assert result.ok and result.status == 200
+    assert elapsed < 5
+
+
+@pytest.mark.parametrize("length", ["-1", "12abc", ""])
+def test_bad_content_length_is_retried_as_a_fetch_error(site, fetcher, length):
+    site.bad_length = length
+    (result,) = fetcher.fetch_many([f"{site.url}/bad-length"])
+    assert not result.ok
+    assert result.error.startswith("FetchError: bad Content-Length")
+    assert [path for path, _ in site.requests] == ["/bad-length"] * 2
@@ -0,0 +1,88 @@
+import multiprocessing
+
+from pentrust.analysis import SCORE_NAMES
+from pentrust.history import HistoryStore
+
+
+def analysis(score):
+    return {"scores": {name: score for name in SCORE_NAMES}}
+
+
+def clarity(store, page):
+    return [int(row["scores"][0]) for row in store.trend(page)]
+
+
+def test_trend_follows_each_pages_chain(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append([("a", analysis(10)), ("b", analysis(50))], when=1.0)
+    store.append([("a", analysis(11))], when=2.0)
+    store.append([("c", analysis(70)), ("a", analysis(12)), ("b", analysis(51))], when=3.0)
+
+    assert clarity(store, "a") == [10, 11, 12]
+    assert clarity(store, "b") == [50, 51]
+    assert clarity(store, "c") == [70]
+    assert clarity(store, "missing") == []
+    assert store.trend("a")["time"].tolist() == [1.0, 2.0, 3.0]
+    assert store.points("a") == 3
+    assert len(store) == 6
+
+
+def test_trend_limit_keeps_the_latest_points(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for score in range(40):
+        store.append([("a", analysis(score)), ("b", analysis(100 - score))])
+
+    assert clarity(store, "a") == list(range(40))[-30:]
+    assert [int(r["scores"][0]) for r in store.trend("b", limit=3)] == [63, 62, 61]
+
+
+def test_reopened_store_continues_chains(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append([("a", analysis(10))])
+    store.close()
+    # A torn record left by a crashed writer is dropped on the next append.
+    with open(tmp_path / "history.bin", "ab") as fh:
+        fh.write(b"\0" * 5)
+
+    store = HistoryStore(str(tmp_path))
+    store.append([("a", analysis(20))])
+    assert clarity(store, "a") == [10, 20]
+    assert len(store) == 2
+
+
+def test_writers_sharing_a_directory(tmp_path):
+    first = HistoryStore(str(tmp_path))
+    second = HistoryStore(str(tmp_path))
+    first.append([("A", analysis(10))])
+    second.append([("B", analysis(90))])
+    first.append([("A", analysis(11))])
+
+    for store in (first, second):
+        assert clarity(store, "A") == [10, 11]
+        assert clarity(store, "B") == [90]
+
+
+def _append_many(path, page, count):
+    store = HistoryStore(path)
+    for score in range(count):
+        store.append([(page, analysis(score)), ("shared", analysis(score))])
+    store.close()
+
+
+def test_concurrent_processes_keep_chains_intact(tmp_path):
+    path = str(tmp_path)
+    workers = [
+        multiprocessing.get_context("spawn").Process(target=_append_many, args=(path, f"p{i}", 50))
+        for i in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    store = HistoryStore(path)
+    for i in range(4):
+        assert [int(r["scores"][0]) for r in store.trend(f"p{i}", limit=50)] == list(range(50))
+    assert store.points("shared") == 200
+    assert len(store) == 400
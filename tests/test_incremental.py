@@ -0,0 +1,72 @@
+"""AuditTable and PortfolioRollup follow a store incrementally; after any
+sequence of changes they must match a rebuild from scratch."""
+import random
+
+import pandas as pd
+import pytest
+
+from pentrust.batch import analyze_batch, analyze_many
+from pentrust.rollup import PortfolioRollup
+from pentrust.store import AnalysisStore
+from pentrust.table import AuditTable
+
+POOL = [f"https://example.org/page-{i}" for i in range(3000)]
+ANALYSES = analyze_many(POOL)
+
+
+def mutate(store, rng):
+    """One random change, as the app makes them."""
+    op = rng.choice(["append", "append", "replace", "replace", "batch", "remove", "single"])
+    if op == "append":
+        pages = rng.sample(POOL, rng.randint(1, 200))
+        store.update((page, ANALYSES[POOL.index(page)]) for page in pages)
+    elif op == "replace" and len(store):
+        # Existing pages get another page's analysis (a re-analysis with new copy).
+        for page in rng.sample(store.pages, min(len(store), rng.randint(1, 30))):
+            store[page] = rng.choice(ANALYSES)
+    elif op == "batch":
+        start = rng.randrange(len(POOL))
+        store.extend_batch(analyze_batch(POOL[start:start + rng.randint(1, 300)]))
+    elif op == "remove" and len(store) and rng.random() < 0.3:
+        store.remove_many(rng.sample(store.pages, min(len(store), rng.randint(1, 20))))
+    elif op == "single":
+        page = rng.choice(POOL)
+        store[page] = rng.choice(ANALYSES)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_audit_table_matches_rebuild(seed):
+    rng = random.Random(seed)
+    store = AnalysisStore()
+    table = AuditTable()
+    for _ in range(60):
+        for _ in range(rng.randint(1, 3)):
+            mutate(store, rng)
+        incremental = table.frame(store)
+        pd.testing.assert_frame_equal(
+            incremental.reset_index(drop=True), AuditTable().frame(store).reset_index(drop=True)
+        )
+        query = dict(sort_by="Trust score", risk_levels=["High", "Medium"], page=1, page_size=25)
+        fresh_index = AuditTable().index(store)
+        assert table.index(store).query(**query)[0].equals(fresh_index.query(**query)[0])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_portfolio_rollup_matches_rebuild(seed):
+    rng = random.Random(seed)
+    store = AnalysisStore()
+    rollup = PortfolioRollup(worst_n=5)
+    for _ in range(80):
+        for _ in range(rng.randint(1, 3)):
+            mutate(store, rng)
+        assert rollup.summary(store) == PortfolioRollup(worst_n=5).summary(store)
+
+
+def test_unchanged_store_reuses_the_cached_result():
+    store = AnalysisStore(zip(POOL[:100], ANALYSES))
+    table, rollup = AuditTable(), PortfolioRollup()
+    assert table.frame(store) is table.frame(store)
+    assert rollup.summary(store) is rollup.summary(store)
+    # A new store with the same content is still a different store.
+    other = AnalysisStore(zip(POOL[:100], ANALYSES))
+    assert rollup.summary(other) == rollup.summary(store)
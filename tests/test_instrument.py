@@ -0,0 +1,38 @@
+import json
+
+from pentrust.instrument import MetricsSink, RerunTimer
+
+
+def _timer(span):
+    timer = RerunTimer()
+    with timer.span(span):
+        pass
+    timer.finish()
+    return timer
+
+
+def test_fragment_reruns_get_their_own_series(tmp_path):
+    path = str(tmp_path / "reruns.prom")
+    sink = MetricsSink(path)
+    sink.write(_timer("analyze"), kind="script", page="Dashboard")
+    for _ in range(2):
+        sink.write(_timer("page panel"), kind="fragment", page="Dashboard", fragment="page panel")
+    counts = {}
+    for line in open(path, encoding="utf-8"):
+        if line.startswith("pentrust_rerun_span_seconds_count"):
+            series, value = line.rsplit(" ", 1)
+            counts[series] = int(value)
+    assert counts == {
+        'pentrust_rerun_span_seconds_count{span="analyze",kind="script",page="Dashboard"}': 1,
+        'pentrust_rerun_span_seconds_count{span="total",kind="script",page="Dashboard"}': 1,
+        'pentrust_rerun_span_seconds_count{span="page panel",fragment="page panel",kind="fragment",page="Dashboard"}': 2,
+        'pentrust_rerun_span_seconds_count{span="total",fragment="page panel",kind="fragment",page="Dashboard"}': 2,
+    }
+
+
+def test_jsonl_keeps_labels(tmp_path):
+    path = str(tmp_path / "reruns.jsonl")
+    MetricsSink(path).write(_timer("analyze"), kind="script", page="Deep Analysis")
+    line = json.loads(open(path, encoding="utf-8").read())
+    assert line["kind"] == "script" and line["page"] == "Deep Analysis"
+    assert set(line["spans"]) == {"analyze"}
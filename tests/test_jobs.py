@@ -0,0 +1,89 @@
+import random
+import threading
+import time
+
+from pentrust.jobs import JobQueue
+
+
+def wait(job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not job.active
+
+
+def test_job_analyzes_every_page_in_order():
+    queue = JobQueue(workers=2)
+    pages = [f"p{i}" for i in range(1000)]
+    job = queue.submit("a", pages, list, chunk_size=64)
+    wait(job)
+    assert job.status == "done"
+    assert [page for chunk in job.drain() for page in chunk] == pages
+    assert job.drain() == []
+
+
+def test_taken_pages_are_analyzed_exactly_once():
+    pages = list(range(20_000))
+    analyzed = []
+    lock = threading.Lock()
+
+    def work(chunk):
+        with lock:
+            analyzed.extend(chunk)
+        return chunk
+
+    queue = JobQueue(workers=4)
+    job = queue.submit("a", pages, work, chunk_size=50, skip=[3, 4])
+    taken = {3, 4}
+    rng = random.Random(1)
+    while job.active:
+        position = rng.randrange(len(pages))
+        if job.take(position):
+            taken.add(position)
+    wait(job)
+
+    assert len(analyzed) == len(set(analyzed))
+    assert not taken & set(analyzed)
+    assert taken | set(analyzed) == set(pages)
+
+
+def test_cancel_stops_between_chunks():
+    started = threading.Event()
+    release = threading.Event()
+
+    def work(chunk):
+        started.set()
+        release.wait(5)
+        return chunk
+
+    queue = JobQueue(workers=1)
+    job = queue.submit("a", list(range(100)), work, chunk_size=10)
+    assert started.wait(5)
+    job.cancel()
+    assert job.status == "running"  # the chunk in flight finishes first
+    release.set()
+    wait(job)
+    assert job.status == "cancelled"
+    assert len(job.drain()) == 1
+
+
+def test_owners_take_turns():
+    order = []
+
+    def work(owner):
+        def run(chunk):
+            order.append(owner)
+            time.sleep(0.001)
+            return chunk
+        return run
+
+    gate = threading.Event()
+    queue = JobQueue(workers=1)
+    blocker = queue.submit("blocker", [0], lambda chunk: gate.wait(5), chunk_size=1)
+    long = queue.submit("long", list(range(100)), work("long"), chunk_size=10)
+    short = queue.submit("short", list(range(10)), work("short"), chunk_size=10)
+    gate.set()
+    for job in (blocker, long, short):
+        wait(job)
+    # The short job's single chunk runs right after the long job's first.
+    assert order[:2] == ["long", "short"]
@@ -0,0 +1,53 @@
+from pentrust.analysis import page_digest
+from pentrust.batch import analyze_many
+from pentrust.reaudit import AuditManifest, format_counts, reaudit_batch
+from pentrust.urls import SeenPages
+
+
+def items(pages):
+    return [(page, page_digest(content), content) for page, content in pages.items()]
+
+
+def test_only_new_changed_and_stale_pages_are_analyzed():
+    manifest = AuditManifest()
+    calls = []
+
+    def analyze(contents):
+        calls.append(list(contents))
+        return analyze_many(contents)
+
+    first = {f"p{i}": f"copy {i}" for i in range(6)}
+    analyses, diff = reaudit_batch(manifest, items(first), analyze, "v1")
+    assert diff.counts()["added"] == 6 and analyses == analyze_many(list(first.values()))
+
+    second = {**first, "p1": "new copy", "p9": "copy 9"}
+    calls.clear()
+    analyses, diff = reaudit_batch(manifest, items(second), analyze, "v1")
+    assert diff.added == ["p9"] and diff.changed == ["p1"] and len(diff.unchanged) == 5
+    assert sorted(calls[0]) == ["copy 9", "new copy"]
+    # Unchanged pages get their recorded analysis back.
+    assert analyses == analyze_many(list(second.values()))
+
+    _, diff = reaudit_batch(manifest, items(second), analyze, "v2")
+    assert len(diff.stale) == 7
+
+
+def test_removed_pages():
+    manifest = AuditManifest()
+    pages = {f"p{i}": f"copy {i}" for i in range(1200)}
+    reaudit_batch(manifest, items(pages), analyze_many, "v1")
+    still = [f"p{i}" for i in range(1200) if i % 3]
+
+    seen = SeenPages(max_memory=100)
+    seen.add_many(still)
+    expected = [f"p{i}" for i in range(1200) if not i % 3]
+    assert sorted(manifest.removed(seen)) == sorted(expected)
+    assert sorted(manifest.removed(still)) == sorted(expected)
+    manifest.forget(expected)
+    assert len(manifest) == len(still)
+
+
+def test_format_counts():
+    assert format_counts({"added": 1200, "removed": 2}) == (
+        "1,200 added · 0 changed · 0 stale · 0 unchanged · 2 removed"
+    )
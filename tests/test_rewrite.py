@@ -0,0 +1,47 @@
+from pentrust.rewrite import ISSUE_GUIDES, plain_language, rewrite_copy, rewrite_sentence
+
+
+def test_dense_instruction_becomes_steps():
+    guide = ISSUE_GUIDES["Dense instructions"]
+    assert rewrite_copy(guide.before, ["Dense instructions"]) == (
+        "To complete your appointment request:\n\n"
+        "1. Review the following detailed instructions.\n"
+        "2. Ensure you have your insurance information ready.\n"
+        "3. Confirm your provider preference before proceeding."
+    )
+
+
+def test_jargon_is_replaced():
+    rewritten = rewrite_copy(ISSUE_GUIDES["Readability mismatch"].before, ["Readability mismatch"])
+    assert "adjudication" not in rewritten
+    assert "documentation" not in rewritten
+
+
+def test_plain_english_is_left_alone():
+    for sentence in (
+        "Please place a bid on the item.",
+        "The premium service includes a benign reminder.",
+        "Daily water intake matters for compliance with the rules.",
+        "We will terminate the session and remit the balance.",
+        "Early intervention helps.",
+    ):
+        assert plain_language(sentence) == sentence
+    # Dosing abbreviations still read as such in capitals.
+    assert plain_language("Take one tablet BID, or PRN for pain.") == (
+        "Take one tablet twice a day, or as needed for pain."
+    )
+
+
+def test_missing_cues_get_placeholders():
+    assert "**Next:**" in rewrite_copy(ISSUE_GUIDES["Unclear next steps"].before, ["Unclear next steps"])
+    assert "Reviewed by" in rewrite_copy(ISSUE_GUIDES["Weak micro trust"].before, ["Weak micro trust"])
+    # Copy that already has a next step is left alone.
+    assert "**Next:**" not in rewrite_copy("Next, upload your card.", ["Unclear next steps"])
+
+
+def test_sentence_rewrites_are_memoized():
+    rewrite_sentence.cache_clear()
+    for _ in range(3):
+        rewrite_copy("Prior authorization may be required. Prior authorization may be required.")
+    info = rewrite_sentence.cache_info()
+    assert info.misses == 1 and info.hits == 5
@@ -0,0 +1,167 @@
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pentrust import cli, service
+from pentrust.analyzers import ANALYZERS, Analyzer
+from pentrust.batch import analyze_many
+from pentrust.service import AnalysisEngine, ServiceClient, ServiceError, make_server, remote_analyzer
+from pentrust.table import build_detailed_table
+
+PAGES = [f"https://example.org/page-{i}" for i in range(300)]
+
+
+def _start(url, engine):
+    server = make_server(url, engine)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def engine():
+    return AnalysisEngine(cache_path="")
+
+
+@pytest.fixture
+def server(engine):
+    server = _start("http://127.0.0.1:0", engine)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def slow_mock(monkeypatch):
+    """The mock analyzer, slowed down so concurrent requests overlap."""
+    calls = []
+
+    def analyze(pages):
+        calls.append(len(pages))
+        time.sleep(0.2)
+        return analyze_many(pages)
+
+    mock = ANALYZERS["mock"]
+    monkeypatch.setattr(service, "get_analyzer", lambda name: Analyzer("mock", mock.version, analyze, ""))
+    return calls
+
+
+def test_results_match_local_analysis(server):
+    client = ServiceClient(server.url, batch_size=128)
+    try:
+        assert client.analyze_many(PAGES) == analyze_many(PAGES)
+        table = client.build_detailed_table(PAGES[:20])
+        assert table.equals(build_detailed_table(dict(zip(PAGES[:20], analyze_many(PAGES[:20])))))
+        # Three batches over one kept-alive connection.
+        assert client.stats() == {"requests": 4, "connections_opened": 1}
+    finally:
+        client.close()
+
+
+def test_concurrent_requests_are_coalesced(server, engine, slow_mock):
+    client = ServiceClient(server.url)
+    barrier = threading.Barrier(8)
+    results = [None] * 8
+
+    def request(i):
+        barrier.wait()
+        results[i] = client.analyze_many(PAGES)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+
+    expected = analyze_many(PAGES)
+    assert all(result == expected for result in results)
+    # Every page was computed once; the other requests waited for it or
+    # found it cached.
+    stats = engine.stats()
+    assert stats["analyzed"] == len(PAGES) == sum(slow_mock)
+    assert stats["coalesced"] > 0
+    assert stats["requests"] == 8 and stats["in_flight"] == 0
+
+
+def test_clients_keep_no_disk_cache(server, engine, tmp_path):
+    # The service owns the shared cache; a client's --cache stays unused.
+    pages = tmp_path / "pages.txt"
+    pages.write_text("\n".join(PAGES[:20]) + "\n", encoding="utf-8")
+    cache_path = tmp_path / "cache.db"
+    output = tmp_path / "results.jsonl"
+    cli.main(["--service", server.url, "--cache", str(cache_path), "-o", str(output), str(pages)])
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 20
+    assert not cache_path.exists()
+    assert engine.stats()["pages"] == 20
+
+
+def test_unix_socket(tmp_path, engine):
+    url = f"unix:{tmp_path / 'analysis.sock'}"
+    server = _start(url, engine)
+    client = ServiceClient(url)
+    try:
+        analyzer = remote_analyzer(client, "mock")
+        assert analyzer.version == ANALYZERS["mock"].version
+        assert analyzer.analyze_many(PAGES[:10]) == analyze_many(PAGES[:10])
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def _post(server, path, body, headers):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        conn.request("POST", path, body, headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_invalid_content_length_is_a_bad_request(server, length):
+    status, payload = _post(server, "/analyze", b"{}", {"Content-Length": length})
+    assert status == 400 and "Content-Length" in payload["error"]
+
+
+def test_invalid_requests(server):
+    client = ServiceClient(server.url)
+    try:
+        with pytest.raises(ServiceError, match="HTTP 400"):
+            client.analyze_many(["a"], analyzer="nope")
+        with pytest.raises(ServiceError, match="HTTP 404"):
+            client._request("GET", "/nowhere")
+    finally:
+        client.close()
+
+
+class _Proxy(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = b"<html><body>502 Bad Gateway</body></html>"
+        self.send_response(502)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_non_json_error_is_a_service_error():
+    proxy = ThreadingHTTPServer(("127.0.0.1", 0), _Proxy)
+    threading.Thread(target=proxy.serve_forever, daemon=True).start()
+    client = ServiceClient(f"http://127.0.0.1:{proxy.server_address[1]}")
+    try:
+        with pytest.raises(ServiceError, match="HTTP 502: <html><body>502 Bad Gateway"):
+            client.analyze_many(["a"])
+    finally:
+        client.close()
+        proxy.shutdown()
+        proxy.server_close()
@@ -0,0 +1,43 @@
+import pytest
+
+from pentrust.urls import PageIndex, SeenPages, canonical_url
+
+
+@pytest.mark.parametrize("spelling", [
+    "https://Example.org/a/",
+    "HTTPS://example.org:443/a",
+    "https://example.org/a?utm_source=x&gclid=1",
+    "https://example.org/a#top",
+    "  https://example.org/a  ",
+])
+def test_spellings_share_a_canonical_url(spelling):
+    assert canonical_url(spelling) == "https://example.org/a"
+
+
+def test_canonical_url_keeps_significant_parts():
+    assert canonical_url("https://example.org/") == "https://example.org/"
+    assert canonical_url("https://example.org/a?b=2&a=1") == "https://example.org/a?b=2&a=1"
+    assert canonical_url("http://example.org:8080/a") == "http://example.org:8080/a"
+    assert canonical_url(" Billing page ") == "Billing page"
+
+
+def test_page_index_collects_aliases():
+    index = PageIndex(["https://example.org/a", "https://example.org/a/", "b", "https://EXAMPLE.org/a"])
+    assert index.pages == ["https://example.org/a", "b"]
+    assert index.duplicates == 2
+    assert index.aliases == {"https://example.org/a": ("https://example.org/a/", "https://EXAMPLE.org/a")}
+
+
+@pytest.mark.parametrize("max_memory", [10**6, 7])
+def test_seen_pages(max_memory):
+    seen = SeenPages(max_memory)
+    pages = [f"p{i}" for i in range(50)]
+    assert seen.add_many(pages[:30]) == [True] * 30
+    assert seen.add_many(["p1", "new", "new", "p29", "p30"]) == [False, True, False, False, True]
+    assert seen.add_many(pages) == [False] * 31 + [True] * 19
+    assert len(seen) == 51
+    assert seen.spilled == (max_memory == 7)
+    assert seen.contains_many(["p0", "p49", "new", "other"]) == {"p0", "p49", "new"}
+    # Memory holds at most max_memory pages once spilled.
+    assert len(seen._memory) <= min(max_memory, 51)
+    seen.close()